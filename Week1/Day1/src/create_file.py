@@ -1,20 +1,364 @@
+"""
+Generates test data for the pipelines in this repository: random text files of any size, and seeded,
+reproducible employee and ecommerce_sales datasets in CSV, JSON, NDJSON or Parquet.
+
+Randomness is drawn in bulk, a chunk at a time: text from random.randbytes mapped onto the alphabet
+with bytes.translate, dataset columns with one random.choices call per column, so output streams to
+disk without a random call per character or field. With --shards the output is split into files
+written by --workers processes. Every shard has its own seed, so the same --seed, --rows and --shards
+always give the same files, however many workers write them.
+
+employees has the columns of Week2/Day2/Data/employees.csv; ecommerce_sales has those of the table
+Week2/Day3/src/mysql_table.py creates. Parquet output needs pyarrow.
+
+    python create_file.py text --size 2GB -o random_text.txt
+    python create_file.py employees --rows 1000000 --format ndjson -o employees.ndjson
+    python create_file.py ecommerce_sales --rows 50000000 --format parquet --shards 16 --workers 8 -o sales
+"""
+import argparse
+import csv
+import json
+import os
 import random
 import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+from itertools import accumulate
+
+# Output settings
+TEXT_LENGTH = 1000  # Default size of a text file, in characters
+TEXT_CHUNK_SIZE = 8 * 1024 * 1024  # Characters generated and written at a time
+CHUNK_ROWS = 100000  # Dataset rows generated and written at a time (one Parquet row group)
+FORMATS = {"csv": ".csv", "json": ".json", "ndjson": ".ndjson", "parquet": ".parquet"}
+SIZE_UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+# Random bytes are mapped onto the alphabet with one translate call, each character taking 2 or 3 of the
+# 256 byte values. Dropping the surplus values to make them equally likely would cost 4x the throughput.
+TEXT_ALPHABET = (string.ascii_letters + string.digits + string.punctuation + " ").encode("ascii")
+TEXT_TABLE = bytes(TEXT_ALPHABET[value % len(TEXT_ALPHABET)] for value in range(256))
+
+# Reference data the dataset rows are drawn from
+FIRST_NAMES = ["Donald", "Douglas", "Jennifer", "Michael", "Pat", "Susan", "Hermann", "Shelley", "William",
+               "Steven", "Neena", "Lex", "Alexander", "Bruce", "David", "Valli", "Diana", "Nancy", "Daniel",
+               "John", "Ismael", "Luis", "Den", "Shelli", "Sigal", "Guy", "Karen", "Matthew",
+               "Adam", "Payam", "Julia", "Irene", "James", "Laura", "Jason", "Emma", "Sophia", "Chris", "Alice"]
+LAST_NAMES = ["OConnell", "Grant", "Whalen", "Hartstein", "Fay", "Mavris", "Baer", "Higgins", "Gietz", "King",
+              "Kochhar", "De Haan", "Hunold", "Ernst", "Austin", "Pataballa", "Lorentz", "Greenberg", "Faviet",
+              "Chen", "Sciarra", "Popp", "Raphaely", "Khoo", "Baida", "Tobias", "Himuro", "Colmenares", "Weiss",
+              "Fripp", "Kaufling", "Nayer", "Mikkilineni", "Landry", "Bissot", "Mallin", "Wilson", "Miller"]
+# (first name, last name, EMAIL as in employees.csv, customer name)
+PEOPLE = [(first, last, (first[0] + last.replace(" ", "")).upper()[:8], f"{first} {last}")
+          for first in FIRST_NAMES for last in LAST_NAMES]
+PHONE_PREFIXES = ["515.123", "515.124", "590.423", "603.123", "650.121", "650.124", "650.501", "650.507"]
+PHONE_SUFFIXES = [f"{number:04d}" for number in range(10000)]
+
+# (JOB_ID, DEPARTMENT_ID, MANAGER_ID, lowest salary, highest salary, paid commission, share of employees)
+EMPLOYEE_JOBS = [
+    ("AD_PRES", 90, 100, 24000, 24000, False, 1),
+    ("AD_VP", 90, 100, 17000, 17000, False, 2),
+    ("AD_ASST", 10, 101, 3000, 6000, False, 2),
+    ("MK_MAN", 20, 100, 9000, 15000, False, 1),
+    ("MK_REP", 20, 201, 4000, 9000, False, 3),
+    ("PU_MAN", 30, 100, 8000, 15000, False, 1),
+    ("PU_CLERK", 30, 114, 2500, 5500, False, 5),
+    ("HR_REP", 40, 101, 4000, 9000, False, 2),
+    ("SH_CLERK", 50, 124, 2500, 5500, False, 20),
+    ("ST_CLERK", 50, 121, 2000, 5000, False, 20),
+    ("ST_MAN", 50, 100, 5500, 8500, False, 3),
+    ("IT_PROG", 60, 103, 4000, 10000, False, 6),
+    ("PR_REP", 70, 101, 4500, 10500, False, 1),
+    ("SA_MAN", 80, 100, 10000, 20000, True, 3),
+    ("SA_REP", 80, 145, 6000, 12000, True, 25),
+    ("FI_MGR", 100, 101, 8200, 16000, False, 1),
+    ("FI_ACCOUNT", 100, 108, 4200, 9000, False, 5),
+    ("AC_MGR", 110, 101, 8200, 16000, False, 1),
+    ("AC_ACCOUNT", 110, 205, 4200, 9000, False, 2),
+]
+JOB_CUM_WEIGHTS = list(accumulate(job[6] for job in EMPLOYEE_JOBS))
+SALARY_STEPS = 64  # Salaries of a job are drawn from this many evenly spaced values, rounded to 100
+SALARIES = [[(low + (high - low) * step // (SALARY_STEPS - 1)) // 100 * 100 for step in range(SALARY_STEPS)]
+            for _, _, _, low, high, _, _ in EMPLOYEE_JOBS]
+COMMISSIONS = [0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4]
+
+# (product name, unit price in cents)
+PRODUCTS = [
+    ("Apple iPhone 14", 79999), ("Samsung Galaxy S23", 69999), ("Sony WH-1000XM5 Headphones", 29999),
+    ("MacBook Air M2", 119999), ("Dell XPS 13 Laptop", 99999), ("Logitech MX Master 3 Mouse", 9999),
+    ("Bose SoundLink Bluetooth Speaker", 19999), ("GoPro HERO10 Black", 39999), ("Nike Air Zoom Pegasus 39", 12999),
+    ("Kindle Paperwhite", 13999), ("Apple Watch Series 8", 39999), ("iPad Air 5th Gen", 59999),
+    ("Google Pixel 7", 59999), ("Nintendo Switch OLED", 34999), ("Sony PlayStation 5", 49999),
+    ("Anker PowerCore 20000", 4999), ("Samsung T7 1TB SSD", 10999), ("JBL Flip 6 Speaker", 12999),
+    ("Fitbit Charge 5", 14999), ("Echo Dot 5th Gen", 4999), ("LG 27 inch 4K Monitor", 39999),
+    ("Keychron K2 Keyboard", 7999), ("Instant Pot Duo 7-in-1", 8999), ("Dyson V11 Vacuum", 59999),
+]
+QUANTITIES = [1, 2, 3, 4, 5]
+QUANTITY_CUM_WEIGHTS = list(accumulate([60, 20, 10, 6, 4]))
+# Unit and total prices as exact two-decimal floats, by product and quantity
+UNIT_PRICES = [cents / 100 for _, cents in PRODUCTS]
+TOTAL_PRICES = [[cents * quantity / 100 for quantity in range(max(QUANTITIES) + 1)] for _, cents in PRODUCTS]
+PAYMENT_METHODS = ["Credit Card", "Debit Card", "PayPal", "Apple Pay", "Google Pay", "Amazon Pay"]
+PAYMENT_CUM_WEIGHTS = list(accumulate([40, 20, 15, 10, 8, 7]))
+
+
+def dates_between(first, last, date_format):
+    """Formats every date from `first` to `last` (inclusive) with `date_format`."""
+    return [(first + timedelta(days=day)).strftime(date_format) for day in range((last - first).days + 1)]
+
+
+HIRE_DATES = [text.upper() for text in dates_between(date(2001, 1, 1), date(2024, 12, 31), "%d-%b-%y")]  # 21-JUN-07
+ORDER_DATES = dates_between(date(2023, 1, 1), date(2025, 12, 31), "%Y-%m-%d")
+
 
-def generate_random_text(length):
+def employee_columns(rng, first_id, count):
+    """Generates `count` employees with ids from `first_id`, as one list per column."""
+    people = rng.choices(PEOPLE, k=count)
+    jobs = rng.choices(range(len(EMPLOYEE_JOBS)), cum_weights=JOB_CUM_WEIGHTS, k=count)
+    steps = rng.choices(range(SALARY_STEPS), k=count)
+    commissions = rng.choices(COMMISSIONS, k=count)
+    prefixes = rng.choices(PHONE_PREFIXES, k=count)
+    suffixes = rng.choices(PHONE_SUFFIXES, k=count)
+    return [
+        [str(employee_id) for employee_id in range(first_id, first_id + count)],  # The Employees table's key is a string
+        [person[0] for person in people],
+        [person[1] for person in people],
+        [person[2] for person in people],
+        [prefix + "." + suffix for prefix, suffix in zip(prefixes, suffixes)],
+        rng.choices(HIRE_DATES, k=count),
+        [EMPLOYEE_JOBS[job][0] for job in jobs],
+        [SALARIES[job][step] for job, step in zip(jobs, steps)],
+        [commission if EMPLOYEE_JOBS[job][5] else None for job, commission in zip(jobs, commissions)],
+        [EMPLOYEE_JOBS[job][2] for job in jobs],
+        [EMPLOYEE_JOBS[job][1] for job in jobs],
+    ]
+
+
+def ecommerce_sales_columns(rng, first_id, count):
+    """Generates `count` orders with ids from `first_id`, as one list per column."""
+    products = rng.choices(range(len(PRODUCTS)), k=count)
+    quantities = rng.choices(QUANTITIES, cum_weights=QUANTITY_CUM_WEIGHTS, k=count)
+    return [
+        list(range(first_id, first_id + count)),
+        [person[3] for person in rng.choices(PEOPLE, k=count)],
+        [PRODUCTS[product][0] for product in products],
+        quantities,
+        [UNIT_PRICES[product] for product in products],
+        [TOTAL_PRICES[product][quantity] for product, quantity in zip(products, quantities)],
+        rng.choices(ORDER_DATES, k=count),
+        rng.choices(PAYMENT_METHODS, cum_weights=PAYMENT_CUM_WEIGHTS, k=count),
+    ]
+
+
+# Datasets: columns as (name, type), the function generating a chunk of them, the id of the first
+# row, and how CSV writes a missing value. Types are "int", "float", "string" and "date" (ISO strings).
+DATASETS = {
+    "employees": {
+        "columns": [("EMPLOYEE_ID", "string"), ("FIRST_NAME", "string"), ("LAST_NAME", "string"), ("EMAIL", "string"),
+                    ("PHONE_NUMBER", "string"), ("HIRE_DATE", "string"), ("JOB_ID", "string"), ("SALARY", "int"),
+                    ("COMMISSION_PCT", "float"), ("MANAGER_ID", "int"), ("DEPARTMENT_ID", "int")],
+        "generate": employee_columns,
+        "first_id": 100,
+        "csv_null": " - "  # As in employees.csv
+    },
+    "ecommerce_sales": {
+        "columns": [("order_id", "int"), ("customer_name", "string"), ("product_name", "string"),
+                    ("quantity", "int"), ("unit_price", "float"), ("total_price", "float"),
+                    ("order_date", "date"), ("payment_method", "string")],
+        "generate": ecommerce_sales_columns,
+        "first_id": 101,
+        "csv_null": ""
+    },
+}
+
+
+def random_text_bytes(length, rng=random):
+    """
+    Returns `length` random characters of TEXT_ALPHABET as bytes, drawn TEXT_CHUNK_SIZE at a time
+    (randbytes cannot draw 256 MB or more in one call).
+    """
+    return b"".join(rng.randbytes(min(TEXT_CHUNK_SIZE, length - start)).translate(TEXT_TABLE)
+                    for start in range(0, length, TEXT_CHUNK_SIZE))
+
+
+def generate_random_text(length, rng=random):
     """Generate a string of random text of a given length."""
-    letters = string.ascii_letters + string.digits + string.punctuation + ' '
-    return ''.join(random.choice(letters) for i in range(length))
-
-def create_random_txt_file(file_path, length):
-    """Create a .txt file with random text content."""
-    random_text = generate_random_text(length)
-    with open(file_path, 'w') as file:
-        file.write(random_text)
+    return random_text_bytes(length, rng).decode("ascii")
+
+
+def write_text_shard(path, size, first_index, seed):
+    """Writes `size` random characters to `path`, TEXT_CHUNK_SIZE at a time."""
+    rng = random.Random(seed)
+    with open(path, "wb") as f:
+        for start in range(0, size, TEXT_CHUNK_SIZE):
+            f.write(random_text_bytes(min(TEXT_CHUNK_SIZE, size - start), rng))
+    return size
+
+
+def chunk_rows(dataset, rows, first_index, seed):
+    """Yields the shard's rows as lists of columns, CHUNK_ROWS rows at a time."""
+    rng = random.Random(seed)
+    first_id = dataset["first_id"] + first_index
+    for start in range(0, rows, CHUNK_ROWS):
+        yield dataset["generate"](rng, first_id + start, min(CHUNK_ROWS, rows - start))
+
+
+def write_csv(path, dataset, chunks):
+    names = [name for name, _ in dataset["columns"]]
+    nullable = [index for index, (_, kind) in enumerate(dataset["columns"]) if kind == "float"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(names)
+        for columns in chunks:
+            for index in nullable:
+                columns[index] = [dataset["csv_null"] if value is None else value for value in columns[index]]
+            writer.writerows(zip(*columns))
+
+
+def write_json(path, dataset, chunks, ndjson):
+    """Writes a JSON array with one object per line, or newline-delimited JSON."""
+    names = [name for name, _ in dataset["columns"]]
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    with open(path, "w", encoding="utf-8") as f:
+        separator = "\n" if ndjson else ",\n"
+        first = True
+        if not ndjson:
+            f.write("[\n")
+        for columns in chunks:
+            if not first:
+                f.write(separator)
+            f.write(separator.join([encode(dict(zip(names, row))) for row in zip(*columns)]))
+            first = False
+        f.write("\n" if ndjson else "\n]\n")
+
+
+def import_pyarrow():
+    """
+    Imports pyarrow for Parquet output, or returns None if it is missing; the other formats only
+    need the standard library.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def write_parquet(path, dataset, chunks):
+    """Writes one row group per chunk; "date" columns are stored as Parquet dates."""
+    pa = import_pyarrow()
+    if pa is None:
+        raise ValueError("Parquet output needs the pyarrow package (pip install pyarrow)")
+    types = {"int": pa.int64(), "float": pa.float64(), "string": pa.string(), "date": pa.date32()}
+    schema = pa.schema([(name, types[kind]) for name, kind in dataset["columns"]])
+    with pa.parquet.ParquetWriter(path, schema, compression="snappy") as writer:
+        for columns in chunks:
+            arrays = [pa.array(values, pa.string()).cast(pa.date32()) if kind == "date" else pa.array(values, types[kind])
+                      for values, (_, kind) in zip(columns, dataset["columns"])]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+
+
+def write_dataset_shard(dataset_name, file_format, path, rows, first_index, seed):
+    """Writes `rows` rows of the dataset to `path`, numbered from the shard's first row."""
+    dataset = DATASETS[dataset_name]
+    chunks = chunk_rows(dataset, rows, first_index, seed)
+    if file_format == "csv":
+        write_csv(path, dataset, chunks)
+    elif file_format == "parquet":
+        write_parquet(path, dataset, chunks)
+    else:
+        write_json(path, dataset, chunks, ndjson=file_format == "ndjson")
+    return rows
+
+
+def shard_paths(output, extension, shards):
+    """Returns `output` for a single file, or part files in the directory `output` for several shards."""
+    if shards == 1:
+        return [output]
+    os.makedirs(output, exist_ok=True)
+    return [os.path.join(output, f"part-{shard:05d}{extension}") for shard in range(shards)]
+
+
+def write_shards(write_shard, paths, total, seed, workers):
+    """
+    Splits `total` (rows or characters) evenly over the paths and runs write_shard(path, size, first
+    index, seed) for each, in `workers` processes when there is more than one. Shard seeds derive
+    from `seed` and the shard number (None draws fresh randomness). Returns a summary.
+    """
+    started = time.perf_counter()
+    sizes = [total // len(paths) + (shard < total % len(paths)) for shard in range(len(paths))]
+    first_indexes = [0, *accumulate(sizes)][:-1]
+    seeds = [None if seed is None else f"{seed}/{shard}" for shard in range(len(paths))]
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+            list(executor.map(write_shard, paths, sizes, first_indexes, seeds))
+    else:
+        for args in zip(paths, sizes, first_indexes, seeds):
+            write_shard(*args)
+    elapsed = time.perf_counter() - started
+    size = sum(os.path.getsize(path) for path in paths)
+    return {
+        "files": paths,
+        "count": total,
+        "bytes": size,
+        "elapsed_s": round(elapsed, 3),
+        "mb_per_second": round(size / 1024 ** 2 / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+
+def create_random_txt_file(file_path, length, seed=None, shards=1, workers=1):
+    """Create a .txt file with random text content (or `shards` files in the directory `file_path`)."""
+    summary = write_shards(write_text_shard, shard_paths(file_path, ".txt", shards), length, seed, workers)
     print(f"Random text file '{file_path}' created successfully.")
+    return summary
+
+
+def create_dataset(dataset_name, output, rows, file_format="csv", seed=None, shards=1, workers=1):
+    """
+    Writes `rows` rows of a dataset in DATASETS to `output` (a directory of part files if `shards` > 1).
+    Returns a summary with the files, bytes and throughput.
+    """
+    if file_format == "parquet" and import_pyarrow() is None:
+        raise ValueError("Parquet output needs the pyarrow package (pip install pyarrow)")
+    write_shard = partial(write_dataset_shard, dataset_name, file_format)
+    summary = write_shards(write_shard, shard_paths(output, FORMATS[file_format], shards), rows, seed, workers)
+    elapsed = summary["elapsed_s"]
+    summary["rows_per_second"] = round(rows / elapsed) if elapsed > 0 else 0
+    return summary
 
-if __name__ == "__main__":
-    file_path = "random_text.txt"  # Path to the .txt file to be created
-    text_length = 1000  # Length of the random text to be generated
 
-    create_random_txt_file(file_path, text_length)
\ No newline at end of file
+def parse_size(text):
+    """Parses a size such as 1000, 512MB or 2GB into bytes."""
+    text = text.strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", nargs="?", default="text", choices=["text", *DATASETS])
+    parser.add_argument("-o", "--output", help="File, or directory of part files with --shards")
+    parser.add_argument("--size", type=parse_size, default=TEXT_LENGTH, help="Characters of text, e.g. 2GB")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows of a dataset")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--seed", type=int, help="Same seed, same output; random if omitted")
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="Processes writing shards")
+    args = parser.parse_args()
+
+    if args.dataset == "text":
+        file_path = args.output or ("random_text" if args.shards > 1 else "random_text.txt")
+        summary = create_random_txt_file(file_path, args.size, args.seed, args.shards, args.workers)
+    else:
+        output = args.output or args.dataset + ("" if args.shards > 1 else FORMATS[args.format])
+        summary = create_dataset(args.dataset, output, args.rows, args.format, args.seed, args.shards, args.workers)
+        print(f"Wrote {args.rows} {args.dataset} rows to '{output}' ({summary['rows_per_second']} rows/s).")
+    print(f"{len(summary['files'])} file(s), {summary['bytes'] / 1024 ** 2:.1f} MB in {summary['elapsed_s']} s "
+          f"({summary['mb_per_second']} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
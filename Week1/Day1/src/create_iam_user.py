@@ -1,7 +1,11 @@
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
 
 # Initialize IAM client
-iam = boto3.client("iam")
+iam = get_client("iam")
 
 # Define user name
 user_name = "datalake_developer_2"
@@ -1,9 +1,13 @@
-import boto3
+import os
+import sys
 import mysql.connector
-import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+from waiters import RDS_INSTANCE_AVAILABLE, retry, wait  # noqa: E402
 
 # AWS RDS configuration
-rds = boto3.client("rds")
+rds = get_client("rds")
 
 db_instance_id = "mydbinstance"
 db_instance_class = "db.t3.micro"
@@ -37,13 +41,10 @@ if not check_rds_instance_exists(db_instance_id):
         print(f"RDS instance {db_instance_id} is being created...")
 
         # Wait for the instance to become available
-        while True:
-            response = rds.describe_db_instances(DBInstanceIdentifier=db_instance_id)
-            status = response["DBInstances"][0]["DBInstanceStatus"]
-            print(f"Current RDS Status: {status}")
-            if status == "available":
-                break
-            time.sleep(30)  # Wait before checking again
+        result = wait(RDS_INSTANCE_AVAILABLE, rds, db_instance_id,
+                      on_state=lambda instance_id, status: print(f"Current RDS Status: {status}"))
+        if result["outcome"] != "success":
+            print(f"RDS instance not available after {result['elapsed_s']:.0f} s: {result['state']}")
     except Exception as e:
         print(f"Error creating RDS instance: {str(e)}")
 else:
@@ -58,21 +59,14 @@ except Exception as e:
     print(f"Error fetching RDS instance endpoint: {str(e)}")
     exit()
 
-# 3️⃣ Connect to the MySQL Database
-for attempt in range(5):
-    try:
-        conn = mysql.connector.connect(
-            host=db_endpoint,
-            user=master_username,
-            password=master_password
-        )
-        cursor = conn.cursor()
-        print("Connected to the RDS MySQL database successfully!")
-        break
-    except mysql.connector.Error as err:
-        print(f"Error connecting to RDS database: {err}")
-        time.sleep(10)
-else:
+# 3️⃣ Connect to the MySQL Database (DNS and the listener can lag the "available" status; retried with backoff)
+try:
+    conn = retry(lambda: mysql.connector.connect(host=db_endpoint, user=master_username, password=master_password),
+                 mysql.connector.Error, attempts=6, timeout=120,
+                 on_error=lambda attempt, err: print(f"Error connecting to RDS database: {err}"))
+    cursor = conn.cursor()
+    print("Connected to the RDS MySQL database successfully!")
+except mysql.connector.Error:
     print("Failed to connect to RDS database after multiple attempts.")
     exit()
 
@@ -1,9 +1,14 @@
-import boto3
+import os
+import sys
 from botocore.exceptions import ClientError
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+from multipart_upload import MAX_CONCURRENCY, PART_SIZE, upload_file  # noqa: E402
+
 def create_bucket(bucket_name, region="us-east-1"):
     """Create an S3 bucket."""
-    s3_client = boto3.client("s3", region_name=region)
+    s3_client = get_client("s3", region)
     try:
         # Create bucket
         if region == "us-east-1":
@@ -17,12 +22,19 @@ def create_bucket(bucket_name, region="us-east-1"):
     except ClientError as e:
         print(f"Error: {e}")
 
-def upload_object(bucket_name, object_name, file_path):
-    """Upload a file to an S3 bucket."""
-    s3_client = boto3.client("s3")
+def upload_object(bucket_name, object_name, file_path, part_size=PART_SIZE, concurrency=MAX_CONCURRENCY,
+                  checksum=None):
+    """
+    Upload a file to an S3 bucket in parallel parts (see multipart_upload.upload_file).
+    If the upload fails, calling this again resumes it from the parts already uploaded.
+    """
+    s3_client = get_client("s3")
     try:
-        s3_client.upload_file(file_path, bucket_name, object_name)
-        print(f"File '{file_path}' uploaded as '{object_name}' in bucket '{bucket_name}'.")
+        summary = upload_file(s3_client, file_path, bucket_name, object_name, part_size=part_size,
+                              concurrency=concurrency, checksum=checksum)
+        print(f"File '{file_path}' uploaded as '{object_name}' in bucket '{bucket_name}' "
+              f"({summary['parts']} parts, {summary['parts_skipped']} resumed, {summary['mb_per_second']} MB/s).")
+        return summary
     except ClientError as e:
         print(f"Error: {e}")
 
@@ -37,4 +49,4 @@ if __name__ == "__main__":
     create_bucket(bucket_name, region)
 
     # Upload the .txt file to the S3 bucket
-    upload_object(bucket_name, object_name, file_path)
\ No newline at end of file
+    upload_object(bucket_name, object_name, file_path)
\ No newline at end of file
@@ -0,0 +1,194 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+# Transfer settings
+PART_SIZE = 64 * 1024 * 1024  # Bytes per part; at most MAX_CONCURRENCY parts are held in memory at once
+MAX_CONCURRENCY = 8  # Parts uploaded at the same time
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 rejects smaller parts, except the last one
+MAX_PARTS = 10000  # Parts per multipart upload; the part size grows to stay under it
+MAX_PART_ATTEMPTS = 4  # Attempts per part before the upload stops (and can be resumed)
+BACKOFF_BASE_SECONDS = 0.5
+
+# Per-part checksums S3 verifies on arrival, by algorithm name: (request parameter, digest function)
+CHECKSUMS = {
+    "CRC32": ("ChecksumCRC32", lambda data: zlib.crc32(data).to_bytes(4, "big")),
+    "SHA1": ("ChecksumSHA1", lambda data: hashlib.sha1(data).digest()),
+    "SHA256": ("ChecksumSHA256", lambda data: hashlib.sha256(data).digest()),
+}
+
+
+def part_checksum(data, algorithm):
+    """Returns the request parameter and base64 checksum of `data`, as S3 expects them."""
+    parameter, digest = CHECKSUMS[algorithm]
+    return parameter, base64.b64encode(digest(data)).decode("ascii")
+
+
+def manifest_path_for(file_path):
+    """Default location of the resume manifest of `file_path`."""
+    return f"{file_path}.upload.json"
+
+
+class UploadManifest:
+    """
+    Local record of a multipart upload in progress: the upload id and the parts S3 has acknowledged.
+    It only applies to the same file (size and mtime), destination, part size and checksum; it is
+    rewritten atomically after each part so an interrupted upload resumes with the parts it completed.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.upload_id = None
+        self.parts = {}  # part number -> {"ETag": ..., checksum parameter: ...}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, source):
+        manifest = cls(path, source)
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if saved.get("source") == source:
+            manifest.upload_id = saved["upload_id"]
+            manifest.parts = {int(number): part for number, part in saved["parts"].items()}
+        return manifest
+
+    def add(self, number, part):
+        with self._lock:
+            self.parts[number] = part
+            self.save()
+
+    def save(self):
+        temporary = self.path + ".partial"
+        with open(temporary, "w") as f:
+            json.dump({"source": self.source, "upload_id": self.upload_id, "parts": self.parts}, f)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def listed_parts(s3_client, bucket, key, upload_id):
+    """Returns {part number: ETag} of the parts S3 holds for an upload, following ListParts pagination."""
+    parts = {}
+    marker = 0
+    while True:
+        response = s3_client.list_parts(Bucket=bucket, Key=key, UploadId=upload_id, PartNumberMarker=marker)
+        for part in response.get("Parts", []):
+            parts[part["PartNumber"]] = part["ETag"]
+        if not response.get("IsTruncated"):
+            return parts
+        marker = response["NextPartNumberMarker"]
+
+
+def upload_file(s3_client, file_path, bucket, key, part_size=PART_SIZE, concurrency=MAX_CONCURRENCY,
+                checksum=None, manifest_path=None, extra_args=None):
+    """
+    Uploads `file_path` to s3://bucket/key in parts of `part_size` bytes, `concurrency` at a time,
+    and returns a summary with the throughput. Completed parts are recorded in a manifest
+    (`manifest_path`, next to the file by default); if the upload fails, calling this again with the
+    same settings skips the parts S3 already holds. `checksum` ("CRC32", "SHA1" or "SHA256") has S3
+    verify every part. Files no bigger than one part are sent with a single PutObject.
+    """
+    if checksum is not None and checksum not in CHECKSUMS:
+        raise ValueError(f"Unsupported checksum {checksum}, expected one of {', '.join(CHECKSUMS)}")
+    extra_args = dict(extra_args or {})
+    size = os.path.getsize(file_path)
+    part_size = max(part_size, MIN_PART_SIZE, -(-size // MAX_PARTS))
+    started = time.perf_counter()
+    summary = {"bytes": size, "bytes_uploaded": 0, "part_size": part_size, "parts": 1, "parts_uploaded": 0,
+               "parts_skipped": 0}
+
+    if size <= part_size:
+        with open(file_path, "rb") as f:
+            data = f.read()
+        if checksum:
+            parameter, value = part_checksum(data, checksum)
+            extra_args.update({"ChecksumAlgorithm": checksum, parameter: value})
+        s3_client.put_object(Bucket=bucket, Key=key, Body=data, **extra_args)
+        summary.update(parts_uploaded=1, bytes_uploaded=size)
+        return finish_summary(summary, started)
+
+    stat = os.stat(file_path)
+    source = {"bucket": bucket, "key": key, "size": size, "mtime": stat.st_mtime, "part_size": part_size,
+              "checksum": checksum}
+    manifest = UploadManifest.load(manifest_path or manifest_path_for(file_path), source)
+    done = {}
+    if manifest.upload_id:
+        try:
+            held = listed_parts(s3_client, bucket, key, manifest.upload_id)
+            done = {number: part for number, part in manifest.parts.items() if held.get(number) == part["ETag"]}
+        except Exception as e:
+            print(f"Upload {manifest.upload_id} can no longer be resumed, starting again: {e}")
+            manifest.upload_id = None
+    if not manifest.upload_id:
+        if checksum:
+            extra_args["ChecksumAlgorithm"] = checksum
+        manifest.upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)["UploadId"]
+    manifest.parts = done
+    manifest.save()
+
+    part_count = -(-size // part_size)
+    pending = [number for number in range(1, part_count + 1) if number not in done]
+    summary.update(parts=part_count, parts_skipped=part_count - len(pending))
+    if done:
+        print(f"Resuming upload of '{file_path}': {len(done)} of {part_count} parts already uploaded.")
+
+    def upload_part(number):
+        offset = (number - 1) * part_size
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(part_size)
+        request = {}
+        if checksum:
+            parameter, value = part_checksum(data, checksum)
+            request[parameter] = value
+        for attempt in range(1, MAX_PART_ATTEMPTS + 1):
+            try:
+                response = s3_client.upload_part(Bucket=bucket, Key=key, UploadId=manifest.upload_id,
+                                                 PartNumber=number, Body=data, **request)
+                break
+            except Exception as e:
+                if attempt == MAX_PART_ATTEMPTS:
+                    raise
+                delay = random.uniform(0, BACKOFF_BASE_SECONDS * 2 ** attempt)
+                print(f"Part {number} failed ({e}), retrying in {delay:.1f} s.")
+                time.sleep(delay)
+        manifest.add(number, {"ETag": response["ETag"], **request})
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(upload_part, number) for number in pending]
+        finished, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        failure = next((future.exception() for future in finished if future.exception()), None)
+        if failure:
+            for future in futures:
+                future.cancel()
+            print(f"Upload of '{file_path}' stopped with {len(manifest.parts)} of {part_count} parts done; "
+                  f"run it again to resume from {manifest.path}.")
+            raise failure
+    summary.update(parts_uploaded=len(pending),
+                   bytes_uploaded=sum(min(part_size, size - (number - 1) * part_size) for number in pending))
+
+    parts = [{"PartNumber": number, **manifest.parts[number]} for number in sorted(manifest.parts)]
+    s3_client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=manifest.upload_id,
+                                        MultipartUpload={"Parts": parts})
+    manifest.remove()
+    return finish_summary(summary, started)
+
+
+def finish_summary(summary, started):
+    """Adds the elapsed time and the throughput of the bytes sent by this call to an upload summary."""
+    elapsed = time.perf_counter() - started
+    summary["elapsed_s"] = round(elapsed, 3)
+    summary["mb_per_second"] = round(summary["bytes_uploaded"] / 1024 ** 2 / elapsed, 1) if elapsed > 0 else 0.0
+    return summary
@@ -0,0 +1,167 @@
+import mmap
+import os
+import random
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Transfer settings
+RANGE_SIZE = 16 * 1024 * 1024  # Bytes per ranged GET
+MAX_CONCURRENCY = 8  # Ranges fetched at the same time; iter_object holds at most this many in memory
+MAX_RANGE_ATTEMPTS = 4  # Attempts per range before the download fails
+BACKOFF_BASE_SECONDS = 0.5
+READ_SIZE = 1024 * 1024  # Bytes per read from a range's body
+
+
+def object_ranges(size, range_size=RANGE_SIZE):
+    """Splits an object of `size` bytes into (first byte, last byte) ranges of at most `range_size` bytes."""
+    return [(start, min(start + range_size, size) - 1) for start in range(0, size, range_size)]
+
+
+def read_into(body, view):
+    """
+    Fills `view` (a writable memoryview) from a streaming body, READ_SIZE bytes per read, with
+    StreamingBody.readinto where botocore has it and read otherwise. urllib3 reads into a temporary
+    bytes object and copies it either way, so bounding each read keeps that temporary at READ_SIZE
+    rather than the size of the range. Raises IOError if the body ends early.
+    """
+    filled = 0
+    if hasattr(body, "readinto"):
+        while filled < len(view):
+            count = body.readinto(view[filled:filled + READ_SIZE])
+            if not count:
+                break
+            filled += count
+    else:
+        while filled < len(view):
+            data = body.read(min(READ_SIZE, len(view) - filled))
+            if not data:
+                break
+            view[filled:filled + len(data)] = data
+            filled += len(data)
+    if filled != len(view):
+        raise IOError(f"Body ended after {filled} of {len(view)} bytes")
+    return filled
+
+
+def fetch_range(s3_client, bucket, key, etag, first, last, view):
+    """
+    Reads bytes first..last of the object into `view`, retrying with backoff. IfMatch pins every range to
+    the version the download started with, so an object replaced mid-download fails instead of mixing versions.
+    """
+    for attempt in range(1, MAX_RANGE_ATTEMPTS + 1):
+        try:
+            response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={first}-{last}", IfMatch=etag)
+            return read_into(response["Body"], view)
+        except Exception as e:
+            if attempt == MAX_RANGE_ATTEMPTS or getattr(e, "response", {}).get("Error", {}).get("Code") in (
+                    "PreconditionFailed", "NoSuchKey", "AccessDenied"):
+                raise
+            delay = random.uniform(0, BACKOFF_BASE_SECONDS * 2 ** attempt)
+            print(f"Range {first}-{last} of '{key}' failed ({e}), retrying in {delay:.1f} s.")
+            time.sleep(delay)
+
+
+def download_into(s3_client, bucket, key, buffer, etag, range_size=RANGE_SIZE, concurrency=MAX_CONCURRENCY):
+    """
+    Fetches the object into `buffer` (anything supporting the buffer protocol, sized to the object)
+    with `concurrency` ranged GETs at a time; each range is written in place.
+    """
+    view = memoryview(buffer)
+    size = len(view)
+    ranges = object_ranges(size, range_size)
+    range_views = [view[first:last + 1] for first, last in ranges]
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(fetch_range, s3_client, bucket, key, etag, first, last, range_view)
+                       for (first, last), range_view in zip(ranges, range_views)]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    except BaseException as e:
+        traceback.clear_frames(e.__traceback__)  # The failed range's frames still hold views of the buffer
+        raise
+    finally:
+        # A buffer with views left cannot be closed (download_file's mmap would raise BufferError
+        # in place of the range's error), so every view is released once the ranges are done
+        for range_view in range_views:
+            range_view.release()
+        view.release()
+    return size
+
+
+def download_file(s3_client, bucket, key, path, range_size=RANGE_SIZE, concurrency=MAX_CONCURRENCY):
+    """
+    Downloads s3://bucket/key to `path` with concurrent ranged GETs, written straight into a memory map
+    of the preallocated file. The file only appears at `path` once complete. Returns a summary with the throughput.
+    """
+    started = time.perf_counter()
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    size = head["ContentLength"]
+    temporary = path + ".partial"
+    try:
+        with open(temporary, "w+b") as f:
+            f.truncate(size)
+            if size:
+                with mmap.mmap(f.fileno(), size) as mapped:
+                    download_into(s3_client, bucket, key, mapped, head["ETag"], range_size, concurrency)
+                    mapped.flush()
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return download_summary(size, range_size, started)
+
+
+def download_bytes(s3_client, bucket, key, range_size=RANGE_SIZE, concurrency=MAX_CONCURRENCY):
+    """
+    Reads s3://bucket/key into memory with concurrent ranged GETs, filling one preallocated bytearray.
+    """
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    buffer = bytearray(head["ContentLength"])
+    download_into(s3_client, bucket, key, buffer, head["ETag"], range_size, concurrency)
+    return buffer
+
+
+def iter_object(s3_client, bucket, key, range_size=RANGE_SIZE, concurrency=MAX_CONCURRENCY):
+    """
+    Yields the object as bytearrays of `range_size` bytes, in order, while the next `concurrency` - 1
+    ranges are already being fetched. Memory stays at about `concurrency` ranges whatever the object's
+    size, so a pipeline can consume a large object as it arrives. Stopping early cancels the ranges not started.
+    """
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    ranges = deque(object_ranges(head["ContentLength"], range_size))
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    in_flight = deque()
+
+    def fetch(first, last):
+        buffer = bytearray(last - first + 1)
+        fetch_range(s3_client, bucket, key, head["ETag"], first, last, memoryview(buffer))
+        return buffer
+
+    try:
+        while ranges or in_flight:
+            while ranges and len(in_flight) < concurrency:
+                in_flight.append(executor.submit(fetch, *ranges.popleft()))
+            yield in_flight.popleft().result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def download_summary(size, range_size, started):
+    """Summarises a download: bytes, ranges, elapsed time and throughput."""
+    elapsed = time.perf_counter() - started
+    return {
+        "bytes": size,
+        "ranges": len(object_ranges(size, range_size)),
+        "elapsed_s": round(elapsed, 3),
+        "mb_per_second": round(size / 1024 ** 2 / elapsed, 1) if elapsed > 0 else 0.0
+    }
@@ -0,0 +1,210 @@
+"""
+Syncs a local directory to an S3 prefix: only new or changed files are uploaded, and with --delete the
+objects whose files no longer exist locally are removed.
+
+Files are compared with their objects by size and modification time (the default; an object uploaded
+after the file was last modified is up to date), or by content hash against the object's ETag. Hashes
+only match ETags of objects uploaded without SSE-KMS, in parts of --part-size-mb if they were multipart.
+
+    python sync_directory.py ./images anusha-gallery-2 --prefix images/
+    python sync_directory.py ./data lambda-s3 --compare hash --delete --dry-run
+"""
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+from multipart_upload import MAX_CONCURRENCY, MIN_PART_SIZE, PART_SIZE, manifest_path_for, upload_file  # noqa: E402
+
+# Sync settings
+SYNC_WORKERS = 32  # Files uploaded (or hashed) at the same time
+DELETE_BATCH_SIZE = 1000  # DeleteObjects takes at most 1000 keys per call
+HASH_READ_SIZE = 1024 * 1024
+COMPARE_MODES = ("size-mtime", "hash")
+MANIFEST_SUFFIX = manifest_path_for("")  # Resume manifests of interrupted uploads are never synced
+
+
+def scan_local(directory):
+    """
+    Returns {relative path with "/" separators: (path, size, mtime)} for every file under `directory`,
+    except upload manifests. os.scandir reuses the attributes of the directory listing, so on most
+    systems a large tree needs no extra stat calls.
+    """
+    files = {}
+    pending = [directory]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file() and not entry.name.endswith((MANIFEST_SUFFIX, MANIFEST_SUFFIX + ".partial")):
+                    stat = entry.stat()
+                    relative = os.path.relpath(entry.path, directory).replace(os.sep, "/")
+                    files[relative] = (entry.path, stat.st_size, stat.st_mtime)
+    return files
+
+
+def folder_prefix(prefix):
+    """The prefix as a folder: "images" becomes "images/", so it does not also match "images-backup/..."."""
+    return prefix + "/" if prefix and not prefix.endswith("/") else prefix
+
+
+def list_remote(s3_client, bucket, prefix):
+    """
+    Returns {key relative to `prefix`: (size, ETag, last modified timestamp)}, following ListObjectsV2 pagination.
+    Folder marker objects (keys ending in "/") are left out: they have no file to match.
+    """
+    prefix = folder_prefix(prefix)
+    objects = {}
+    request = {"Bucket": bucket, "Prefix": prefix}
+    while True:
+        response = s3_client.list_objects_v2(**request)
+        for entry in response.get("Contents", []):
+            if entry["Key"].endswith("/") or entry["Key"] == prefix:
+                continue
+            objects[entry["Key"][len(prefix):]] = (entry["Size"], entry["ETag"], entry["LastModified"].timestamp())
+        if not response.get("IsTruncated"):
+            return objects
+        request["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def file_etag(path, size, part_size):
+    """
+    Returns the ETag S3 gives `path` when upload_file sends it: the MD5 of a single PutObject, or the
+    MD5 of the part MD5s with the part count for a multipart upload.
+    """
+    part_size = max(part_size, MIN_PART_SIZE)
+    digests = []
+    with open(path, "rb") as f:
+        if size <= part_size:
+            digest = hashlib.md5()
+            for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+                digest.update(block)
+            return f'"{digest.hexdigest()}"'
+        while True:
+            digest = hashlib.md5()
+            remaining = part_size
+            while remaining:
+                block = f.read(min(HASH_READ_SIZE, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+            if remaining == part_size:
+                break
+            digests.append(digest.digest())
+    return f'"{hashlib.md5(b"".join(digests)).hexdigest()}-{len(digests)}"'
+
+
+def plan_sync(local, remote, compare="size-mtime", part_size=PART_SIZE, executor=None):
+    """
+    Returns the relative paths to upload (new or changed) and the ones to delete (only on S3).
+    Hashes are computed on `executor` when given, since hashlib releases the GIL on large reads.
+    """
+    if compare not in COMPARE_MODES:
+        raise ValueError(f"Unknown comparison {compare}, expected one of {', '.join(COMPARE_MODES)}")
+    uploads = []
+    candidates = []  # Same size as the object, to be compared by hash
+    for relative, (path, size, mtime) in local.items():
+        stored = remote.get(relative)
+        if stored is None or stored[0] != size:
+            uploads.append(relative)
+        elif compare == "size-mtime":
+            if mtime > stored[2]:
+                uploads.append(relative)
+        else:
+            candidates.append(relative)
+    if candidates:
+        run = executor.map if executor else map
+        etags = run(lambda relative: file_etag(local[relative][0], local[relative][1], part_size), candidates)
+        uploads.extend(relative for relative, etag in zip(candidates, etags) if etag != remote[relative][1])
+    deletes = [relative for relative in remote if relative not in local]
+    return sorted(uploads), sorted(deletes)
+
+
+def sync_directory(s3_client, directory, bucket, prefix="", compare="size-mtime", delete=False, dry_run=False,
+                   workers=SYNC_WORKERS, part_size=PART_SIZE, part_concurrency=MAX_CONCURRENCY):
+    """
+    Uploads the new and changed files of `directory` to s3://bucket/prefix on `workers` threads and,
+    with `delete`, removes the objects under `prefix` that have no local file. Large files are sent
+    as multipart uploads (see multipart_upload.upload_file). A prefix without a trailing "/" is taken as
+    a folder all the same. Returns a summary of the sync.
+    """
+    prefix = folder_prefix(prefix)
+    started = time.perf_counter()
+    local = scan_local(directory)
+    remote = list_remote(s3_client, bucket, prefix)
+    scanned = time.perf_counter()
+    summary = {"local_files": len(local), "remote_objects": len(remote), "uploaded": 0, "bytes_uploaded": 0,
+               "deleted": 0, "failed": 0}
+    stats_lock = threading.Lock()
+
+    def upload(relative):
+        path, size, _ = local[relative]
+        try:
+            upload_file(s3_client, path, bucket, prefix + relative, part_size=part_size, concurrency=part_concurrency)
+        except Exception as e:
+            print(f"Error uploading '{path}': {e}")
+            with stats_lock:
+                summary["failed"] += 1
+            return
+        with stats_lock:
+            summary["uploaded"] += 1
+            summary["bytes_uploaded"] += size
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        uploads, deletes = plan_sync(local, remote, compare, part_size, executor)
+        summary.update(unchanged=len(local) - len(uploads), to_upload=len(uploads),
+                       to_delete=len(deletes) if delete else 0, scan_s=round(scanned - started, 3))
+        if dry_run:
+            for relative in uploads:
+                print(f"Would upload {relative}")
+            for relative in deletes if delete else []:
+                print(f"Would delete {relative}")
+        else:
+            list(executor.map(upload, uploads))
+
+    if delete and deletes and not dry_run:
+        keys = [prefix + relative for relative in deletes]
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            response = s3_client.delete_objects(Bucket=bucket, Delete={
+                "Objects": [{"Key": key} for key in keys[start:start + DELETE_BATCH_SIZE]], "Quiet": True})
+            for error in response.get("Errors", []):
+                print(f"Error deleting '{error['Key']}': {error.get('Message', error.get('Code'))}")
+            summary["deleted"] += len(keys[start:start + DELETE_BATCH_SIZE]) - len(response.get("Errors", []))
+            summary["failed"] += len(response.get("Errors", []))
+    summary["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("bucket")
+    parser.add_argument("--prefix", default="", help="Key prefix the directory maps to, e.g. images/")
+    parser.add_argument("--compare", choices=COMPARE_MODES, default="size-mtime")
+    parser.add_argument("--delete", action="store_true", help="Delete objects whose files no longer exist locally")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would change")
+    parser.add_argument("--workers", type=int, default=SYNC_WORKERS)
+    parser.add_argument("--part-size-mb", type=int, default=PART_SIZE // 1024 ** 2)
+    args = parser.parse_args()
+
+    # One connection per worker, plus the parts a large file uploads at the same time
+    s3_client = get_client("s3", max_pool_connections=args.workers + MAX_CONCURRENCY)
+    summary = sync_directory(s3_client, args.directory, args.bucket, args.prefix, args.compare, args.delete,
+                             args.dry_run, args.workers, args.part_size_mb * 1024 ** 2)
+    print(f"{summary['local_files']} local files, {summary['remote_objects']} objects under "
+          f"s3://{args.bucket}/{args.prefix} (scanned and listed in {summary['scan_s']} s)")
+    print(f"Uploaded {summary['uploaded']} of {summary['to_upload']} new or changed files "
+          f"({summary['bytes_uploaded'] / 1024 ** 2:.1f} MB), {summary['unchanged']} unchanged, "
+          f"deleted {summary['deleted']} of {summary['to_delete']}, {summary['failed']} failed, "
+          f"in {summary['elapsed_s']} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
-import boto3
+import sys
 import os
-import time
 import botocore.exceptions
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+from waiters import GLUE_CRAWLER_FINISHED, wait  # noqa: E402
+
 # AWS Configuration
 AWS_REGION = "us-east-2"
 BUCKET_NAME = "my-csv-bucket"
@@ -13,8 +16,8 @@ GLUE_CRAWLER_NAME = "employees_crawler"
 IAM_ROLE_NAME = "AWSGlueServiceRole"
 
 # Initialize AWS clients
-s3_client = boto3.client("s3", region_name=AWS_REGION)
-glue_client = boto3.client("glue", region_name=AWS_REGION)
+s3_client = get_client("s3", AWS_REGION)
+glue_client = get_client("glue", AWS_REGION)
 
 
 def create_s3_bucket(bucket_name, region):
@@ -86,15 +89,16 @@ def start_glue_crawler(crawler_name):
     print(f"Starting Glue Crawler '{crawler_name}'...")
     glue_client.start_crawler(Name=crawler_name)
 
-    # Wait for completion
-    while True:
-        response = glue_client.get_crawler(Name=crawler_name)
-        status = response["Crawler"]["State"]
-        if status == "READY":
-            print(f"Glue Crawler '{crawler_name}' completed successfully.")
-            break
-        print(f"Crawler is running... Waiting 10 seconds.")
-        time.sleep(10)
+    # Wait for completion: the crawler is READY again, and its last crawl says how it went
+    result = wait(GLUE_CRAWLER_FINISHED, glue_client, crawler_name,
+                  on_state=lambda name, state: print(f"Crawler is {(state or 'starting').lower()}..."))
+    if result["outcome"] == "success":
+        print(f"Glue Crawler '{crawler_name}' completed successfully.")
+    elif result["outcome"] == "failure":
+        print(f"Glue Crawler '{crawler_name}' {result['state'].lower()}: "
+              f"{result['response'].get('LastCrawl', {}).get('ErrorMessage', 'no error message')}")
+    else:
+        print(f"Glue Crawler '{crawler_name}' still {result['state']} after {result['elapsed_s']:.0f} s.")
 
 
 def check_glue_table(database_name):
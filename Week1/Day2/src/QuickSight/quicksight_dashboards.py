@@ -1,6 +1,10 @@
-import boto3
+import os
+import sys
 
-client = boto3.client('quicksight', region_name='us-east-1')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+
+client = get_client('quicksight', 'us-east-1')
 
 account_id = "970547378939"  # Replace with your actual AWS Account ID
 
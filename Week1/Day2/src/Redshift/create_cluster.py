@@ -1,4 +1,8 @@
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
 
 # AWS Configuration
 AWS_REGION = "us-east-1"  # Change if needed
@@ -10,7 +14,7 @@ NODE_TYPE = "dc2.large"  # Free-tier node type
 NUMBER_OF_NODES = 1  # Single-node (free tier eligible)
 
 # Create Redshift client
-redshift = boto3.client("redshift", region_name=AWS_REGION)
+redshift = get_client("redshift", AWS_REGION)
 
 # Create a Redshift Cluster
 try:
@@ -1,24 +1,8 @@
-import psycopg2
-
-# Replace with your Redshift cluster details
-host = "my-redshift-cluster.csgshqmtgnij.us-east-1.redshift.amazonaws.com"
-port = "5439"
-dbname = "dev"
-user = "admin"
-password = "YourSecurePassword123"
+from redshift_db import get_pool, print_stats
 
 try:
     print("🚀 Trying to connect to AWS Redshift...")
-    conn = psycopg2.connect(
-        dbname=dbname,
-        user=user,
-        password=password,
-        host=host,
-        port=port
-    )
-    print("✅ Connected to AWS Redshift successfully!")
-
-    cursor = conn.cursor()
+    pool = get_pool()
 
     # Create a table
     create_table_query = """
@@ -29,22 +13,21 @@ try:
         salary DECIMAL(10, 2)
     );
     """
-    cursor.execute(create_table_query)
-    conn.commit()
+    pool.execute(create_table_query)
     print("✅ Table 'employees' created successfully!")
 
-    # Insert data into the table
-    insert_data_query = """
-    INSERT INTO employees (id, name, department, salary) VALUES
-    (1, 'Alice Johnson', 'IT', 75000.00),
-    (2, 'Bob Smith', 'Finance', 80000.00),
-    (3, 'Charlie Brown', 'HR', 70000.00);
-    """
-    cursor.execute(insert_data_query)
-    conn.commit()
+    # Insert sample data into the table; large loads go through redshift_copy.py
+    employees = [
+        (1, "Alice Johnson", "IT", 75000.00),
+        (2, "Bob Smith", "Finance", 80000.00),
+        (3, "Charlie Brown", "HR", 70000.00)
+    ]
+    insert_data_query = ("INSERT INTO employees (id, name, department, salary) VALUES "
+                         + ", ".join(["(%s, %s, %s, %s)"] * len(employees)) + ";")
+    pool.execute(insert_data_query, [value for employee in employees for value in employee])
     print("✅ Data inserted into 'employees' table successfully!")
 
-    cursor.close()
-    conn.close()
+    print_stats(pool)
+    pool.close()
 except Exception as e:
     print(f"❌ Connection Error: {e}")
\ No newline at end of file
@@ -0,0 +1,397 @@
+"""
+Bulk loads into Redshift through S3 and COPY, instead of INSERT statements.
+
+An INSERT goes through the leader node one statement at a time; COPY has every slice of the cluster
+read its share of the files in parallel. load_file and load_rows therefore stage the data in S3 first:
+
+- the data is split into gzip-compressed CSV (or newline-delimited JSON) parts, as many as the cluster
+  has slices, or a multiple of that when parts would exceed PART_TARGET_BYTES, so every slice gets an
+  even share of the work
+- the parts are compressed and uploaded by UPLOAD_WORKERS threads, and listed in a manifest, so COPY
+  loads exactly these files and fails if one is missing
+- a single COPY ... MANIFEST GZIP loads them in one transaction, up to MAXERROR bad rows skipped
+- the report gives the rows loaded (pg_last_copy_count) and the rejected rows from stl_load_errors
+
+    from redshift_copy import load_file, load_rows
+
+    report = load_file("employees.csv", "employees", null_as=" - ")
+    report = load_rows([(1, "Alice Johnson", "IT", 75000.00)], "employees", ["id", "name", "department", "salary"])
+
+Files must hold one record per line (as create_file.py writes them), since they are split at line
+breaks. Staged files are deleted once loaded, and kept to look into when the COPY fails.
+
+    python redshift_copy.py employees.csv employees --null-as " - " --max-errors 10
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from redshift_db import get_pool, print_stats
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+
+# Staging settings; the cluster's IAM role must be allowed to read the bucket
+AWS_REGION = "us-east-1"
+STAGING_BUCKET = os.environ.get("REDSHIFT_STAGING_BUCKET", "my-redshift-staging-bucket")
+STAGING_PREFIX = "redshift-copy/"
+COPY_IAM_ROLE = os.environ.get("REDSHIFT_COPY_ROLE_ARN", "default")  # "default" uses the cluster's default role
+
+# Load settings
+PART_TARGET_BYTES = 256 * 1024 * 1024  # Uncompressed size of a part at most, before more parts per slice are used
+GZIP_LEVEL = 6
+UPLOAD_WORKERS = 8  # Parts compressed and uploaded at a time
+MAX_ERRORS = 0  # Bad rows COPY skips before it fails; 0 loads all rows or none
+ERROR_DETAIL_LIMIT = 100  # Rows of stl_load_errors included in the report
+NULL_AS = "\\N"  # Written for None by load_rows
+READ_SIZE = 1024 * 1024
+ROWS_PER_BLOCK = 1000  # Rows written to one part before moving to the next
+FORMATS = {"csv": "CSV", "ndjson": "FORMAT AS JSON 'auto ignorecase'"}
+
+
+def slice_count(pool):
+    """Slices in the cluster; each one loads its own files in parallel."""
+    return pool.query("SELECT COUNT(*) FROM stv_slices;")[0][0]
+
+
+def part_count(size, slices):
+    """A multiple of the slice count, so that no part is bigger than PART_TARGET_BYTES."""
+    return slices * max(1, math.ceil(size / (slices * PART_TARGET_BYTES)))
+
+
+def split_file(path, parts, header=False):
+    """Splits a file into up to `parts` byte ranges of whole lines, skipping the header line."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        start = len(f.readline()) if header else 0
+        bounds = [start]
+        for index in range(1, parts):
+            f.seek(max(start + (size - start) * index // parts, bounds[-1]))
+            if f.tell() > 0:
+                f.readline()  # To the end of the line the range would split
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(first, last) for first, last in zip(bounds, bounds[1:]) if last > first]
+
+
+def gzip_compressor():
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip header and trailer
+
+
+class StagedPart:
+    """One gzip-compressed part, written to a temporary file until it is uploaded."""
+
+    def __init__(self, index):
+        self.index = index  # Order in the manifest
+        self.file = tempfile.TemporaryFile()
+        self.compressor = gzip_compressor()
+        self.rows = 0
+        self.size = 0  # Uncompressed bytes
+
+    def write(self, data, rows):
+        self.file.write(self.compressor.compress(data))
+        self.rows += rows
+        self.size += len(data)
+
+    def finish(self):
+        self.file.write(self.compressor.flush())
+        self.file.seek(0)
+        return self
+
+
+class Stager:
+    """Uploads the parts of one load under its own prefix, and the manifest that lists them."""
+
+    def __init__(self, s3_client, bucket, table):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = f"{STAGING_PREFIX}{table}/{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}/"
+        self.entries = []  # Manifest entries, in part order
+        self.keys = []
+        self.staged_bytes = 0
+        self._lock = threading.Lock()
+
+    def upload(self, part, extension):
+        key = f"{self.prefix}part-{part.index:05d}{extension}.gz"
+        compressed = part.file.seek(0, io.SEEK_END)
+        part.file.seek(0)
+        try:
+            self.s3.put_object(Bucket=self.bucket, Key=key, Body=part.file)
+        finally:
+            part.file.close()
+        with self._lock:
+            self.keys.append(key)
+            self.staged_bytes += compressed
+            self.entries.append((part.index, {"url": f"s3://{self.bucket}/{key}", "mandatory": True,
+                                              "meta": {"content_length": compressed}}))
+
+    def write_manifest(self):
+        key = f"{self.prefix}manifest.json"
+        manifest = {"entries": [entry for _, entry in sorted(self.entries, key=lambda item: item[0])]}
+        self.s3.put_object(Bucket=self.bucket, Key=key, Body=json.dumps(manifest, indent=2).encode("utf-8"))
+        self.keys.append(key)
+        return f"s3://{self.bucket}/{key}"
+
+    def delete(self):
+        for start in range(0, len(self.keys), 1000):  # DeleteObjects takes 1000 keys at most
+            self.s3.delete_objects(Bucket=self.bucket, Delete={
+                "Objects": [{"Key": key} for key in self.keys[start:start + 1000]], "Quiet": True})
+
+
+def stage_range(index, path, first, last):
+    """Compresses bytes first..last of a file into a part, counting its lines."""
+    part = StagedPart(index)
+    with open(path, "rb") as f:
+        f.seek(first)
+        remaining = last - first
+        data = b""
+        while remaining > 0:
+            data = f.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            part.write(data, data.count(b"\n"))
+        if data and not data.endswith(b"\n"):
+            part.write(b"\n", 1)  # The last line of the file had no line break
+    return part.finish()
+
+
+def stage_file(stager, path, slices, header, extension):
+    """Uploads a file as compressed parts, one range of lines each; returns (rows, uncompressed bytes)."""
+    ranges = split_file(path, part_count(os.path.getsize(path), slices), header)
+
+    def stage(index):
+        part = stage_range(index, path, *ranges[index])
+        rows, size = part.rows, part.size
+        stager.upload(part, extension)
+        return rows, size
+
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        results = list(executor.map(stage, range(len(ranges))))
+    return sum(rows for rows, _ in results), sum(size for _, size in results)
+
+
+def iterate_rows(rows, columns):
+    """Yields rows as sequences; dicts are ordered by `columns`, and dataframe chunks are split into rows."""
+    for item in rows:
+        if hasattr(item, "itertuples"):  # A pandas DataFrame, e.g. a chunk of pd.read_csv(chunksize=...)
+            yield from item.itertuples(index=False, name=None)
+        elif isinstance(item, dict):
+            yield [item.get(column) for column in columns]
+        else:
+            yield item
+
+
+def stage_rows(stager, rows, columns, slices, null_as):
+    """
+    Writes rows as CSV into a set of slice-count parts, a block of rows to each in turn. Once the
+    parts reach PART_TARGET_BYTES, the set is uploaded in the background and a new one started, so
+    the files always come in multiples of the slice count.
+    """
+    executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
+    uploads = []
+    parts = [StagedPart(index) for index in range(slices)]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    total_rows = total_bytes = block_rows = 0
+    slot = 0
+
+    def upload_parts():
+        for part in parts:
+            uploads.append(executor.submit(stager.upload, part.finish(), ".csv"))
+
+    try:
+        for row in iterate_rows(rows, columns):
+            writer.writerow([null_as if value is None else value for value in row])
+            block_rows += 1
+            if block_rows < ROWS_PER_BLOCK:
+                continue
+            data = buffer.getvalue().encode("utf-8")
+            parts[slot].write(data, block_rows)
+            total_rows += block_rows
+            total_bytes += len(data)
+            buffer.seek(0)
+            buffer.truncate()
+            block_rows = 0
+            slot = (slot + 1) % slices
+            if slot == 0 and parts[0].size >= PART_TARGET_BYTES:
+                upload_parts()
+                parts = [StagedPart(part.index + slices) for part in parts]
+        if block_rows:
+            data = buffer.getvalue().encode("utf-8")
+            parts[slot].write(data, block_rows)
+            total_rows += block_rows
+            total_bytes += len(data)
+        if total_rows == 0 or any(part.rows for part in parts):
+            upload_parts()  # Parts left empty are uploaded too; COPY loads nothing from them
+        else:
+            for part in parts:
+                part.file.close()
+        for upload in uploads:
+            upload.result()
+    finally:
+        executor.shutdown(wait=True)
+    return total_rows, total_bytes
+
+
+def copy_statement(table, columns, manifest_url, file_format, null_as, max_errors):
+    """The COPY statement and its parameters."""
+    role = "IAM_ROLE default" if COPY_IAM_ROLE == "default" else f"IAM_ROLE '{COPY_IAM_ROLE}'"
+    target = f"{table} ({', '.join(columns)})" if columns else table
+    sql = f"COPY {target} FROM '{manifest_url}' {role} MANIFEST GZIP {FORMATS[file_format]}"
+    params = []
+    if file_format == "csv" and null_as is not None:
+        sql += " NULL AS %s"
+        params.append(null_as)
+    sql += " MAXERROR %s DATEFORMAT 'auto' TIMEFORMAT 'auto' COMPUPDATE OFF STATUPDATE OFF;"
+    params.append(max_errors)
+    return sql, params
+
+
+def load_errors(cursor, query_id=None):
+    """Rows of stl_load_errors for a COPY, by default the last one this session ran."""
+    if query_id is None:
+        cursor.execute("SELECT MAX(query) FROM stl_load_errors WHERE session = pg_backend_pid();")
+        query_id = cursor.fetchone()[0]
+        if query_id is None:
+            return []
+    cursor.execute("SELECT TRIM(filename), line_number, TRIM(colname), err_code, TRIM(err_reason), TRIM(raw_line) "
+                   "FROM stl_load_errors WHERE query = %s ORDER BY filename, line_number LIMIT %s;",
+                   (query_id, ERROR_DETAIL_LIMIT))
+    return [dict(zip(["filename", "line_number", "column", "code", "reason", "raw_line"], row))
+            for row in cursor.fetchall()]
+
+
+def copy_staged(cursor, stager, table, columns, file_format, null_as, max_errors):
+    """
+    Runs the COPY of the staged files in the cursor's transaction and returns (rows loaded, skipped
+    rows from stl_load_errors). A failed COPY raises; load_errors(cursor) after a rollback tells why.
+    """
+    manifest_url = stager.write_manifest()
+    sql, params = copy_statement(table, columns, manifest_url, file_format, null_as, max_errors)
+    cursor.execute(sql, params)
+    cursor.execute("SELECT pg_last_copy_id(), pg_last_copy_count();")
+    query_id, rows_loaded = cursor.fetchone()
+    return rows_loaded, load_errors(cursor, query_id)
+
+
+def run_copy(pool, stager, table, columns, file_format, null_as, max_errors):
+    """Runs the COPY on one pooled connection; returns (status, rows loaded, errors, error message)."""
+    with pool.transaction() as cursor:
+        try:
+            rows_loaded, errors = copy_staged(cursor, stager, table, columns, file_format, null_as, max_errors)
+        except Exception as e:
+            cursor.connection.rollback()
+            return "failed", 0, load_errors(cursor), str(e).strip()
+        return "loaded", rows_loaded, errors, None
+
+
+def stage_data(stage, table, bucket, pool, s3_client):
+    """Runs stage(stager, slices); returns (stager, slices, rows, uncompressed bytes)."""
+    stager = Stager(s3_client or get_client("s3", AWS_REGION), bucket or STAGING_BUCKET, table)
+    slices = slice_count(pool)
+    rows, size = stage(stager, slices)
+    return stager, slices, rows, size
+
+
+def file_stage(path, file_format, header):
+    """A stage function for stage_data, staging the lines of a CSV or newline-delimited JSON file."""
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format '{file_format}'; use one of {', '.join(FORMATS)}")
+    extension = ".csv" if file_format == "csv" else ".json"
+    return lambda stager, slices: stage_file(stager, path, slices, header and file_format == "csv", extension)
+
+
+def rows_stage(rows, columns, null_as):
+    """A stage function for stage_data, staging rows as CSV."""
+    return lambda stager, slices: stage_rows(stager, rows, columns, slices, null_as)
+
+
+def load(stage, table, columns, file_format, null_as, max_errors, bucket, pool, s3_client, keep_staged):
+    pool = pool or get_pool()
+    started = time.perf_counter()
+    stager, slices, rows, size = stage_data(stage, table, bucket, pool, s3_client)
+    staged = time.perf_counter()
+    status, rows_loaded, errors, error = run_copy(pool, stager, table, columns, file_format, null_as, max_errors)
+    finished = time.perf_counter()
+    if status == "loaded" and not keep_staged:
+        stager.delete()
+    return {
+        "status": status, "table": table, "rows": rows, "rows_loaded": rows_loaded, "errors": errors, "error": error,
+        "files": len(stager.entries), "bytes": size, "staged_bytes": stager.staged_bytes, "slices": slices,
+        "stage_s": round(staged - started, 3), "copy_s": round(finished - staged, 3),
+        "elapsed_s": round(finished - started, 3),
+        "rows_per_second": round(rows_loaded / (finished - started)) if finished > started else 0,
+        "manifest": f"s3://{stager.bucket}/{stager.prefix}manifest.json"
+    }
+
+
+def load_file(path, table, columns=None, file_format="csv", header=True, null_as=None, max_errors=MAX_ERRORS,
+              bucket=None, pool=None, s3_client=None, keep_staged=False):
+    """
+    Loads a CSV or newline-delimited JSON file into `table` with one COPY and returns the load report.
+    `columns` lists the table columns in file order (all of them by default); `null_as` is the CSV
+    text that stands for NULL. JSON fields are matched to the columns by name.
+    """
+    return load(file_stage(path, file_format, header), table, columns, file_format, null_as, max_errors, bucket,
+                pool, s3_client, keep_staged)
+
+
+def load_rows(rows, table, columns, null_as=NULL_AS, max_errors=MAX_ERRORS, bucket=None, pool=None,
+              s3_client=None, keep_staged=False):
+    """
+    Loads rows into `table` with one COPY and returns the load report. `rows` yields tuples or lists
+    in `columns` order, dicts keyed by column, or dataframe chunks; they are read once, as they come.
+    """
+    return load(rows_stage(rows, columns, null_as), table, columns, "csv", null_as, max_errors, bucket, pool,
+                s3_client, keep_staged)
+
+
+def print_report(report):
+    icon = "✅" if report["status"] == "loaded" else "❌"
+    print(f"{icon} {report['rows_loaded']} of {report['rows']} rows loaded into '{report['table']}' from "
+          f"{report['files']} files on {report['slices']} slices in {report['elapsed_s']} s "
+          f"(staging {report['stage_s']} s, COPY {report['copy_s']} s)")
+    if report["error"]:
+        print(f"   {report['error']}")
+    for error in report["errors"]:
+        print(f"   {error['filename']} line {error['line_number']}, column {error['column']}: "
+              f"{error['reason']} ({error['code']}): {error['raw_line']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("table")
+    parser.add_argument("--columns", nargs="+")
+    parser.add_argument("--format", dest="file_format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--no-header", dest="header", action="store_false")
+    parser.add_argument("--null-as")
+    parser.add_argument("--max-errors", type=int, default=MAX_ERRORS)
+    parser.add_argument("--bucket", default=STAGING_BUCKET)
+    parser.add_argument("--keep-staged", action="store_true")
+    args = parser.parse_args()
+    pool = get_pool()
+    report = load_file(args.path, args.table, args.columns, args.file_format, args.header, args.null_as,
+                       args.max_errors, args.bucket, pool, keep_staged=args.keep_staged)
+    print_report(report)
+    print_stats(pool)
+    pool.close()
+    if report["status"] != "loaded":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
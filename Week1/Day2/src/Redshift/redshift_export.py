@@ -0,0 +1,237 @@
+"""
+Streams large query results out of Redshift without holding them in memory.
+
+QueryStream reads a query's rows through a server-side (named) cursor, fetch_size rows per round
+trip, and yields them a batch at a time, so only one batch is ever held by the client. export_query
+writes the batches straight to a CSV, NDJSON or Parquet file; export_table splits a table into ranges
+of an integer key and exports them side by side, one pooled connection and one part file each.
+
+    from redshift_export import QueryStream, export_query, export_table
+
+    for batch in QueryStream("SELECT * FROM employees WHERE department = %s;", ("IT",)):
+        print(len(batch))
+    export_query("SELECT * FROM employees;", "employees.ndjson", "ndjson")
+    export_table("employees", "employees_export", key="id", file_format="parquet", parts=8)
+
+Redshift materializes a cursor's result on the leader node before the first fetch, up to a size that
+depends on the node type; for exports beyond that, UNLOAD to S3 is the way. Parquet needs pyarrow.
+
+    python redshift_export.py employees employees.csv --key id --parts 8
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+
+from redshift_db import POOL_SIZE, get_pool, print_stats
+
+FETCH_SIZE = 10000  # Rows per round trip to the cluster, and per batch
+PARQUET_ROW_GROUP_ROWS = 100000  # Batches are gathered into row groups of about this many rows
+EXPORT_PARTS = POOL_SIZE  # Key ranges export_table splits a table into, each exported on its own connection
+FORMATS = {"csv": ".csv", "ndjson": ".ndjson", "parquet": ".parquet"}
+
+
+class QueryStream:
+    """
+    Iterates over a query's rows in batches (lists of tuples) of up to fetch_size rows. The column
+    names are in `columns` once the first batch is read, and `rows` counts the rows read so far.
+    """
+
+    def __init__(self, sql, params=None, fetch_size=FETCH_SIZE, pool=None):
+        self.sql = sql
+        self.params = params
+        self.fetch_size = fetch_size
+        self.pool = pool or get_pool()
+        self.columns = None
+        self.description = None
+        self.rows = 0
+
+    def __iter__(self):
+        # A named cursor lives in the transaction, on one pooled connection, until the last batch is read
+        with self.pool.transaction(name=f"stream_{uuid.uuid4().hex[:12]}") as cursor:
+            cursor.execute(self.sql, self.params)
+            while True:
+                batch = cursor.fetchmany(self.fetch_size)
+                if self.description is None:
+                    self.description = cursor.description
+                    self.columns = [column[0] for column in self.description]
+                if not batch:
+                    return
+                self.rows += len(batch)
+                yield batch
+
+
+def json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_csv(path, stream):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        batches = iter(stream)
+        first = next(batches, [])
+        writer.writerow(stream.columns)  # Written even without rows, to say what the columns are
+        writer.writerows(first)
+        for batch in batches:
+            writer.writerows(batch)
+
+
+def write_ndjson(path, stream):
+    encode = json.JSONEncoder(separators=(",", ":"), default=json_value).encode
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in stream:
+            columns = stream.columns
+            f.write("".join([encode(dict(zip(columns, row))) + "\n" for row in batch]))
+
+
+def import_pyarrow():
+    """Imports pyarrow for Parquet output, or returns None if it is missing."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def parquet_schema(pa, description):
+    """Arrow types for the cursor's columns, by PostgreSQL type OID; other types are written as strings."""
+    types = {16: pa.bool_(), 20: pa.int64(), 21: pa.int16(), 23: pa.int32(), 700: pa.float32(), 701: pa.float64(),
+             1082: pa.date32(), 1114: pa.timestamp("us"), 1184: pa.timestamp("us", tz="UTC")}
+    fields = []
+    for column in description:
+        if column.type_code == 1700:  # NUMERIC keeps its precision when the column declares one
+            kind = pa.decimal128(column.precision, column.scale) if column.precision else pa.float64()
+        else:
+            kind = types.get(column.type_code, pa.string())
+        fields.append((column.name, kind))
+    return pa.schema(fields)
+
+
+def arrow_array(pa, values, kind):
+    """An Arrow array of `kind`; values of other Python types (e.g. Decimal for float64) are converted first."""
+    try:
+        return pa.array(values, kind)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        convert = float if pa.types.is_floating(kind) else str
+        return pa.array([None if value is None else convert(value) for value in values], kind)
+
+
+def write_parquet(path, stream):
+    """Converts every batch to Arrow as it arrives, and writes one row group per PARQUET_ROW_GROUP_ROWS rows."""
+    pa = import_pyarrow()
+    if pa is None:
+        raise ValueError("Parquet output needs the pyarrow package (pip install pyarrow)")
+    writer = schema = None
+    pending = []  # Record batches of the next row group
+
+    def write_row_group():
+        writer.write_table(pa.Table.from_batches(pending, schema=schema), row_group_size=PARQUET_ROW_GROUP_ROWS * 2)
+        pending.clear()
+
+    try:
+        for batch in stream:
+            if writer is None:
+                schema = parquet_schema(pa, stream.description)
+                writer = pa.parquet.ParquetWriter(path, schema, compression="snappy")
+            arrays = [arrow_array(pa, values, kind) for values, kind in zip(zip(*batch), schema.types)]
+            pending.append(pa.record_batch(arrays, schema=schema))
+            if sum(len(record_batch) for record_batch in pending) >= PARQUET_ROW_GROUP_ROWS:
+                write_row_group()
+        if writer is None:
+            schema = parquet_schema(pa, stream.description or [])
+            writer = pa.parquet.ParquetWriter(path, schema, compression="snappy")
+        if pending:
+            write_row_group()
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {"csv": write_csv, "ndjson": write_ndjson, "parquet": write_parquet}
+
+
+def export_query(sql, path, file_format="csv", params=None, fetch_size=FETCH_SIZE, pool=None):
+    """Writes a query's rows to a CSV, NDJSON or Parquet file, a batch at a time; returns a summary."""
+    if file_format not in WRITERS:
+        raise ValueError(f"Unsupported format '{file_format}'; use one of {', '.join(WRITERS)}")
+    started = time.perf_counter()
+    stream = QueryStream(sql, params, fetch_size, pool)
+    WRITERS[file_format](path, stream)
+    elapsed = time.perf_counter() - started
+    return {"files": [path], "rows": stream.rows, "bytes": os.path.getsize(path), "elapsed_s": round(elapsed, 3),
+            "rows_per_second": round(stream.rows / elapsed) if elapsed > 0 else 0}
+
+
+def key_ranges(pool, table, key, parts, where=None):
+    """Splits the values of an integer key into up to `parts` half-open ranges [first, last) of equal width."""
+    condition = f" WHERE {where}" if where else ""
+    low, high = pool.query(f"SELECT MIN({key}), MAX({key}) FROM {table}{condition};")[0]
+    if low is None:
+        return []
+    width = max(1, math.ceil((high - low + 1) / parts))
+    return [(start, min(start + width, high + 1)) for start in range(low, high + 1, width)]
+
+
+def export_table(table, output, key=None, file_format="csv", parts=EXPORT_PARTS, columns=None, where=None,
+                 fetch_size=FETCH_SIZE, pool=None):
+    """
+    Exports a table, or the rows matching `where`, to `output`. With an integer `key` and more than one
+    part, the key's range is split into `parts` ranges exported at the same time, each to a part
+    file in the directory `output`; the pool needs a connection per part.
+    """
+    pool = pool or get_pool()
+    select = f"SELECT {', '.join(columns) if columns else '*'} FROM {table}"
+    if key is None or parts == 1:
+        return export_query(f"{select}{f' WHERE {where}' if where else ''};", output, file_format,
+                            fetch_size=fetch_size, pool=pool)
+    started = time.perf_counter()
+    ranges = key_ranges(pool, table, key, parts, where)
+    os.makedirs(output, exist_ok=True)
+    paths = [os.path.join(output, f"part-{part:05d}{FORMATS[file_format]}") for part in range(len(ranges))]
+    condition = f" AND ({where})" if where else ""
+
+    def export(path, key_range):
+        return export_query(f"{select} WHERE {key} >= %s AND {key} < %s{condition};", path, file_format,
+                            key_range, fetch_size, pool)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(ranges), pool.max_size))) as executor:
+        summaries = list(executor.map(export, paths, ranges))
+    elapsed = time.perf_counter() - started
+    rows = sum(summary["rows"] for summary in summaries)
+    return {"files": paths, "rows": rows, "bytes": sum(summary["bytes"] for summary in summaries),
+            "elapsed_s": round(elapsed, 3), "rows_per_second": round(rows / elapsed) if elapsed > 0 else 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("table")
+    parser.add_argument("output")
+    parser.add_argument("--format", dest="file_format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--key", help="Integer column to split the export on")
+    parser.add_argument("--parts", type=int, default=EXPORT_PARTS)
+    parser.add_argument("--columns", nargs="+")
+    parser.add_argument("--where", help="SQL condition the exported rows match")
+    parser.add_argument("--fetch-size", type=int, default=FETCH_SIZE)
+    args = parser.parse_args()
+    pool = get_pool()
+    summary = export_table(args.table, args.output, args.key, args.file_format, args.parts, args.columns, args.where,
+                           args.fetch_size, pool)
+    print(f"✅ {summary['rows']} rows exported to {len(summary['files'])} file(s), "
+          f"{summary['bytes'] / 1024 ** 2:.1f} MB in {summary['elapsed_s']} s ({summary['rows_per_second']} rows/s)")
+    print_stats(pool)
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
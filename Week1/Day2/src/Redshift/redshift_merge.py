@@ -0,0 +1,162 @@
+"""
+Incremental refreshes of a Redshift table: new and changed rows are merged in by primary key, instead
+of dropping the table and loading everything again.
+
+The rows are staged in S3 and copied into a temporary staging table (see redshift_copy.py), then merged
+into the target in the same transaction, with set-based statements only:
+
+1. with delete_missing, target rows whose key is not staged are deleted (the staged rows are then a
+   full snapshot of the source)
+2. staged rows identical to their target row are dropped from the staging table, so unchanged rows
+   are not rewritten
+3. target rows with a staged key are deleted, and every staged row is inserted
+
+Readers see the table as it was until the transaction commits, then as it is after; it is never
+missing or empty, and only the changed rows are rewritten.
+
+    from redshift_merge import upsert_file, upsert_rows
+
+    report = upsert_file("employees_changes.csv", "employees", ["id"])
+    report = upsert_rows([(2, "Bob Smith", "Finance", 82000.00)], "employees", ["id"],
+                         ["id", "name", "department", "salary"])
+
+    python redshift_merge.py employees_changes.csv employees --key id --null-as " - "
+"""
+import argparse
+import sys
+import time
+
+import redshift_copy
+from redshift_db import get_pool, print_stats
+
+
+def key_match(left, right, key_columns):
+    return " AND ".join(f"{left}.{column} = {right}.{column}" for column in key_columns)
+
+
+def table_columns(cursor, table):
+    """Columns of a table, in order."""
+    schema, _, name = table.rpartition(".")
+    cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name = %s "
+                   "AND table_schema = COALESCE(NULLIF(%s, ''), current_schema()) ORDER BY ordinal_position;",
+                   (name, schema))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def merge_staged(cursor, table, staging_table, key_columns, columns, delete_missing):
+    """Merges the staging table into `table` by key; returns the rows deleted, unchanged, updated and inserted."""
+    counts = {"deleted": 0, "unchanged": 0}
+    cursor.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM {staging_table} GROUP BY {', '.join(key_columns)} "
+                   f"HAVING COUNT(*) > 1) AS duplicates;")
+    duplicates = cursor.fetchone()[0]
+    if duplicates:
+        raise ValueError(f"{duplicates} keys of ({', '.join(key_columns)}) are staged more than once")
+    if delete_missing:
+        cursor.execute(f"DELETE FROM {table} WHERE NOT EXISTS (SELECT 1 FROM {staging_table} AS s "
+                       f"WHERE {key_match('s', table, key_columns)});")
+        counts["deleted"] = cursor.rowcount
+    values = [column for column in columns if column not in key_columns]
+    same = " AND ".join([key_match("t", staging_table, key_columns)] + [
+        f"(t.{column} = {staging_table}.{column} OR (t.{column} IS NULL AND {staging_table}.{column} IS NULL))"
+        for column in values])
+    cursor.execute(f"DELETE FROM {staging_table} USING {table} AS t WHERE {same};")
+    counts["unchanged"] = cursor.rowcount
+    cursor.execute(f"DELETE FROM {table} USING {staging_table} AS s WHERE {key_match('s', table, key_columns)};")
+    counts["updated"] = cursor.rowcount
+    column_list = ", ".join(columns)
+    cursor.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging_table};")
+    counts["inserted"] = cursor.rowcount - counts["updated"]
+    return counts
+
+
+def upsert(stage, table, key_columns, columns, file_format, null_as, max_errors, delete_missing, bucket, pool,
+           s3_client, keep_staged):
+    pool = pool or get_pool()
+    staging_table = f"stage_{table.rpartition('.')[2]}"
+    started = time.perf_counter()
+    stager, slices, rows, size = redshift_copy.stage_data(stage, staging_table, bucket, pool, s3_client)
+    staged = time.perf_counter()
+    report = {"status": "merged", "table": table, "rows": rows, "rows_loaded": 0, "deleted": 0, "unchanged": 0,
+              "updated": 0, "inserted": 0, "errors": [], "error": None, "files": len(stager.entries), "bytes": size,
+              "staged_bytes": stager.staged_bytes, "slices": slices}
+    copied = staged
+    with pool.transaction() as cursor:
+        try:
+            # LIKE gives the staging table the target's distribution and sort keys, so the joins stay on each slice
+            cursor.execute(f"CREATE TEMP TABLE {staging_table} (LIKE {table});")
+            columns = columns or table_columns(cursor, table)
+            report["rows_loaded"], report["errors"] = redshift_copy.copy_staged(
+                cursor, stager, staging_table, columns, file_format, null_as, max_errors)
+            copied = time.perf_counter()
+            report.update(merge_staged(cursor, table, staging_table, key_columns, columns, delete_missing))
+            cursor.execute(f"DROP TABLE {staging_table};")
+        except Exception as e:
+            cursor.connection.rollback()
+            report.update(status="failed", rows_loaded=0, deleted=0, unchanged=0, updated=0, inserted=0,
+                          errors=redshift_copy.load_errors(cursor), error=str(e).strip())
+    finished = time.perf_counter()
+    if report["status"] == "merged" and not keep_staged:
+        stager.delete()
+    report.update(stage_s=round(staged - started, 3), copy_s=round(copied - staged, 3),
+                  merge_s=round(finished - copied, 3), elapsed_s=round(finished - started, 3),
+                  manifest=f"s3://{stager.bucket}/{stager.prefix}manifest.json")
+    return report
+
+
+def upsert_file(path, table, key_columns, columns=None, file_format="csv", header=True, null_as=None,
+                max_errors=redshift_copy.MAX_ERRORS, delete_missing=False, bucket=None, pool=None, s3_client=None,
+                keep_staged=False):
+    """
+    Merges the rows of a CSV or newline-delimited JSON file into `table` by `key_columns` and returns
+    the report. With delete_missing the file is the whole table, and rows not in it are deleted.
+    """
+    return upsert(redshift_copy.file_stage(path, file_format, header), table, key_columns, columns, file_format,
+                  null_as, max_errors, delete_missing, bucket, pool, s3_client, keep_staged)
+
+
+def upsert_rows(rows, table, key_columns, columns, null_as=redshift_copy.NULL_AS, max_errors=redshift_copy.MAX_ERRORS,
+                delete_missing=False, bucket=None, pool=None, s3_client=None, keep_staged=False):
+    """Merges rows, as load_rows takes them, into `table` by `key_columns` and returns the report."""
+    return upsert(redshift_copy.rows_stage(rows, columns, null_as), table, key_columns, columns, "csv", null_as,
+                  max_errors, delete_missing, bucket, pool, s3_client, keep_staged)
+
+
+def print_report(report):
+    icon = "✅" if report["status"] == "merged" else "❌"
+    print(f"{icon} {report['rows_loaded']} of {report['rows']} rows staged for '{report['table']}': "
+          f"{report['inserted']} inserted, {report['updated']} updated, {report['unchanged']} unchanged, "
+          f"{report['deleted']} deleted in {report['elapsed_s']} s "
+          f"(staging {report['stage_s']} s, COPY {report['copy_s']} s, merge {report['merge_s']} s)")
+    if report["error"]:
+        print(f"   {report['error']}")
+    for error in report["errors"]:
+        print(f"   {error['filename']} line {error['line_number']}, column {error['column']}: "
+              f"{error['reason']} ({error['code']}): {error['raw_line']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("table")
+    parser.add_argument("--key", nargs="+", required=True, help="Primary key columns")
+    parser.add_argument("--columns", nargs="+")
+    parser.add_argument("--format", dest="file_format", choices=list(redshift_copy.FORMATS), default="csv")
+    parser.add_argument("--no-header", dest="header", action="store_false")
+    parser.add_argument("--null-as")
+    parser.add_argument("--max-errors", type=int, default=redshift_copy.MAX_ERRORS)
+    parser.add_argument("--delete-missing", action="store_true", help="The file holds every row of the table")
+    parser.add_argument("--bucket", default=redshift_copy.STAGING_BUCKET)
+    parser.add_argument("--keep-staged", action="store_true")
+    args = parser.parse_args()
+    pool = get_pool()
+    report = upsert_file(args.path, args.table, args.key, args.columns, args.file_format, args.header, args.null_as,
+                         args.max_errors, args.delete_missing, args.bucket, pool, keep_staged=args.keep_staged)
+    print_report(report)
+    print_stats(pool)
+    pool.close()
+    if report["status"] != "merged":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
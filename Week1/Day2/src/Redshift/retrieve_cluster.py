@@ -1,18 +1,20 @@
-import boto3
-import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+from waiters import REDSHIFT_CLUSTER_AVAILABLE, wait  # noqa: E402
 
 AWS_REGION = "us-east-1"
 CLUSTER_ID = "my-redshift-cluster"
 
-redshift = boto3.client("redshift", region_name=AWS_REGION)
-
-while True:
-    cluster_info = redshift.describe_clusters(ClusterIdentifier=CLUSTER_ID)["Clusters"][0]
-    cluster_status = cluster_info["ClusterStatus"]
-    print(f"Cluster Status: {cluster_status}")
+redshift = get_client("redshift", AWS_REGION)
 
-    if cluster_status == "available":
-        endpoint = cluster_info["Endpoint"]["Address"]
-        print(f"✅ Redshift Cluster Endpoint: {endpoint}")
-        break
-    time.sleep(30)  # Check status every 30 seconds
+# Checks often while the cluster is new, then less often, up to every 30 seconds
+result = wait(REDSHIFT_CLUSTER_AVAILABLE, redshift, CLUSTER_ID,
+              on_state=lambda cluster_id, status: print(f"Cluster Status: {status}"))
+if result["outcome"] == "success":
+    endpoint = result["response"]["Endpoint"]["Address"]
+    print(f"✅ Redshift Cluster Endpoint: {endpoint}")
+else:
+    print(f"❌ Cluster not available after {result['elapsed_s']:.0f} s: {result['state']}")
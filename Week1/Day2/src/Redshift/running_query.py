@@ -1,29 +1,14 @@
-import psycopg2
-
-# Replace with your Redshift cluster details
-host = "my-redshift-cluster.csgshqmtgnij.us-east-1.redshift.amazonaws.com"
-port = "5439"
-dbname = "dev"
-user = "admin"
-password = "YourSecurePassword123"
+from redshift_db import get_pool, print_stats
 
 try:
     print("🚀 Trying to connect to AWS Redshift...")
-    conn = psycopg2.connect(
-        dbname=dbname,
-        user=user,
-        password=password,
-        host=host,
-        port=port
-    )
+    pool = get_pool()
+    result = pool.query("SELECT current_user, current_database();")
     print("✅ Connected to AWS Redshift successfully!")
+    print("Query Result:", result)
 
-    cursor = conn.cursor()
-    cursor.execute("SELECT current_user, current_database();")
-    print("Query Result:", cursor.fetchall())
-
-    cursor.close()
-    conn.close()
+    print_stats(pool)
+    pool.close()
 
 except Exception as e:
     print("❌ Connection Error:", e)
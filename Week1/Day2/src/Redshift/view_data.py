@@ -1,58 +1,47 @@
-import psycopg2
-
-# Replace with your Redshift cluster details
-host = "my-redshift-cluster.csgshqmtgnij.us-east-1.redshift.amazonaws.com"
-port = "5439"
-dbname = "dev"
-user = "admin"
-password = "YourSecurePassword123"
+from redshift_db import get_pool, print_stats
+from redshift_export import QueryStream
 
 try:
     print("🚀 Trying to connect to AWS Redshift...")
-    conn = psycopg2.connect(
-        dbname=dbname,
-        user=user,
-        password=password,
-        host=host,
-        port=port
-    )
-    print("✅ Connected to AWS Redshift successfully!")
+    pool = get_pool()
 
-    cursor = conn.cursor()
+    # The catalog queries share one pooled connection and one transaction
+    with pool.transaction() as cursor:
+        print("✅ Connected to AWS Redshift successfully!")
 
-    # List all tables in the public schema
-    list_tables_query = """
-    SELECT tablename
-    FROM pg_catalog.pg_tables
-    WHERE schemaname = 'public';
-    """
-    cursor.execute(list_tables_query)
-    tables = cursor.fetchall()
-    print("\nTables in 'public' schema:")
-    for table in tables:
-        print(table)
+        # List all tables in the public schema
+        list_tables_query = """
+        SELECT tablename
+        FROM pg_catalog.pg_tables
+        WHERE schemaname = 'public';
+        """
+        cursor.execute(list_tables_query)
+        tables = cursor.fetchall()
+        print("\nTables in 'public' schema:")
+        for table in tables:
+            print(table)
 
-    # View the structure of the employees table
-    describe_table_query = """
-    SELECT column_name, data_type
-    FROM information_schema.columns
-    WHERE table_name = 'employees';
-    """
-    cursor.execute(describe_table_query)
-    columns = cursor.fetchall()
-    print("\nStructure of 'employees' table:")
-    for column in columns:
-        print(column)
+        # View the structure of the employees table
+        describe_table_query = """
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_name = 'employees';
+        """
+        cursor.execute(describe_table_query)
+        columns = cursor.fetchall()
+        print("\nStructure of 'employees' table:")
+        for column in columns:
+            print(column)
 
-    # View the data in the employees table
+    # View the data in the employees table, streamed a batch at a time through a server-side cursor,
+    # so rows print as they arrive and a table of any size fits in memory
     select_query = "SELECT * FROM employees;"
-    cursor.execute(select_query)
-    rows = cursor.fetchall()
     print("\nData in 'employees' table:")
-    for row in rows:
-        print(row)
+    for batch in QueryStream(select_query, pool=pool):
+        for row in batch:
+            print(row)
 
-    cursor.close()
-    conn.close()
+    print_stats(pool)
+    pool.close()
 except Exception as e:
     print(f"❌ Connection Error: {e}")
\ No newline at end of file
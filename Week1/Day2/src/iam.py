@@ -1,6 +1,10 @@
-import boto3
+import os
+import sys
 import json
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+
 # AWS Configuration
 AWS_REGION = "us-east-1"
 USER_NAME = "data_admin_boto3"
@@ -8,7 +12,7 @@ INLINE_POLICY_NAME = "S3WriteOnlyPolicy"
 MANAGED_POLICY_ARN = "arn:aws:iam::aws:policy/AmazonS3ReadOnlyAccess"
 
 # Initialize AWS clients
-iam_client = boto3.client("iam", region_name=AWS_REGION)
+iam_client = get_client("iam", AWS_REGION)
 
 # Inline policy document
 inline_policy_document = {
@@ -1,4 +1,8 @@
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
 
 # AWS Configuration
 region = "us-east-1" 
@@ -8,7 +12,7 @@ s3_path = "s3://my-employees/employees.csv"
 iam_role_arn = "arn:aws:iam::970547378939:role/gluerole"  
 
 # Initialize boto3 clients
-glue_client = boto3.client("glue", region_name=region)
+glue_client = get_client("glue", region)
 
 # ✅ Step 1: Create Glue Database
 def create_database():
@@ -1,5 +1,9 @@
-import boto3
-import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+from athena_executor import print_results, run_queries  # noqa: E402
 
 # AWS Configuration
 AWS_REGION = "us-east-1"  # Change to your AWS region
@@ -7,30 +11,7 @@ S3_OUTPUT = "s3://glue-bucket-products/query-results/"  # Change to your S3 buck
 S3_CSV_PATH = "s3://my-employees/employee/"  # Path to your CSV file in S3 (directory)
 
 # Initialize Athena Client
-athena_client = boto3.client("athena", region_name=AWS_REGION)
-
-def run_athena_query(query, database="default"):
-    """Execute an Athena query and return the execution ID."""
-    response = athena_client.start_query_execution(
-        QueryString=query,
-        QueryExecutionContext={"Database": database},
-        ResultConfiguration={"OutputLocation": S3_OUTPUT},
-    )
-    return response["QueryExecutionId"]
-
-def wait_for_query(query_execution_id):
-    """Wait until the query execution completes."""
-    while True:
-        response = athena_client.get_query_execution(QueryExecutionId=query_execution_id)
-        status = response["QueryExecution"]["Status"]["State"]
-        print(f"Query status: {status}")  # Debug print
-
-        if status in ["SUCCEEDED", "FAILED", "CANCELLED"]:
-            if status != "SUCCEEDED":
-                print(f"Query failed with status: {status}")
-                print("Error message:", response["QueryExecution"]["Status"]["StateChangeReason"])
-            return status
-        time.sleep(2)
+athena_client = get_client("athena", AWS_REGION)
 
 def get_query_results(query_execution_id):
     """Fetch and display the results of the query."""
@@ -41,9 +22,6 @@ def get_query_results(query_execution_id):
 
 # 1️⃣ **Create Database**
 create_db_query = "CREATE DATABASE IF NOT EXISTS employeee;"
-query_id = run_athena_query(create_db_query)
-if wait_for_query(query_id) == "SUCCEEDED":
-    print("✅ Database 'employeee' created successfully!")
 
 # 2️⃣ **Create Table**
 create_table_query = f"""
@@ -69,17 +47,25 @@ LOCATION '{S3_CSV_PATH}'
 TBLPROPERTIES ('has_encrypted_data'='false');
 """
 
-query_id = run_athena_query(create_table_query, database="employeee")
-if wait_for_query(query_id) == "SUCCEEDED":
-    print("✅ Table 'Employees' created successfully!")
-
 # 3️⃣ **Query Data**
 query_data_sql = "SELECT * FROM employeee.Employees LIMIT 10;"
-query_id = run_athena_query(query_data_sql, database="employeee")
 
-query_status = wait_for_query(query_id)
+# Each step starts once the one it depends on has succeeded; queries without a dependency between
+# them (e.g. several SELECTs on the table) run side by side, and their statuses are polled together
+results = run_queries([
+    {"name": "database", "sql": create_db_query},
+    {"name": "table", "sql": create_table_query, "database": "employeee", "depends_on": ["database"]},
+    {"name": "select", "sql": query_data_sql, "database": "employeee", "depends_on": ["table"]},
+], client=athena_client, output_location=S3_OUTPUT)
+print_results(results)
+
+if results["database"]["state"] == "SUCCEEDED":
+    print("✅ Database 'employeee' created successfully!")
+if results["table"]["state"] == "SUCCEEDED":
+    print("✅ Table 'Employees' created successfully!")
+query_status = results["select"]["state"]
 if query_status == "SUCCEEDED":
     print("✅ Data queried successfully! Check results in:", S3_OUTPUT)
-    get_query_results(query_id)
+    get_query_results(results["select"]["query_id"])
 else:
     print(f"❌ Query failed with status: {query_status}")
\ No newline at end of file
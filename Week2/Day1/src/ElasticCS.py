@@ -1,4 +1,8 @@
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
 
 # AWS Configuration
 AWS_REGION = "us-east-1"  # Change as needed
@@ -11,7 +15,7 @@ CONTAINER_NAME = "my-app-1"
 ECR_PUBLIC_IMAGE_URI = "public.ecr.aws/nginx/nginx:latest"
 
 # Initialize AWS Clients
-ecs_client = boto3.client("ecs", region_name=AWS_REGION)
+ecs_client = get_client("ecs", AWS_REGION)
 
 # Step 1: Create ECS Cluster
 def create_ecs_cluster():
@@ -0,0 +1,194 @@
+"""
+Runs many Athena queries at once, instead of one after another.
+
+AthenaExecutor starts queries as soon as the queries they depend on have succeeded, up to
+`concurrency` at a time, and waits for all the running ones together on one event loop: their
+status polls are merged into batch_get_query_execution calls of up to 50 ids (see waiters.py). A
+batch of independent queries takes about as long as its slowest query, not the sum of all of them.
+A query whose dependency failed is not started, and is reported SKIPPED.
+
+    from athena_executor import AthenaExecutor, run_queries
+
+    results = run_queries([
+        {"name": "database", "sql": "CREATE DATABASE IF NOT EXISTS reports;"},
+        {"name": "table", "sql": CREATE_TABLE, "database": "reports", "depends_on": ["database"]},
+        {"name": "by_department", "sql": BY_DEPARTMENT, "database": "reports", "depends_on": ["table"]},
+        {"name": "by_job", "sql": BY_JOB, "database": "reports", "depends_on": ["table"]},
+    ], output_location="s3://my-athena-results/")
+
+    async def report():  # Or, inside an event loop, one future per query
+        executor = AthenaExecutor(output_location="s3://my-athena-results/")
+        table = executor.submit(CREATE_TABLE, "reports", name="table")
+        queries = [executor.submit(sql, "reports", depends_on=[table]) for sql in REPORT_QUERIES]
+        return await asyncio.gather(*queries)
+
+A result is a dict: name, query id, state (SUCCEEDED, FAILED, CANCELLED, TIMEOUT or SKIPPED), error,
+seconds queued behind the concurrency limit, seconds running, bytes scanned and the output location.
+
+    python athena_executor.py by_department.sql by_job.sql --database reports --output s3://my-athena-results/
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+from waiters import ATHENA_QUERY, Backoff, WaiterEngine  # noqa: E402
+
+AWS_REGION = "us-east-1"
+# Queries running at once; Athena's default quota of active DML queries is 20 to 25, by region
+ATHENA_CONCURRENCY = 20
+# Status polls due within this many seconds of each other share one batch_get_query_execution call;
+# wider than the waiters.py default, since a batch of queries in flight is the common case
+POLL_COALESCE_SECONDS = 0.5
+QUERY_TIMEOUT = 1800  # Seconds before a running query is stopped and reported TIMEOUT
+START_BACKOFF = Backoff(0.5, 2.0, 8.0)  # StartQueryExecution retries when Athena throttles it
+START_ATTEMPTS = 6
+
+
+class AthenaExecutor:
+    """
+    Submits queries from inside an event loop; submit() returns an asyncio Task per query that
+    resolves to its result. `results` maps each query's name to its result once it is known.
+    """
+
+    def __init__(self, client=None, output_location=None, concurrency=ATHENA_CONCURRENCY, workgroup=None,
+                 timeout=QUERY_TIMEOUT, engine=None, waiter=ATHENA_QUERY):
+        self.client = client or get_client("athena", AWS_REGION)
+        self.output_location = output_location
+        self.workgroup = workgroup
+        self.timeout = timeout
+        self.engine = engine or WaiterEngine(coalesce=POLL_COALESCE_SECONDS)
+        self.waiter = waiter  # How often statuses are polled
+        self.slots = asyncio.Semaphore(concurrency)
+        self.tasks = {}
+        self.results = {}
+
+    def submit(self, sql, database="default", name=None, depends_on=()):
+        """
+        Schedules a query to start once every query in depends_on (names or tasks returned by submit)
+        has succeeded; returns its task.
+        """
+        name = name or f"query-{len(self.tasks) + 1}"
+        if name in self.tasks:
+            raise ValueError(f"A query named '{name}' was already submitted")
+        unknown = [dependency for dependency in depends_on
+                   if isinstance(dependency, str) and dependency not in self.tasks]
+        if unknown:
+            raise ValueError(f"'{name}' depends on queries not submitted yet: {', '.join(unknown)}")
+        dependencies = [self.tasks[dependency] if isinstance(dependency, str) else dependency
+                        for dependency in depends_on]
+        task = asyncio.create_task(self.execute(name, sql, database, dependencies), name=name)
+        self.tasks[name] = task
+        return task
+
+    async def execute(self, name, sql, database, dependencies):
+        submitted = time.monotonic()
+        result = {"name": name, "query_id": None, "state": None, "error": None, "queued_s": 0.0, "running_s": 0.0,
+                  "data_scanned_bytes": None, "output_location": None}
+        failed = [dependency["name"] for dependency in await asyncio.gather(*dependencies)
+                  if dependency["state"] != "SUCCEEDED"]
+        if failed:
+            result.update(state="SKIPPED", error=f"Not started: {', '.join(failed)} did not succeed")
+        else:
+            async with self.slots:
+                started = time.monotonic()
+                result["queued_s"] = round(started - submitted, 3)
+                try:
+                    await self.run(result, sql, database)
+                except Exception as e:
+                    result.update(state="FAILED", error=str(e))
+                result["running_s"] = round(time.monotonic() - started, 3)
+        self.results[name] = result
+        return result
+
+    async def run(self, result, sql, database):
+        request = {"QueryString": sql, "QueryExecutionContext": {"Database": database}}
+        if self.output_location:
+            request["ResultConfiguration"] = {"OutputLocation": self.output_location}
+        if self.workgroup:
+            request["WorkGroup"] = self.workgroup
+        response = await self.engine.retry(lambda: self.client.start_query_execution(**request),
+                                           self.client.exceptions.TooManyRequestsException, START_BACKOFF,
+                                           START_ATTEMPTS)
+        result["query_id"] = response["QueryExecutionId"]
+        try:
+            waited = await self.engine.wait(self.waiter, self.client, result["query_id"], self.timeout)
+        except BaseException:  # Cancelled, or the wait failed: the query must not keep running unwatched
+            await asyncio.shield(asyncio.to_thread(self.client.stop_query_execution,
+                                                   QueryExecutionId=result["query_id"]))
+            raise
+        if waited["outcome"] == "timeout":
+            await asyncio.to_thread(self.client.stop_query_execution, QueryExecutionId=result["query_id"])
+            result.update(state="TIMEOUT", error=f"Stopped after {self.timeout} s")
+            return
+        execution = waited["response"]
+        result.update(state=waited["state"], error=execution["Status"].get("StateChangeReason"),
+                      data_scanned_bytes=execution.get("Statistics", {}).get("DataScannedInBytes"),
+                      output_location=execution.get("ResultConfiguration", {}).get("OutputLocation"))
+
+    def stats(self):
+        """Queries per state and the batch_get_query_execution calls made."""
+        states = {}
+        for result in self.results.values():
+            states[result["state"]] = states.get(result["state"], 0) + 1
+        return {"queries": len(self.results), "states": states,
+                "status_calls": self.engine.stats().get(self.waiter.name, 0)}
+
+
+async def run_queries_async(queries, client=None, output_location=None, concurrency=ATHENA_CONCURRENCY,
+                            workgroup=None, timeout=QUERY_TIMEOUT):
+    """run_queries from inside an event loop."""
+    executor = AthenaExecutor(client, output_location, concurrency, workgroup, timeout)
+    for query in queries:
+        executor.submit(query["sql"], query.get("database", "default"), query.get("name"),
+                        query.get("depends_on", ()))
+    await asyncio.gather(*executor.tasks.values())
+    return {name: executor.results[name] for name in executor.tasks}
+
+
+def run_queries(queries, client=None, output_location=None, concurrency=ATHENA_CONCURRENCY, workgroup=None,
+                timeout=QUERY_TIMEOUT):
+    """
+    Runs queries given as dicts of sql and optionally name, database and depends_on (names of
+    queries listed earlier); returns {name: result}, in the order given.
+    """
+    return asyncio.run(run_queries_async(queries, client, output_location, concurrency, workgroup, timeout))
+
+
+def print_results(results):
+    for result in results.values():
+        icon = "✅" if result["state"] == "SUCCEEDED" else "❌"
+        scanned = "" if result["data_scanned_bytes"] is None else f", {result['data_scanned_bytes']} bytes scanned"
+        print(f"{icon} {result['name']}: {result['state']} in {result['running_s']} s "
+              f"(queued {result['queued_s']} s{scanned})")
+        if result["error"] and result["state"] != "SUCCEEDED":
+            print(f"   {result['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sql_files", nargs="+", help="Files of one query each, run side by side")
+    parser.add_argument("--database", default="default")
+    parser.add_argument("--output", help="S3 location for the query results")
+    parser.add_argument("--workgroup")
+    parser.add_argument("--concurrency", type=int, default=ATHENA_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=QUERY_TIMEOUT)
+    args = parser.parse_args()
+    queries = []
+    for path in args.sql_files:
+        with open(path, encoding="utf-8") as f:
+            queries.append({"name": os.path.basename(path), "sql": f.read(), "database": args.database})
+    started = time.perf_counter()
+    results = run_queries(queries, output_location=args.output, concurrency=args.concurrency,
+                          workgroup=args.workgroup, timeout=args.timeout)
+    print_results(results)
+    print(f"{len(results)} queries in {time.perf_counter() - started:.1f} s")
+    if any(result["state"] != "SUCCEEDED" for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
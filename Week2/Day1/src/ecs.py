@@ -1,8 +1,12 @@
-import boto3
+import os
+import sys
 import docker
 import time
 import subprocess
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+
 # AWS Configuration
 AWS_REGION = "us-east-1"  # Change as needed
 ECR_REPO_NAME = "my-app-repo"
@@ -13,9 +17,9 @@ CONTAINER_NAME = "my-app"
 IMAGE_TAG = "latest"
 
 # Initialize AWS Clients
-ecr_client = boto3.client("ecr", region_name=AWS_REGION)
-ecs_client = boto3.client("ecs", region_name=AWS_REGION)
-iam_client = boto3.client("iam")
+ecr_client = get_client("ecr", AWS_REGION)
+ecs_client = get_client("ecs", AWS_REGION)
+iam_client = get_client("iam")
 docker_client = docker.from_env()
 
 # Define the AWS region and ECR URI
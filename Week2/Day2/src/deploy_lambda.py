@@ -1,13 +1,19 @@
-import boto3
 import zipfile
 import os
+import py_compile
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
 
 # AWS clients
-lambda_client = boto3.client('lambda', region_name="us-east-1")
+lambda_client = get_client('lambda', "us-east-1")
 
 # Lambda function details
 LAMBDA_FUNCTION_NAME = "S3ToDynamoDBLambda"
 LAMBDA_ROLE_ARN = "arn:aws:iam::970547378939:role/service-role/HelloWorldPythonLambda-role-e61pistk"
+LAMBDA_RUNTIME = "python3.9"
 
 # Path to the Lambda function file
 lambda_function_file = "Week2/Day2/src/lambda_function.py"  # Update this path if the file is located elsewhere
@@ -20,6 +26,16 @@ if not os.path.isfile(lambda_function_file):
 lambda_zip = "function.zip"
 with zipfile.ZipFile(lambda_zip, "w") as zf:
     zf.write(lambda_function_file, arcname="lambda_function.py")
+    # /var/task is read-only, so without bytecode in the package every cold start compiles the source again.
+    # Bytecode only loads on the same Python version, so it is added when this interpreter matches the runtime.
+    if f"python{sys.version_info.major}.{sys.version_info.minor}" == LAMBDA_RUNTIME:
+        with tempfile.TemporaryDirectory() as build_dir:
+            pyc_file = py_compile.compile(lambda_function_file, cfile=os.path.join(build_dir, "lambda_function.pyc"),
+                                          invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH)
+            zf.write(pyc_file, arcname=f"__pycache__/lambda_function.{sys.implementation.cache_tag}.pyc")
+    else:
+        print(f"⚠️ Packaging without bytecode: this is Python {sys.version_info.major}.{sys.version_info.minor}, "
+              f"the function runs {LAMBDA_RUNTIME}.")
 
 # Check if the Lambda function exists
 try:
@@ -42,11 +58,12 @@ else:
     with open(lambda_zip, "rb") as f:
         lambda_client.create_function(
             FunctionName=LAMBDA_FUNCTION_NAME,
-            Runtime="python3.9",
+            Runtime=LAMBDA_RUNTIME,
             Role=LAMBDA_ROLE_ARN,
             Handler="lambda_function.lambda_handler",
             Code={"ZipFile": f.read()},
-            Timeout=30,
-            MemorySize=128
+            Timeout=30,  # Longer files are checkpointed and continued by a self re-invocation (needs lambda:InvokeFunction)
+            MemorySize=128,
+            Environment={"Variables": {"LOG_LEVEL": "WARNING"}}  # Hides per-file progress; metrics are always logged
         )
     print(f"✅ Lambda Function {LAMBDA_FUNCTION_NAME} created successfully.")
\ No newline at end of file
@@ -1,11 +1,16 @@
-import boto3
+import os
+import sys
 import botocore
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_resource  # noqa: E402
+
 # Initialize DynamoDB resource
-dynamodb = boto3.resource('dynamodb', region_name="us-east-1")
+dynamodb = get_resource('dynamodb', "us-east-1")
 
-# Table name
+# Table names
 TABLE_NAME = "Employees"
+CHECKPOINT_TABLE_NAME = "EmployeesIngestCheckpoints"  # Progress of large files loaded by the Lambda
 
 # Function to check if table exists
 def table_exists(table_name):
@@ -40,3 +45,21 @@ if not table_exists(TABLE_NAME):
     print(f"✅ Table '{TABLE_NAME}' created successfully. Check AWS Console → DynamoDB.")
 else:
     print(f"⚠️ Table '{TABLE_NAME}' already exists. No need to create it.")
+
+# Checkpoint table used by the Lambda to resume files that do not fit in one invocation
+if not table_exists(CHECKPOINT_TABLE_NAME):
+    response = dynamodb.create_table(
+        TableName=CHECKPOINT_TABLE_NAME,
+        KeySchema=[
+            {"AttributeName": "OBJECT_ID", "KeyType": "HASH"}  # "bucket/key" of the S3 object
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "OBJECT_ID", "AttributeType": "S"}
+        ],
+        BillingMode="PAY_PER_REQUEST"  # A few small writes per file, not worth provisioning
+    )
+
+    response.meta.client.get_waiter('table_exists').wait(TableName=CHECKPOINT_TABLE_NAME)
+    print(f"✅ Table '{CHECKPOINT_TABLE_NAME}' created successfully.")
+else:
+    print(f"⚠️ Table '{CHECKPOINT_TABLE_NAME}' already exists. No need to create it.")
@@ -1,9 +1,13 @@
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
 
 # Initialize AWS clients
-sns_client = boto3.client("sns")
-sqs_client = boto3.client("sqs")
-lambda_client = boto3.client("lambda")
+sns_client = get_client("sns")
+sqs_client = get_client("sqs")
+lambda_client = get_client("lambda")
 
 # Replace with actual values
 lambda_function_name = "S3ToDynamoDBLambda"
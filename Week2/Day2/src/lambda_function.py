@@ -1,143 +1,1517 @@
-import boto3
+import codecs
 import json
 import csv
-import io
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from decimal import Decimal  # Import Decimal to handle numeric values
+from itertools import chain, islice
+from urllib.parse import unquote_plus
 
-# AWS resources
-s3_client = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb', region_name="us-east-1")
+# AWS clients are built on first use (see get_client), so boto3 is only imported once an event needs it
+CLIENT_SETTINGS = {"dynamodb": {"region_name": "us-east-1"}}  # boto3.client keyword arguments per service
+# botocore Config of every client, as in aws_clients.py (which is not part of the deployment package).
+# Each pool holds a connection per thread that can use the client at once, instead of botocore's 10.
+CLIENT_CONFIG = {
+    "retries": {"mode": "standard", "max_attempts": 3},
+    "connect_timeout": 5,
+    "read_timeout": 30,
+    "tcp_keepalive": True
+}
+# The load stage's writes and digest reads send each request once, so throttles reach the WriteRateLimiter
+# and the jittered retries of load_items instead of being hidden by botocore's own retries. Checkpoints
+# and DescribeTable keep CLIENT_CONFIG's retries on the "dynamodb" client.
+LOAD_CLIENT = "dynamodb-load"
+# Clients built under their own name, as (service, retries)
+CLIENT_VARIANTS = {LOAD_CLIENT: ("dynamodb", {"mode": "standard", "total_max_attempts": 1})}
+PREWARM_CLIENTS = os.environ.get("PREWARM_CLIENTS", "").lower() in ("1", "true")  # Build them during init instead
 
-# DynamoDB Table
+# Logging and metrics settings
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+LOG_LEVEL = LOG_LEVELS.get(os.environ.get("LOG_LEVEL", "INFO").upper(), 20)  # Set to WARNING in production
+METRICS_NAMESPACE = "EmployeesETL"  # CloudWatch namespace of the embedded-metric-format log lines
+STAGES = ("extract", "decompress", "parse", "transform", "load")
+
+# DynamoDB Tables
 TABLE_NAME = "Employees"
-table = dynamodb.Table(TABLE_NAME)
+CHECKPOINT_TABLE_NAME = "EmployeesIngestCheckpoints"  # Progress of objects loaded over several invocations
+
+# Streaming settings
+READ_CHUNK_SIZE = 1024 * 1024  # Bytes pulled from the S3 body per read
+LOAD_CHUNK_SIZE = 500  # Items handed to the load stage at a time
+
+# Supported input formats by file extension; ".json" may hold a JSON array or newline-delimited JSON
+FILE_FORMATS = {".csv": "csv", ".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+# Compressed objects are recognised by a trailing extension (e.g. ".csv.gz") or by their magic bytes
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+COMPRESSION_MAGIC = {b"\x1f\x8b": "gzip", b"\x28\xb5\x2f\xfd": "zstd"}
+ZSTD_INPUT_SLICE = 64 * 1024  # Compressed bytes fed to the zstd decompressor per call
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+JSON_MAX_ELEMENT_SIZE = 4 * 1024 * 1024  # Characters one JSON array element may span before it is rejected
+JSON_CUT_TOKEN_SIZE = 16  # Text this close to the end of a chunk may be a number, literal or escape cut short
+
+# Employee item schema: (attribute, type, default). "string" values are kept as read,
+# "decimal" values are parsed with Decimal and fall back to the default when null or invalid.
+EMPLOYEE_FIELDS = [
+    ("EMPLOYEE_ID", "string", "Unknown"),
+    ("FIRST_NAME", "string", ""),
+    ("LAST_NAME", "string", ""),
+    ("EMAIL", "string", ""),
+    ("PHONE_NUMBER", "string", ""),
+    ("HIRE_DATE", "string", ""),
+    ("JOB_ID", "string", ""),
+    ("SALARY", "decimal", Decimal("0")),
+    ("COMMISSION_PCT", "decimal", Decimal("0")),
+    ("MANAGER_ID", "string", ""),
+    ("DEPARTMENT_ID", "string", ""),
+]
+NULL_VALUES = {"", "-"}  # Typed values treated as missing once stripped, e.g. " - "
+PARSE_CACHE_SIZE = 4096  # Distinct raw values remembered per typed field
+TRANSFORM_BATCH_SIZE = LOAD_CHUNK_SIZE  # Rows converted per call; equal to the load chunk so checkpoints line up
+
+# Resumable ingestion settings
+STOP_MARGIN_MS = 3000  # Time kept free before the Lambda deadline to save progress and re-invoke
+CHUNK_TIME_FACTOR = 1.5  # Stop early if the remaining time would not cover this many chunk durations
+
+# Concurrency settings
+MAX_RECORD_WORKERS = 4  # S3 objects from one event processed at the same time
+
+# SQS event mode (see setup_sqs_trigger.py): small objects from one batch of messages are loaded together
+GROUP_OBJECT_MAX_BYTES = 1024 * 1024  # Objects up to this size (as stored, maybe compressed) can share a load
+GROUP_MAX_BYTES = 8 * 1024 * 1024  # Per shared load; it is not checkpointed, so it has to fit in one invocation
+
+# Batched load settings
+BATCH_SIZE = 25  # BatchWriteItem accepts at most 25 put requests per call
+MAX_WRITE_WORKERS = 8  # Batches written concurrently
+MAX_BATCH_ATTEMPTS = 8  # Attempts per batch before its remaining items are reported as failed
+BACKOFF_BASE_SECONDS = 0.05
+BACKOFF_CAP_SECONDS = 5.0
+RETRYABLE_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "InternalServerError",
+}
+
+# Write throttling settings
+ON_DEMAND_WRITE_RATE = 4000  # Items/sec for on-demand tables without a MaxWriteRequestUnits limit
+ON_DEMAND_READ_RATE = 12000  # Read units/sec for on-demand tables without a MaxReadRequestUnits limit
+ITEMS_PER_READ_UNIT = 2  # Eventually consistent reads of items up to 4 KB cost half a read unit
+BURST_SECONDS = 1.0  # Unused capacity that may be spent at once, in seconds of the write rate
+MIN_WRITE_RATE = 1.0  # Floor for the paced rate after repeated throttling
+RATE_RECOVERY_STEP = 0.05  # Fraction of the table capacity regained after each successful batch
+THROTTLE_COOLDOWN_SECONDS = 1.0  # Throttles closer together than this only cut the rate once
+
+# Change detection settings
+CHANGE_DETECTION = False  # Only write items whose content digest differs from the one stored with them
+DIGEST_ATTRIBUTE = "ROW_DIGEST"  # Digest of the item's other attributes, kept on the item itself
+DIGEST_SIZE = 8  # Bytes of the blake2b digest, stored as 16 hex characters
+
+# True until the first event handled by this execution environment
+cold_start = True
+
+# Low-level AWS clients by service name, built by get_client and reused across warm invocations
+clients = {}
+clients_lock = threading.Lock()
+
+# Reused across warm invocations so the worker threads are only started once.
+# Records and batches use separate pools so a record waiting on its batches never starves them.
+record_executor = ThreadPoolExecutor(max_workers=MAX_RECORD_WORKERS)
+write_executor = ThreadPoolExecutor(max_workers=MAX_WRITE_WORKERS)
 
 def lambda_handler(event, context):
+    global cold_start
+    is_cold_start, cold_start = cold_start, False
+    started = time.perf_counter()
     try:
-        print("Received Event:", json.dumps(event, indent=2))
-        for record in event.get('Records', []):
-            bucket = record['s3']['bucket']['name']
-            key = record['s3']['object']['key']
-            print(f"Processing file: {key} from bucket: {bucket}")
+        if LOG_LEVELS["DEBUG"] >= LOG_LEVEL:  # Serializing an SQS batch of 100 messages is not free
+            log("DEBUG", f"Received Event: {json.dumps(event)}")
+        records = event.get('Records', [])
+        # S3 notifications either arrive directly (one object per event) or in batches of SQS messages
+        sqs_batch = bool(records) and records[0].get("eventSource") == "aws:sqs"
+        if sqs_batch:
+            records, message_ids, unreadable = read_sqs_messages(records)
+            loads = plan_loads(records)
+        else:
+            loads = [[record] for record in records]
+        # An event without records never reads the table's capacity, so it builds no client at all
+        limiter = create_write_limiter() if records else WriteRateLimiter(None)
+        read_limiter = create_read_limiter() if CHANGE_DETECTION and records else None
 
-            # Extract: Read file from S3
-            try:
-                file_obj = s3_client.get_object(Bucket=bucket, Key=key)
-                file_content = file_obj['Body'].read().decode('utf-8')
-            except Exception as e:
-                print(f"Error reading file {key} from bucket {bucket}: {e}")
-                continue
+        # Extract/transform/load of different objects overlap; each load succeeds or fails on its own
+        remaining_time = context.get_remaining_time_in_millis if context else None
+        function_name = context.function_name if context else "local"
+        futures = [
+            record_executor.submit(measure_load, load, limiter, remaining_time, read_limiter,
+                                   function_name, is_cold_start)
+            for load in loads
+        ]
+        results = {}
+        unfinished = []
+        for load, future in zip(loads, futures):
+            for record, result in zip(load, future.result()):
+                results[f"{result['bucket']}/{result['key']}"] = result
+                if result["status"] == "in_progress":
+                    unfinished.append(record)
 
-            # Transform: Process CSV/JSON data
-            if key.endswith('.csv'):
-                try:
-                    transformed_data = process_csv(file_content)
-                except Exception as e:
-                    print(f"Error processing CSV file {key}: {e}")
-                    continue
-            elif key.endswith('.json'):
-                try:
-                    transformed_data = process_json(file_content)
-                except Exception as e:
-                    print(f"Error processing JSON file {key}: {e}")
-                    continue
-            else:
-                print(f"Unsupported file format: {key}")
-                continue
+        # Objects stopped at the deadline continue from their checkpoints in a fresh invocation
+        if unfinished:
+            continue_in_new_invocation(unfinished, context)
 
-            # Load: Insert transformed data into DynamoDB
-            for item in transformed_data:
-                try:
-                    table.put_item(Item=item)
-                except Exception as e:
-                    print(f"Error inserting item into DynamoDB: {e}")
-            print(f"✅ Data from {key} inserted into DynamoDB.")
-        return {"statusCode": 200, "body": "ETL process complete"}
+        write_stats = limiter.stats()
+        log("INFO", f"Write stats: {json.dumps(write_stats)}")
+        emit_metrics(function_name, {"Records": ("Count", len(records)),
+                               "InvocationTime": ("Milliseconds", (time.perf_counter() - started) * 1000),
+                               "ColdStart": ("Count", int(is_cold_start))})
+        response = {"statusCode": 200, "body": "ETL process complete", "results": results, "write_stats": write_stats}
+        if sqs_batch:
+            # Only the messages of failed objects are retried (needs ReportBatchItemFailures on the mapping)
+            failed = list(unreadable)
+            for object_id, ids in message_ids.items():
+                if results.get(object_id, {}).get("status") == "failed":
+                    failed.extend(ids)
+            response["batchItemFailures"] = [{"itemIdentifier": message_id} for message_id in dict.fromkeys(failed)]
+        return response
     except Exception as overall_exception:
-        print(f"Unhandled exception in lambda_handler: {overall_exception}")
+        log("ERROR", f"Unhandled exception in lambda_handler: {overall_exception}")
         raise
 
-def process_csv(file_content):
+def measure_load(records, limiter, remaining_time, read_limiter, function_name, is_cold_start):
     """
-    Processes CSV content and converts SALARY and COMMISSION_PCT using Decimal.
+    Runs process_record for a single record, or process_group for several, with a StageTimer active
+    on this thread. Emits the load's metrics as an embedded-metric-format log line, adds them to the
+    result of every object in the load and returns those results, one per record.
     """
-    records = []
-    csv_reader = csv.DictReader(io.StringIO(file_content))
-    
-    for row in csv_reader:
-        # Convert SALARY using Decimal
-        salary_str = row["SALARY"].strip()
-        if salary_str in ["", "-"]:
-            salary = Decimal("0")
+    timer = StageTimer()
+    with timer.activate():
+        if len(records) == 1:
+            result = process_record(records[0], limiter, remaining_time, read_limiter)
         else:
+            result = process_group(records, limiter, remaining_time, read_limiter)
+    object_results = result.pop("objects", [result])
+    metrics = timer.summary(result.pop("rows", 0))
+    metrics.update(retries=result.pop("retries", 0), throttles=result.pop("throttles", 0), cold_start=is_cold_start)
+    if len(records) > 1:
+        metrics["objects"] = len(records)
+    emit_metrics(function_name, {
+        **{f"{stage.capitalize()}Time": ("Milliseconds", metrics[f"{stage}_ms"]) for stage in STAGES},
+        "RecordTime": ("Milliseconds", metrics["total_ms"]),
+        "Rows": ("Count", metrics["rows"]),
+        "RowsPerSecond": ("Count/Second", metrics["rows_per_second"]),
+        "BytesRead": ("Bytes", metrics["bytes_read"]),
+        "WriteRetries": ("Count", metrics["retries"]),
+        "WriteThrottles": ("Count", metrics["throttles"]),
+        "ItemsWritten": ("Count", result["written"]),
+        "ItemsUnchanged": ("Count", result["unchanged"]),
+        "ItemsFailed": ("Count", result["failed"])
+    }, {"Bucket": result["bucket"], "Key": result["key"], "Status": result["status"], "ColdStart": is_cold_start})
+    for object_result in object_results:
+        object_result["metrics"] = metrics
+    return object_results
+
+def process_record(record, limiter, remaining_time=None, read_limiter=None):
+    """
+    Runs the ETL for one S3 event record and returns its summary.
+    Errors are caught here so one bad object never affects the other records in the event.
+    Progress is checkpointed per chunk; if `remaining_time` runs low the record stops with
+    status "in_progress" and a later invocation resumes it from the checkpoint, or with status
+    "failed" if items failed or the checkpoint could not be saved.
+    With a `read_limiter`, only items that changed since the last load are written (see load_items).
+    """
+    bucket, key = record_location(record)
+    result = {
+        "bucket": bucket,
+        "key": key,
+        "status": "failed",
+        "written": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "failed_batches": [],
+        "error": None
+    }
+    log("INFO", f"Processing file: {key} from bucket: {bucket}")
+
+    compression, format_key = detect_compression(key)
+    file_format = detect_file_format(format_key)
+    if file_format is None:
+        log("WARNING", f"Unsupported file format: {key}")
+        result["status"] = "skipped"
+        result["error"] = "Unsupported file format"
+        return result
+
+    checkpoint = Checkpoint.load(bucket, key, record['s3']['object'].get('eTag'))
+    if checkpoint.status == "complete":
+        log("INFO", f"File {key} was already loaded (checkpoint {checkpoint.rows} rows), skipping.")
+        result["status"] = "skipped"
+        result["error"] = "Already loaded"
+        return result
+    if checkpoint.rows:
+        log("INFO", f"Resuming {key} at row {checkpoint.rows} (byte {checkpoint.offset}).")
+
+    # Extract: Open a streaming read of the file from S3, starting where the last invocation stopped.
+    # Uncompressed line-based formats commit byte offsets and resume with a ranged read;
+    # JSON arrays and compressed objects are read from the start and skip the rows already done.
+    resume_from_offset = checkpoint.offset > 0 and compression is None
+    timer = StageTimer.current() or StageTimer()
+    try:
+        with timer.stage("extract"):
+            if resume_from_offset:
+                file_obj = get_client("s3").get_object(Bucket=bucket, Key=key, Range=f"bytes={checkpoint.offset}-")
+            else:
+                file_obj = get_client("s3").get_object(Bucket=bucket, Key=key)
+    except Exception as e:
+        log("ERROR", f"Error reading file {key} from bucket {bucket}: {e}")
+        result["error"] = f"Error reading file: {e}"
+        return result
+    if checkpoint.etag is None:
+        checkpoint.etag = file_obj.get('ETag', '').strip('"') or None
+    chunks = timer.iterate("extract", file_obj['Body'].iter_chunks(READ_CHUNK_SIZE), count_bytes=True)
+
+    # Transform and Load: Insert the parsed items into DynamoDB as they are parsed
+    rows_before = checkpoint.rows
+    try:
+        transformed_data = parse_items(chunks, file_format, compression, checkpoint, resume_from_offset)
+        summary = load_items(transformed_data, limiter, checkpoint, remaining_time, read_limiter)
+    except Exception as e:
+        log("ERROR", f"Error processing file {key}: {e}")
+        result["error"] = f"Error processing file: {e}"
+        return result
+    result.update(
+        rows=summary["rows"],
+        retries=summary["retries"],
+        throttles=summary["throttles"],
+        written=summary["written"],
+        unchanged=summary["unchanged"],
+        failed=summary["failed"],
+        failed_batches=summary["failed_batches"],
+        status="failed" if summary["failed"] else "success"
+    )
+    if summary["failed"]:
+        log("WARNING", f"⚠️ {summary['failed']} items from {key} failed in {len(summary['failed_batches'])} batches.")
+        result["error"] = f"{summary['failed']} items could not be written"
+    if not summary["completed"]:
+        if summary["failed"]:
+            return result  # Failed items are not left behind: the object is loaded again from the start
+        if checkpoint.rows == rows_before:
+            result["status"] = "failed"
+            result["error"] = "Ran out of time before a chunk could be written"
+            return result
+        if not checkpoint.enabled:
+            # A new invocation would resume from the last checkpoint saved, and could never get further
+            result["status"] = "failed"
+            result["error"] = f"Ran out of time at row {checkpoint.rows}, and progress could not be checkpointed"
+            return result
+        log("INFO", f"⏸️ Stopped {key} at row {checkpoint.rows} before the deadline, it will be resumed.")
+        result["status"] = "in_progress"
+        return result
+    if read_limiter:
+        log("INFO", f"✅ {summary['written']} changed items from {key} written to DynamoDB, "
+                    f"{summary['unchanged']} unchanged items skipped ({summary['conflicts']} write conflicts).")
+    else:
+        log("INFO", f"✅ {summary['written']} items from {key} inserted into DynamoDB.")
+    return result
+
+def process_group(records, limiter, remaining_time=None, read_limiter=None):
+    """
+    Loads several small objects from one SQS batch as a single stream of items, so their rows fill
+    BatchWriteItem batches together instead of each object ending with a partly filled one.
+    The group is not checkpointed while it loads: every object is marked complete once all items are
+    written, and if items fail or time runs out the objects not yet complete are reported as failed,
+    so their messages are retried (writing the same items again is harmless).
+    Returns a summary like process_record's, with the per-object results under "objects".
+    """
+    objects = []
+    for record in records:
+        bucket, key = record_location(record)
+        objects.append({"bucket": bucket, "key": key, "status": "failed", "rows": 0, "error": None})
+    log("INFO", f"Processing {len(records)} files together: {', '.join(result['key'] for result in objects)}")
+    timer = StageTimer.current() or StageTimer()
+    loaded = []  # (result, checkpoint) of the objects whose items were all read
+
+    def group_items():
+        for record, result in zip(records, objects):
+            checkpoint = Checkpoint.load(result["bucket"], result["key"], record['s3']['object'].get('eTag'))
+            if checkpoint.status == "complete":
+                result.update(status="skipped", error="Already loaded")
+                continue
+            checkpoint = Checkpoint(checkpoint.object_id, checkpoint.etag)  # Small objects always start over
+            compression, format_key = detect_compression(result["key"])
             try:
-                salary = Decimal(salary_str)
+                with timer.stage("extract"):
+                    file_obj = get_client("s3").get_object(Bucket=result["bucket"], Key=result["key"])
+                if checkpoint.etag is None:
+                    checkpoint.etag = file_obj.get('ETag', '').strip('"') or None
+                chunks = timer.iterate("extract", file_obj['Body'].iter_chunks(READ_CHUNK_SIZE), count_bytes=True)
+                items = parse_items(chunks, detect_file_format(format_key), compression, checkpoint, False)
+                rows = 0
+                for rows, item in enumerate(items, 1):
+                    yield item
+                result["rows"] = rows
             except Exception as e:
-                print(f"Error converting SALARY value '{salary_str}': {e}")
-                salary = Decimal("0")
+                # Items already read from this object are still written; the object is retried as a whole
+                log("ERROR", f"Error processing file {result['key']}: {e}")
+                result["error"] = f"Error processing file: {e}"
+                continue
+            loaded.append((result, checkpoint))
 
-        # Convert COMMISSION_PCT using Decimal
-        commission_str = row["COMMISSION_PCT"].strip()
-        if commission_str in ["", "-"]:
-            commission_pct = Decimal("0")
+    group = {
+        "bucket": objects[0]["bucket"],
+        "key": f"{len(objects)} objects",
+        "status": "failed",
+        "written": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "failed_batches": [],
+        "error": None,
+        "objects": objects
+    }
+    try:
+        summary = load_items(group_items(), limiter, None, remaining_time, read_limiter)
+    except Exception as e:
+        log("ERROR", f"Error loading {group['key']}: {e}")
+        group["error"] = f"Error loading files: {e}"
+        summary = None
+    if summary:
+        group.update({name: summary[name] for name in ("rows", "retries", "throttles", "written", "unchanged",
+                                                        "failed", "failed_batches")})
+        if summary["failed"]:
+            group["error"] = f"{summary['failed']} items could not be written"
+        elif not summary["completed"]:
+            group["error"] = "Ran out of time before the files could be written"
         else:
+            group["status"] = "success"
+            for result, checkpoint in loaded:
+                checkpoint.rows = result["rows"]
+                checkpoint.finish()
+                result["status"] = "success"
+    for result in objects:
+        if result["status"] == "failed" and not result["error"]:
+            result["error"] = group["error"]
+    failed = [result["key"] for result in objects if result["status"] == "failed"]
+    if failed:
+        log("WARNING", f"⚠️ {len(failed)} of {len(objects)} files loaded together failed and will be retried: "
+                       f"{', '.join(failed)}")
+    else:
+        log("INFO", f"✅ {group['written']} items from {len(objects)} files inserted into DynamoDB.")
+    return group
+
+def parse_items(chunks, file_format, compression, checkpoint, resume_from_offset):
+    """
+    Lazily turns the object's byte chunks into items, skipping the rows a previous invocation
+    already loaded when the read did not resume from a byte offset.
+    """
+    # Decompress: gzip/zstd objects are inflated chunk by chunk in front of the parsers
+    if compression is None and not resume_from_offset:
+        compression, chunks = sniff_compression(chunks)
+    if compression:
+        chunks = (StageTimer.current() or StageTimer()).iterate("decompress", iter_decompressed(chunks, compression))
+    # Byte offsets are only tracked (and resumed from) in uncompressed objects
+    position = None if compression else checkpoint.position
+
+    # Transform: Lazily parse CSV/JSON/NDJSON data
+    if file_format == "json":
+        file_format, chunks = sniff_json_format(chunks)
+    if file_format == "csv":
+        lines = iter_lines(chunks, position=position)
+        if not resume_from_offset:
+            checkpoint.header = next(lines, "")
+        transformed_data = process_csv(chain([checkpoint.header], lines), batch_size=TRANSFORM_BATCH_SIZE)
+    elif file_format == "ndjson":
+        transformed_data = process_ndjson(iter_lines(chunks, position=position), batch_size=TRANSFORM_BATCH_SIZE)
+    else:
+        transformed_data = process_json(iter_json_array(iter_text(chunks)), batch_size=TRANSFORM_BATCH_SIZE)
+    if checkpoint.rows and not resume_from_offset:
+        transformed_data = islice(transformed_data, checkpoint.rows, None)
+    return transformed_data
+
+def record_location(record):
+    """
+    Returns the bucket and key of an S3 event record. Keys arrive URL-encoded ("my file.csv" as "my+file.csv").
+    """
+    return record['s3']['bucket']['name'], unquote_plus(record['s3']['object']['key'])
+
+def read_sqs_messages(messages):
+    """
+    Extracts the S3 event records from a batch of SQS messages that each hold an S3 notification.
+    Returns the records, one per object (the latest notification wins if an object was written again),
+    {"bucket/key": [ids of the messages that mention it]} and the ids of messages that could not be read.
+    The s3:TestEvent message S3 sends when the notification is configured is acknowledged and ignored.
+    """
+    latest = {}
+    message_ids = {}
+    unreadable = []
+    for message in messages:
+        try:
+            notification = json.loads(message["body"])
+            if notification.get("Event") == "s3:TestEvent":
+                continue
+            for record in notification["Records"]:
+                if not record.get("eventName", "ObjectCreated").startswith("ObjectCreated"):
+                    continue
+                object_id = "/".join(record_location(record))
+                message_ids.setdefault(object_id, []).append(message["messageId"])
+                # Sequencers are hex strings that only grow for the same key
+                current = latest.get(object_id)
+                if current is None or int(record['s3']['object'].get('sequencer', '0'), 16) >= \
+                        int(current['s3']['object'].get('sequencer', '0'), 16):
+                    latest[object_id] = record
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            log("ERROR", f"Unreadable message {message.get('messageId')}, it will be retried: {e}")
+            unreadable.append(message.get("messageId"))
+    return list(latest.values()), message_ids, unreadable
+
+def plan_loads(records):
+    """
+    Splits the S3 records of an SQS batch into loads. Small objects of supported formats are packed
+    together up to GROUP_MAX_BYTES for process_group; every other object is loaded on its own with
+    checkpoints, as if it had arrived in a direct S3 event.
+    """
+    loads, group, group_bytes = [], [], 0
+    for record in records:
+        size = record['s3']['object'].get('size')
+        format_key = detect_compression(record_location(record)[1])[1]
+        if size is None or size > GROUP_OBJECT_MAX_BYTES or detect_file_format(format_key) is None:
+            loads.append([record])
+            continue
+        if group and group_bytes + size > GROUP_MAX_BYTES:
+            loads.append(group)
+            group, group_bytes = [], 0
+        group.append(record)
+        group_bytes += size
+    if group:
+        loads.append(group)
+    return loads
+
+def continue_in_new_invocation(records, context):
+    """
+    Re-invokes this function asynchronously with the records that still have work left.
+    """
+    if context is None:
+        log("WARNING", f"No Lambda context, {len(records)} unfinished records are not re-invoked.")
+        return
+    get_client("lambda").invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType="Event",
+        Payload=json.dumps({"Records": records})
+    )
+    log("INFO", f"🔁 Re-invoked {context.function_name} to continue {len(records)} records.")
+
+def get_client(name):
+    """
+    Returns the low-level boto3 client `name`, a service or one of CLIENT_VARIANTS, building it on first use.
+    boto3 is imported here rather than at module level, so a cold start only pays for the
+    imports and the clients the event actually needs; later calls reuse the cached client.
+    """
+    client = clients.get(name)
+    if client is None:
+        with clients_lock:  # Creating clients from boto3's default session is not thread-safe
+            client = clients.get(name)
+            if client is None:
+                import boto3
+                from botocore.config import Config
+                service, retries = CLIENT_VARIANTS.get(name, (name, CLIENT_CONFIG["retries"]))
+                config = Config(max_pool_connections=MAX_RECORD_WORKERS + MAX_WRITE_WORKERS,
+                                **dict(CLIENT_CONFIG, retries=retries))
+                client = clients[name] = boto3.client(service, config=config, **CLIENT_SETTINGS.get(service, {}))
+    return client
+
+def error_code(error):
+    """
+    Returns the AWS error code of a botocore ClientError, or None for any other exception.
+    Used instead of `except ClientError` so botocore is not imported before a client is needed.
+    """
+    return getattr(error, "response", {}).get("Error", {}).get("Code")
+
+def to_attribute(value):
+    """
+    Converts a Python value to a DynamoDB attribute value, e.g. Decimal("1.5") -> {"N": "1.5"}.
+    The low-level client takes these directly, without the resource API's type serializer.
+    """
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, Decimal)):
+        return {"N": str(value)}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, dict):
+        return {"M": serialize_item(value)}
+    if isinstance(value, (list, tuple)):
+        return {"L": [to_attribute(element) for element in value]}
+    raise TypeError(f"Unsupported DynamoDB value {value!r} of type {type(value).__name__}")
+
+def from_attribute(attribute):
+    """
+    Converts a DynamoDB attribute value back to Python; numbers come back as Decimal.
+    """
+    (kind, value), = attribute.items()
+    if kind == "S" or kind == "BOOL" or kind == "B":
+        return value
+    if kind == "N":
+        return Decimal(value)
+    if kind == "NULL":
+        return None
+    if kind == "M":
+        return deserialize_item(value)
+    if kind == "L":
+        return [from_attribute(element) for element in value]
+    raise TypeError(f"Unsupported DynamoDB attribute type {kind}")
+
+def serialize_item(item):
+    """
+    Converts an item's attributes with to_attribute.
+    """
+    return {name: to_attribute(value) for name, value in item.items()}
+
+def deserialize_item(item):
+    """
+    Converts an item's attribute values with from_attribute.
+    """
+    return {name: from_attribute(value) for name, value in item.items()}
+
+def log(level, message):
+    """
+    Prints `message` if `level` ("DEBUG", "INFO", "WARNING" or "ERROR") is at or above LOG_LEVEL.
+    """
+    if LOG_LEVELS[level] >= LOG_LEVEL:
+        print(message)
+
+def emit_metrics(function_name, metrics, properties=None):
+    """
+    Prints one CloudWatch embedded-metric-format line; CloudWatch Logs turns it into metrics in
+    METRICS_NAMESPACE with a FunctionName dimension. `metrics` maps names to (unit, value).
+    Emitted at every log level, since the numbers are what production monitoring reads.
+    """
+    line = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [["FunctionName"]],
+                "Metrics": [{"Name": name, "Unit": unit} for name, (unit, _) in metrics.items()]
+            }]
+        },
+        "FunctionName": function_name,
+        **(properties or {}),
+        **{name: value for name, (_, value) in metrics.items()}
+    }
+    print(json.dumps(line))
+
+def timed_stage(name):
+    """
+    Times a block as stage `name` of the record being processed on this thread, if any.
+    """
+    timer = StageTimer.current()
+    return timer.stage(name) if timer else nullcontext()
+
+class StageTimer:
+    """
+    Wall time spent in each pipeline stage (STAGES) of one record, plus the bytes read from S3.
+    Stages nest because the pipeline is lazy: pulling a chunk in the parse stage runs extract,
+    decompress and transform underneath it. Each stage is charged only its own time, without the
+    stages nested in it. Timing happens per chunk or batch, never per row.
+    """
+
+    local = threading.local()
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.bytes_read = 0
+        self.started = time.perf_counter()
+        self.nested = [0.0]  # Time of the stages nested in each open stage
+
+    @classmethod
+    def current(cls):
+        return getattr(cls.local, "timer", None)
+
+    @contextmanager
+    def activate(self):
+        StageTimer.local.timer = self
+        try:
+            yield self
+        finally:
+            StageTimer.local.timer = None
+
+    @contextmanager
+    def stage(self, name):
+        self.nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] += elapsed - self.nested.pop()
+            self.nested[-1] += elapsed
+
+    def iterate(self, name, iterator, count_bytes=False):
+        """
+        Yields from `iterator`, charging the time spent producing each element to stage `name`.
+        """
+        iterator = iter(iterator)
+        while True:
+            with self.stage(name):
+                element = next(iterator, None)
+            if element is None:
+                return
+            if count_bytes:
+                self.bytes_read += len(element)
+            yield element
+
+    def summary(self, rows):
+        total = time.perf_counter() - self.started
+        metrics = {f"{stage}_ms": round(seconds * 1000, 3) for stage, seconds in self.seconds.items()}
+        metrics["other_ms"] = round(max(0.0, total - sum(self.seconds.values())) * 1000, 3)
+        metrics.update(
+            total_ms=round(total * 1000, 3),
+            rows=rows,
+            rows_per_second=round(rows / total, 1) if total > 0 else 0.0,
+            bytes_read=self.bytes_read
+        )
+        return metrics
+
+class StreamPosition:
+    """
+    Byte offset the reader has reached in an S3 object.
+    """
+
+    def __init__(self, offset=0):
+        self.offset = offset
+
+class Checkpoint:
+    """
+    Progress of one S3 object, stored in CHECKPOINT_TABLE_NAME keyed by "bucket/key".
+    Offsets and row counts are only committed once the rows before them have been written,
+    and a checkpoint is ignored if the object's ETag no longer matches.
+    """
+
+    def __init__(self, object_id, etag, item=None):
+        item = item or {}
+        self.object_id = object_id
+        self.etag = etag
+        self.offset = int(item.get("BYTE_OFFSET", 0))
+        self.rows = int(item.get("ROWS_DONE", 0))
+        self.header = item.get("HEADER", "")
+        self.status = item.get("STATUS", "in_progress")
+        self.position = StreamPosition(self.offset)
+        self.pulled_rows = self.rows
+        self.enabled = True
+
+    @classmethod
+    def load(cls, bucket, key, etag):
+        object_id = f"{bucket}/{key}"
+        item = None
+        if etag:
             try:
-                commission_pct = Decimal(commission_str)
+                item = get_client("dynamodb").get_item(
+                    TableName=CHECKPOINT_TABLE_NAME,
+                    Key={"OBJECT_ID": {"S": object_id}},
+                    ConsistentRead=True
+                ).get("Item")
+                item = item and deserialize_item(item)
             except Exception as e:
-                print(f"Error converting COMMISSION_PCT value '{commission_str}': {e}")
-                commission_pct = Decimal("0")
-                
-        transformed_record = {
-            "EMPLOYEE_ID": row["EMPLOYEE_ID"],
-            "FIRST_NAME": row["FIRST_NAME"],
-            "LAST_NAME": row["LAST_NAME"],
-            "EMAIL": row["EMAIL"],
-            "PHONE_NUMBER": row["PHONE_NUMBER"],
-            "HIRE_DATE": row["HIRE_DATE"],
-            "JOB_ID": row["JOB_ID"],
-            "SALARY": salary,
-            "COMMISSION_PCT": commission_pct,
-            "MANAGER_ID": row["MANAGER_ID"],
-            "DEPARTMENT_ID": row["DEPARTMENT_ID"]
-        }
-        records.append(transformed_record)
-        print("Row read from CSV:", row)
-    
-    return records
-
-def process_json(file_content):
-    """
-    Processes JSON content and converts numeric fields using Decimal.
-    """
-    data = json.loads(file_content)
-    records = []
-    
-    for item in data:
+                log("ERROR", f"Error reading checkpoint for {object_id}, starting from the beginning: {e}")
+            if item and item.get("ETAG") != etag:
+                item = None  # The object was replaced since the checkpoint was written
+        return cls(object_id, etag, item)
+
+    def mark(self, count):
+        """
+        Records that `count` more rows were read and returns the progress to commit once they are written.
+        """
+        self.pulled_rows += count
+        return self.position.offset, self.pulled_rows
+
+    def commit(self, mark):
+        self.offset, self.rows = mark
+        self.save()
+
+    def finish(self):
+        self.status = "complete"
+        self.save()
+
+    def restart(self):
+        self.offset = self.rows = 0
+        self.save()
+
+    def save(self):
+        if not self.enabled:
+            return
         try:
-            salary = Decimal(str(item.get("SALARY", "0")))
+            get_client("dynamodb").put_item(TableName=CHECKPOINT_TABLE_NAME, Item=serialize_item({
+                "OBJECT_ID": self.object_id,
+                "ETAG": self.etag or "",
+                "BYTE_OFFSET": self.offset,
+                "ROWS_DONE": self.rows,
+                "HEADER": self.header,
+                "STATUS": self.status,
+                "UPDATED_AT": int(time.time())
+            }))
         except Exception as e:
-            print(f"Error converting SALARY: {e}")
-            salary = Decimal("0")
-            
+            log("ERROR", f"Error saving checkpoint for {self.object_id}, progress will not be saved: {e}")
+            self.enabled = False
+
+def detect_file_format(key):
+    """
+    Returns "csv", "json" or "ndjson" from the object key's extension, or None if unsupported.
+    """
+    for extension, file_format in FILE_FORMATS.items():
+        if key.endswith(extension):
+            return file_format
+    return None
+
+def detect_compression(key):
+    """
+    Returns the compression named by the key's last extension ("gzip", "zstd" or None)
+    and the key without that extension, e.g. ("gzip", "employees.csv") for "employees.csv.gz".
+    """
+    for extension, compression in COMPRESSION_EXTENSIONS.items():
+        if key.endswith(extension):
+            return compression, key[:-len(extension)]
+    return None, key
+
+def sniff_compression(chunks):
+    """
+    Recognises gzip/zstd content by its magic bytes, for compressed objects stored without the extension.
+    Returns the compression (or None) and an iterator that still yields every chunk.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, b"")
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if first.startswith(magic):
+            return compression, chain([first], chunks)
+    return None, chain([first], chunks)
+
+def iter_decompressed(chunks, compression):
+    """
+    Decompresses a stream of byte chunks, bounding how much is inflated at a time so a highly
+    compressed chunk never has to be held decompressed in one piece. Concatenated gzip members
+    or zstd frames (e.g. from parallel compressors) are read as one stream.
+    Raises ValueError if the object ends in the middle of a member or frame.
+    """
+    if compression == "zstd":
+        yield from iter_zstd(chunks)
+        return
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)  # gzip header and trailer
+    in_member = False
+    for chunk in chunks:
+        data = chunk
+        while data:
+            in_member = True
+            output = decompressor.decompress(data, READ_CHUNK_SIZE)
+            if output:
+                yield output
+            if decompressor.eof:
+                data = decompressor.unused_data
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                in_member = False
+            else:
+                data = decompressor.unconsumed_tail
+    if in_member:
+        raise ValueError("Compressed object ended in the middle of a gzip member")
+
+def iter_zstd(chunks):
+    """
+    zstd counterpart of iter_decompressed. zstandard's decompressobj has no output limit per call
+    (its stream_reader has one but cannot tell a truncated object from a complete one), so the
+    compressed input is fed in slices of ZSTD_INPUT_SLICE bytes to keep each output small.
+    """
+    zstandard = import_zstandard()
+    if zstandard is None:
+        raise RuntimeError("zstd objects need the zstandard package in the Lambda deployment")
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    in_frame = False
+    for chunk in chunks:
+        view = memoryview(chunk)
+        for start in range(0, len(view), ZSTD_INPUT_SLICE):
+            data = view[start:start + ZSTD_INPUT_SLICE]
+            while data:
+                in_frame = True
+                output = decompressor.decompress(data)
+                if output:
+                    yield output
+                if not decompressor.eof:
+                    break
+                data = decompressor.unused_data
+                decompressor = zstandard.ZstdDecompressor().decompressobj()
+                in_frame = False
+    if in_frame:
+        raise ValueError("Compressed object ended in the middle of a zstd frame")
+
+def import_zstandard():
+    """
+    Imports the zstandard package when the first zstd object is read, or returns None if it is missing.
+    zstd objects need it, e.g. from a Lambda layer; gzip works with the standard library.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+def sniff_json_format(chunks):
+    """
+    Tells a JSON array from newline-delimited JSON by the first non-whitespace byte.
+    Returns the format and an iterator that still yields every chunk.
+    """
+    chunks = iter(chunks)
+    seen = []
+    for chunk in chunks:
+        seen.append(chunk)
+        stripped = chunk.lstrip(codecs.BOM_UTF8 + b" \t\r\n")
+        if stripped:
+            # Anything other than an array is read line by line as NDJSON
+            file_format = "json" if stripped.startswith(b"[") else "ndjson"
+            return file_format, chain(seen, chunks)
+    return "json", iter(seen)
+
+def iter_text(chunks):
+    """
+    Decodes UTF-8 byte chunks incrementally, so characters split across chunks are handled.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+def iter_lines(chunks, position=None):
+    """
+    Yields decoded lines from a stream of byte chunks, holding at most one chunk in memory.
+    Splitting on the raw newline byte is safe because it never occurs inside a UTF-8 sequence.
+    If a StreamPosition is given, its offset is advanced past each line before the line is yielded.
+    """
+    position = position or StreamPosition()
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            position.offset += len(line) + 1
+            yield line.decode('utf-8') + "\n"
+    if pending:
+        position.offset += len(pending)
+        yield pending.decode('utf-8')
+
+def iter_json_array(texts):
+    """
+    Yields the elements of a top-level JSON array one at a time from decoded text chunks,
+    so memory holds one element and about one chunk instead of the whole document.
+    Malformed text raises ValueError as soon as it is read, rather than once the rest of the
+    document has been buffered, and so does an element longer than JSON_MAX_ELEMENT_SIZE.
+    """
+    decoder = json.JSONDecoder()
+    texts = iter(texts)
+    buffer, index = "", 0
+    more = True
+
+    def read_more():
+        nonlocal buffer, index, more
+        text = next(texts, None)
+        if text is None:
+            more = False
+        else:
+            buffer, index = buffer[index:] + text, 0
+        return more
+
+    # Opening bracket
+    while True:
+        index = JSON_WHITESPACE.match(buffer, index).end()
+        if index < len(buffer):
+            break
+        if not read_more():
+            raise ValueError("Expected a JSON array, got an empty document")
+    if buffer[index] != "[":
+        raise ValueError(f"Expected a JSON array, got {buffer[index]!r}")
+    index += 1
+
+    after_element = after_comma = False
+    while True:
+        index = JSON_WHITESPACE.match(buffer, index).end()
+        if index == len(buffer):
+            if not read_more():
+                raise ValueError("Unexpected end of JSON array")
+            continue
+        # Elements are separated by exactly one comma; "]" may close the array except right after one
+        if after_element:
+            if buffer[index] == "]":
+                return
+            if buffer[index] != ",":
+                raise ValueError(f"Expected ',' or ']' after a JSON array element, got {buffer[index]!r}")
+            index += 1
+            after_element, after_comma = False, True
+            continue
+        if buffer[index] == "]" and not after_comma:
+            return
+        if buffer[index] in ",]":
+            raise ValueError(f"Expected a JSON array element, got {buffer[index]!r}")
         try:
-            commission_pct = Decimal(str(item.get("COMMISSION_PCT", "0")))
+            value, end = decoder.raw_decode(buffer, index)
+        except json.JSONDecodeError as e:
+            # Only an element cut off by the end of the buffer can be completed by the next chunk
+            if len(buffer) - index > JSON_MAX_ELEMENT_SIZE:
+                raise ValueError(f"JSON array element longer than {JSON_MAX_ELEMENT_SIZE} characters") from e
+            cut = e.msg.startswith("Unterminated string") or len(buffer) - e.pos <= JSON_CUT_TOKEN_SIZE
+            if not cut or not read_more():
+                raise
+            continue
+        # An element is only complete once "," or "]" follows it, e.g. "-75" may be "-7500.0" cut by a chunk
+        after = JSON_WHITESPACE.match(buffer, end).end()
+        cut = after == len(buffer) or buffer[after] not in ",]" and len(buffer) - end <= JSON_CUT_TOKEN_SIZE
+        if cut and more and read_more():
+            continue
+        index = end
+        after_element = True
+        yield value
+
+def chunked(iterable, size):
+    """
+    Groups an iterable into lists of at most `size` items without materialising it.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class WriteRateLimiter:
+    """
+    Token bucket shared by the write workers that paces writes to the table's write capacity
+    (and, for change detection, digest reads to its read capacity).
+    Throttling signals halve the rate and every successful batch wins part of it back, so the
+    load settles just under what the table can absorb instead of retrying into a throttle storm.
+    A rate of None disables pacing but still records throughput and throttle counts.
+    """
+
+    def __init__(self, rate):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = rate * BURST_SECONDS if rate else 0
+        self.tokens = self.capacity
+        self.lock = threading.Lock()
+        self.started = self.updated = self.last_throttle = time.monotonic()
+        self.finished = self.started
+        self.items = 0
+        self.throttles = 0
+
+    def acquire(self, count):
+        """
+        Reserves `count` write units, sleeping until the bucket has refilled enough to cover them.
+        """
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= count
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+    def charge(self, units):
+        """
+        Takes extra tokens when DynamoDB reports more consumed capacity than items (items over 1 KB).
+        """
+        if self.rate and units > 0:
+            with self.lock:
+                self.tokens -= units
+
+    def on_success(self, count):
+        with self.lock:
+            self.items += count
+            self.finished = time.monotonic()
+            if self.rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY_STEP)
+
+    def on_throttle(self):
+        with self.lock:
+            self.throttles += 1
+            now = time.monotonic()
+            if self.rate and now - self.last_throttle >= THROTTLE_COOLDOWN_SECONDS:
+                self.rate = max(MIN_WRITE_RATE, self.rate / 2)
+                self.last_throttle = now
+
+    def stats(self):
+        with self.lock:
+            elapsed = self.finished - self.started
+            return {
+                "items_written": self.items,
+                "items_per_second": round(self.items / elapsed, 1) if elapsed > 0 else 0.0,
+                "throttles": self.throttles,
+                "table_write_rate": self.max_rate,
+                "paced_write_rate": round(self.rate, 1) if self.rate else None
+            }
+
+def create_write_limiter():
+    """
+    Builds a WriteRateLimiter from the table's provisioned WCU, or its on-demand write limit.
+    """
+    return create_rate_limiter("Write", ON_DEMAND_WRITE_RATE)
+
+def create_read_limiter():
+    """
+    Builds a limiter for the digest reads of change detection from the table's read capacity.
+    Rates are in items/sec, ITEMS_PER_READ_UNIT items per read unit.
+    """
+    return create_rate_limiter("Read", ON_DEMAND_READ_RATE, ITEMS_PER_READ_UNIT)
+
+def create_rate_limiter(kind, on_demand_units, items_per_unit=1):
+    """
+    Builds a WriteRateLimiter pacing `kind` ("Read" or "Write") requests to the table's capacity.
+    """
+    try:
+        description = get_client("dynamodb").describe_table(TableName=TABLE_NAME)["Table"]
+    except Exception as e:
+        log("WARNING", f"Error reading capacity of table {TABLE_NAME}, {kind.lower()}s will not be paced: {e}")
+        return WriteRateLimiter(None)
+    if description.get("BillingModeSummary", {}).get("BillingMode") == "PAY_PER_REQUEST":
+        max_units = description.get("OnDemandThroughput", {}).get(f"Max{kind}RequestUnits", -1)
+        units = max_units if max_units > 0 else on_demand_units
+    else:
+        units = description["ProvisionedThroughput"][f"{kind}CapacityUnits"]
+    rate = units * items_per_unit
+    log("INFO", f"Pacing {kind.lower()}s to {TABLE_NAME} at {rate} items/sec")
+    return WriteRateLimiter(rate)
+
+def load_items(items, limiter, checkpoint=None, remaining_time=None, read_limiter=None):
+    """
+    Writes items to DynamoDB with concurrent BatchWriteItem calls, one bounded chunk at a time.
+    The next chunk is parsed while the previous one is being written; chunks are still written in
+    order so a key repeated later in the file wins, as it did with sequential put_item calls.
+    After each chunk is written the checkpoint is committed, unless items have failed, and if
+    `remaining_time` (ms) gets too short for another chunk the load stops with summary["completed"]
+    set to False.
+    With a `read_limiter` batches go through write_changed_batch instead, which skips unchanged items.
+    Returns a summary of written/unchanged/failed item counts and the failed batches.
+    """
+    summary = {
+        "rows": 0,
+        "written": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "retries": 0,
+        "throttles": 0,
+        "conflicts": 0,
+        "failed_batches": [],
+        "completed": True
+    }
+    timer = StageTimer.current() or StageTimer()
+    pending, pending_mark = [], None
+    submitted_at = time.monotonic()
+    chunk_seconds = 0.0
+    chunks = chunked(items, LOAD_CHUNK_SIZE)
+    while True:
+        # Pulling a chunk runs the extract/decompress/transform stages nested in the parse stage
+        with timer.stage("parse"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        summary["rows"] += len(chunk)
+        mark = checkpoint.mark(len(chunk)) if checkpoint else None
+        chunk = coalesce_items(chunk)
+        with timer.stage("load"):
+            collect_batches(pending, summary)
+        if pending:
+            chunk_seconds = time.monotonic() - submitted_at
+        # Once items have failed, progress is no longer committed: a resumed load would skip them
+        if pending_mark and not summary["failed"]:
+            checkpoint.commit(pending_mark)
+        if remaining_time and remaining_time() < STOP_MARGIN_MS + chunk_seconds * CHUNK_TIME_FACTOR * 1000:
+            summary["completed"] = False
+            if checkpoint and summary["failed"]:
+                checkpoint.restart()
+            return summary
+        submitted_at = time.monotonic()
+        if read_limiter:
+            pending = [
+                write_executor.submit(write_changed_batch, batch, limiter, read_limiter)
+                for batch in chunked(chunk, BATCH_SIZE)
+            ]
+        else:
+            pending = [write_executor.submit(write_batch, batch, limiter) for batch in chunked(chunk, BATCH_SIZE)]
+        pending_mark = mark
+    with timer.stage("load"):
+        collect_batches(pending, summary)
+    if checkpoint:
+        if pending_mark and not summary["failed"]:
+            checkpoint.commit(pending_mark)
+        # With failed items the object is left to be loaded again from the start if the event is retried
+        if summary["failed"]:
+            checkpoint.restart()
+        else:
+            checkpoint.finish()
+    return summary
+
+def collect_batches(futures, summary):
+    """
+    Waits for submitted batches and folds their results into the load summary.
+    """
+    for future in futures:
+        result = future.result()
+        summary["written"] += result["written"]
+        summary["unchanged"] += result.get("unchanged", 0)
+        summary["retries"] += result["retries"]
+        summary["throttles"] += result["throttles"]
+        summary["conflicts"] += result.get("conflicts", 0)
+        if result["unprocessed"]:
+            summary["failed"] += len(result["unprocessed"])
+            summary["failed_batches"].append({
+                "keys": [item["EMPLOYEE_ID"] for item in result["unprocessed"]],
+                "error": result["error"]
+            })
+            log("ERROR", f"Error writing batch to DynamoDB ({len(result['unprocessed'])} items): {result['error']}")
+
+def coalesce_items(items):
+    """
+    Keeps only the last item for each EMPLOYEE_ID, since one BatchWriteItem call rejects duplicate keys.
+    """
+    return list({item["EMPLOYEE_ID"]: item for item in items}.values())
+
+def write_batch(items, limiter):
+    """
+    Writes up to 25 items with BatchWriteItem, paced by the limiter, retrying UnprocessedItems
+    and throttling errors with full-jitter exponential backoff.
+    """
+    requests = [{"PutRequest": {"Item": serialize_item(item)}} for item in items]
+    retries = 0
+    throttles = 0
+    error = None
+    for attempt in range(MAX_BATCH_ATTEMPTS):
+        if attempt:
+            retries += 1
+            time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+        limiter.acquire(len(requests))
+        try:
+            response = get_client(LOAD_CLIENT).batch_write_item(
+                RequestItems={TABLE_NAME: requests},
+                ReturnConsumedCapacity="TOTAL"
+            )
+        except Exception as e:
+            error = str(e)
+            if error_code(e) not in RETRYABLE_ERROR_CODES:
+                break
+            throttles += 1
+            limiter.on_throttle()
+            continue
+        unprocessed = response.get("UnprocessedItems", {}).get(TABLE_NAME, [])
+        consumed = sum(capacity.get("CapacityUnits", 0) for capacity in response.get("ConsumedCapacity", []))
+        limiter.charge(consumed - (len(requests) - len(unprocessed)))
+        limiter.on_success(len(requests) - len(unprocessed))
+        requests = unprocessed
+        if not requests:
+            return {"written": len(items), "unprocessed": [], "retries": retries, "throttles": throttles, "error": None}
+        # DynamoDB hands back UnprocessedItems when the table is throttling the batch
+        throttles += 1
+        limiter.on_throttle()
+        error = f"{len(requests)} items still unprocessed after {attempt + 1} attempts"
+    unprocessed = [deserialize_item(request["PutRequest"]["Item"]) for request in requests]
+    return {
+        "written": len(items) - len(unprocessed),
+        "unprocessed": unprocessed,
+        "retries": retries,
+        "throttles": throttles,
+        "error": error
+    }
+
+def row_digest(item):
+    """
+    Compact digest of an item's attributes (DIGEST_ATTRIBUTE excluded), used to spot unchanged rows.
+    """
+    content = "\x1f".join(f"{name}\x1e{item[name]}" for name in sorted(item) if name != DIGEST_ATTRIBUTE)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=DIGEST_SIZE).hexdigest()
+
+def read_digests(keys, limiter):
+    """
+    Reads the stored digests of up to 100 EMPLOYEE_IDs with BatchGetItem.
+    Returns {EMPLOYEE_ID: digest} for the keys that exist; items written without a digest map to None.
+    """
+    request = {TABLE_NAME: {
+        "Keys": [{"EMPLOYEE_ID": to_attribute(key)} for key in keys],
+        "ProjectionExpression": "EMPLOYEE_ID, #digest",
+        "ExpressionAttributeNames": {"#digest": DIGEST_ATTRIBUTE}
+    }}
+    digests = {}
+    for attempt in range(MAX_BATCH_ATTEMPTS):
+        if attempt:
+            time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+        count = len(request[TABLE_NAME]["Keys"])
+        limiter.acquire(count)
+        try:
+            response = get_client(LOAD_CLIENT).batch_get_item(RequestItems=request, ReturnConsumedCapacity="TOTAL")
+        except Exception as e:
+            if error_code(e) not in RETRYABLE_ERROR_CODES:
+                raise
+            limiter.on_throttle()
+            continue
+        for item in response.get("Responses", {}).get(TABLE_NAME, []):
+            digests[from_attribute(item["EMPLOYEE_ID"])] = item.get(DIGEST_ATTRIBUTE, {}).get("S")
+        consumed = sum(capacity.get("CapacityUnits", 0) for capacity in response.get("ConsumedCapacity", []))
+        limiter.charge(consumed * ITEMS_PER_READ_UNIT - count)
+        limiter.on_success(count)
+        request = response.get("UnprocessedKeys")
+        if not request:
+            return digests
+        limiter.on_throttle()
+    raise RuntimeError(f"Digests of {len(keys)} items could not be read after {MAX_BATCH_ATTEMPTS} attempts")
+
+def write_changed_batch(items, limiter, read_limiter):
+    """
+    Change-detection counterpart of write_batch. Stores a digest on every item, reads the digests
+    already stored for the batch's keys and writes only the items whose digest differs.
+    Each write is a PutItem conditioned on the digest that was read, so an item another writer
+    changed in the meantime is never overwritten blindly: the current digest returned by the failed
+    condition decides whether the item is now unchanged or is written again against it.
+    """
+    result = {"written": 0, "unchanged": 0, "unprocessed": [], "retries": 0, "throttles": 0, "conflicts": 0,
+              "error": None}
+    for item in items:
+        item[DIGEST_ATTRIBUTE] = row_digest(item)
+    try:
+        stored = read_digests([item["EMPLOYEE_ID"] for item in items], read_limiter)
+    except Exception as e:
+        result["unprocessed"] = items
+        result["error"] = f"Error reading stored digests: {e}"
+        return result
+    for item in items:
+        put_if_changed(item, stored, limiter, result)
+    return result
+
+def put_if_changed(item, stored, limiter, result):
+    """
+    Writes one item unless its digest matches the stored one, folding the outcome into `result`.
+    """
+    key = item["EMPLOYEE_ID"]
+    exists, expected = key in stored, stored.get(key)
+    error = None
+    for attempt in range(MAX_BATCH_ATTEMPTS):
+        if exists and expected == item[DIGEST_ATTRIBUTE]:
+            result["unchanged"] += 1
+            return
+        if error:  # Back off after throttling, not after a lost condition
+            result["retries"] += 1
+            time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+        condition = {"ConditionExpression": "attribute_not_exists(EMPLOYEE_ID)"}
+        if exists:
+            condition = {
+                "ConditionExpression": "#digest = :expected" if expected else "attribute_not_exists(#digest)",
+                "ExpressionAttributeNames": {"#digest": DIGEST_ATTRIBUTE}
+            }
+            if expected:
+                condition["ExpressionAttributeValues"] = {":expected": {"S": expected}}
+        limiter.acquire(1)
+        try:
+            get_client(LOAD_CLIENT).put_item(
+                TableName=TABLE_NAME,
+                Item=serialize_item(item),
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+                **condition
+            )
         except Exception as e:
-            print(f"Error converting COMMISSION_PCT: {e}")
-            commission_pct = Decimal("0")
-        
-        transformed_record = {
-            "EMPLOYEE_ID": item.get("EMPLOYEE_ID", "Unknown"),
-            "FIRST_NAME": item.get("FIRST_NAME", ""),
-            "LAST_NAME": item.get("LAST_NAME", ""),
-            "EMAIL": item.get("EMAIL", ""),
-            "PHONE_NUMBER": item.get("PHONE_NUMBER", ""),
-            "HIRE_DATE": item.get("HIRE_DATE", ""),
-            "JOB_ID": item.get("JOB_ID", ""),
-            "SALARY": salary,
-            "COMMISSION_PCT": commission_pct,
-            "MANAGER_ID": item.get("MANAGER_ID", ""),
-            "DEPARTMENT_ID": item.get("DEPARTMENT_ID", "")
-        }
-        records.append(transformed_record)
-    
-    return records
+            code = error_code(e)
+            if code == "ConditionalCheckFailedException":
+                # Another writer got there first; compare against what it stored (raw attribute values)
+                result["conflicts"] += 1
+                current = e.response.get("Item")
+                exists = current is not None
+                expected = (current or {}).get(DIGEST_ATTRIBUTE, {}).get("S")
+                error = None
+                continue
+            error = str(e)
+            if code not in RETRYABLE_ERROR_CODES:
+                break
+            result["throttles"] += 1
+            limiter.on_throttle()
+            continue
+        limiter.on_success(1)
+        result["written"] += 1
+        return
+    result["unprocessed"].append(item)
+    result["error"] = error or f"Item {key} kept changing under concurrent writes"
+
+def process_csv(lines, batch_size=None):
+    """
+    Lazily parses CSV lines into items using a converter compiled from EMPLOYEE_SCHEMA for the header.
+    With `batch_size`, rows are converted that many at a time, so the reader runs up to one batch
+    ahead of the item being handed out.
+    """
+    csv_reader = csv.reader(lines)
+    header = next(csv_reader, None)
+    if header is None:
+        return
+    rows = (row for row in csv_reader if row)  # csv.reader returns blank lines as empty rows
+
+    if not batch_size:
+        yield from map(EMPLOYEE_SCHEMA.compile_csv(header), rows)
+        return
+    convert_rows = EMPLOYEE_SCHEMA.compile_csv(header, batch=True)
+    for batch in chunked(rows, batch_size):
+        with timed_stage("transform"):
+            items = convert_rows(batch)
+        yield from items
+
+def process_ndjson(lines, batch_size=None):
+    """
+    Lazily parses newline-delimited JSON, one object per non-blank line.
+    Lines are only parsed as items are pulled (plus up to `batch_size` ahead), so the reader's byte
+    offset matches the last row handed out whenever the load stage marks a checkpoint.
+    """
+    return process_json((json.loads(line) for line in lines if not line.isspace()), batch_size)
+
+def process_json(data, batch_size=None):
+    """
+    Lazily converts parsed JSON objects into items using the converter compiled from EMPLOYEE_SCHEMA,
+    `batch_size` objects at a time if given.
+    """
+    convert_object = EMPLOYEE_SCHEMA.compile_json()
+    if not batch_size:
+        yield from map(convert_object, data)
+        return
+    for batch in chunked(data, batch_size):
+        with timed_stage("transform"):
+            items = list(map(convert_object, batch))
+        yield from items
+
+class DecimalCache(dict):
+    """
+    Parses the raw values of one decimal field, remembering each distinct value so it is only
+    parsed (and, if invalid, logged) once. Lookups of cached values run entirely in C.
+    """
+
+    def __init__(self, name, default, null_values):
+        super().__init__()
+        self.name = name
+        self.default = default
+        self.null_values = null_values
+
+    def __missing__(self, value):
+        if len(self) >= PARSE_CACHE_SIZE:
+            self.clear()
+        number = self[value] = self.parse(value)
+        return number
+
+    def __call__(self, value):
+        # Only strings are cached: JSON numbers are cheap to convert and True == 1 would share an entry
+        if type(value) is str:
+            return self[value]
+        return self.parse(value)
+
+    def parse(self, value):
+        text = "" if value is None else str(value).strip()
+        if text in self.null_values:
+            return self.default
+        try:
+            number = Decimal(text)
+        except ArithmeticError as e:
+            log("WARNING", f"Error converting {self.name} value '{text}': {e}")
+            return self.default
+        if not number.is_finite():  # DynamoDB rejects NaN and Infinity
+            log("WARNING", f"Error converting {self.name} value '{text}': not a finite number")
+            return self.default
+        return number
+
+class RecordSchema:
+    """
+    Declarative item layout, compiled into converters specialised for one input layout.
+    Compiling generates the source of a function that builds the item as a single dict display,
+    with column positions and defaults inlined, so a row costs one call and no per-field loop.
+    """
+
+    def __init__(self, fields, null_values=NULL_VALUES):
+        self.names = [name for name, _, _ in fields]
+        self.defaults = [default for _, _, default in fields]
+        self.parsers = []
+        for name, field_type, default in fields:
+            if field_type == "decimal":
+                self.parsers.append(DecimalCache(name, default, frozenset(null_values)))
+            elif field_type == "string":
+                self.parsers.append(None)
+            else:
+                raise ValueError(f"Unknown type {field_type!r} for field {name}")
+
+    def _build(self, values, argument, batch=False):
+        """
+        Compiles a converter returning {name: value expression} for `argument`, or a list of them in batch mode.
+        """
+        item = "{" + ", ".join(f"{name!r}: {value}" for name, value in zip(self.names, values)) + "}"
+        body = f"[{item} for {argument} in {argument}s]" if batch else item
+        namespace = {"defaults": self.defaults, "parsers": self.parsers}
+        exec(f"def convert({argument}{'s' if batch else ''}):\n    return {body}\n", namespace)
+        return namespace["convert"]
+
+    def _column_indices(self, header):
+        """
+        Maps each field to its column in the CSV header, or None if the column is missing.
+        """
+        columns = {column.strip().lstrip("\ufeff"): index for index, column in reversed(list(enumerate(header)))}
+        return [columns.get(name) for name in self.names]
+
+    def compile_csv(self, header, batch=False):
+        """
+        Returns a function converting one CSV row (a list of strings) laid out like `header` into an item,
+        or with `batch` a function converting a list of rows into a list of items.
+        Missing columns and the missing values of short rows take the field defaults.
+        """
+        indices = self._column_indices(header)
+        values = []
+        for position, index in enumerate(indices):
+            if index is None:
+                values.append(f"defaults[{position}]")
+            elif self.parsers[position] is not None:
+                values.append(f"parsers[{position}][row[{index}]]")
+            else:
+                values.append(f"row[{index}]")
+        convert_row = self._build(values, "row")
+
+        # Defaults by column, used to pad short rows
+        width = max([index + 1 for index in indices if index is not None], default=0)
+        padding = [""] * width
+        for position, index in enumerate(indices):
+            if index is not None:
+                padding[index] = self.defaults[position]
+
+        def convert_padded(row):
+            try:
+                return convert_row(row)
+            except IndexError:
+                return convert_row(row + padding[len(row):])
+
+        if not batch:
+            return convert_padded
+        convert_rows = self._build(values, "row", batch=True)
+
+        def convert_batch(rows):
+            try:
+                return convert_rows(rows)
+            except IndexError:
+                return [convert_padded(row) for row in rows]
+
+        return convert_batch
+
+    def compile_json(self):
+        """
+        Returns a function converting one parsed JSON object into an item; missing keys take their defaults.
+        """
+        values = []
+        for position, name in enumerate(self.names):
+            value = f"obj.get({name!r}, defaults[{position}])"
+            values.append(value if self.parsers[position] is None else f"parsers[{position}]({value})")
+        return self._build(values, "obj")
+
+EMPLOYEE_SCHEMA = RecordSchema(EMPLOYEE_FIELDS)
+
+# Provisioned concurrency and SnapStart run the init phase ahead of any event, so the clients are worth building there
+if PREWARM_CLIENTS:
+    for name in ("s3", "dynamodb", LOAD_CLIENT, "lambda"):
+        get_client(name)
@@ -0,0 +1,306 @@
+"""
+Drains LambdaFailureQueue, the failure destination lambda_destination.py configures, by running the
+original S3 events of failed invocations through the ETL again.
+
+Several receivers long-poll the queue for batches of 10 messages and hand the events to a bounded pool
+of workers, which invoke the deployed function (or run lambda_handler in-process with --local).
+Messages whose event loaded are deleted in batches; failed ones stay in the queue and come back after
+the visibility timeout, for a later run. Every redriven message is appended to the --progress file
+before it is deleted, so an interrupted redrive can be run again: messages already redriven are only
+deleted, not loaded twice. Objects that were loaded in full are skipped by the ETL's checkpoints anyway.
+
+The queue is also subscribed to LambdaSuccessTopic, so the success notifications in it are deleted
+without being redriven.
+
+    python redrive_failures.py
+    python redrive_failures.py --receivers 8 --workers 16 --max-messages 5000
+    python redrive_failures.py --local  # Needs the Lambda's S3 and DynamoDB permissions locally
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+
+# Queue and function set up by lambda_destination.py
+QUEUE_NAME = "LambdaFailureQueue"
+LAMBDA_FUNCTION_NAME = "S3ToDynamoDBLambda"
+
+# Redrive settings
+MAX_RECEIVE_BATCH = 10  # ReceiveMessage and DeleteMessageBatch take at most 10 messages per call
+RECEIVERS = 4  # Threads long-polling the queue
+WORKERS = 8  # Events redriven at the same time
+WAIT_SECONDS = 20  # Long-poll time; a receiver stops once a whole poll comes back empty
+VISIBILITY_TIMEOUT_SECONDS = 300  # Has to cover a batch waiting for workers plus its slowest load
+PROGRESS_FILE = "redrive-progress.jsonl"
+
+
+def original_event(body):
+    """
+    Returns the event of the failed invocation held in a message body, or None for a success record.
+    Records sent through the SNS topic arrive wrapped in an SNS notification. Raises ValueError,
+    KeyError or TypeError if the body is not an invocation record.
+    """
+    record = json.loads(body)
+    if record.get("Type") == "Notification":
+        record = json.loads(record["Message"])
+    if record["requestContext"].get("condition") == "Success":
+        return None
+    event = record["requestPayload"]
+    if not isinstance(event.get("Records"), list):
+        raise ValueError("requestPayload is not an S3 event")
+    return event
+
+
+def event_result(response):
+    """
+    Summarises a lambda_handler response as (succeeded, items written). An event succeeded if none of
+    its objects failed; objects still in progress were handed to a new invocation by the function.
+    """
+    results = response.get("results", {}).values()
+    failed = [result["key"] for result in results if result["status"] == "failed"]
+    return not failed, sum(result.get("written", 0) for result in results)
+
+
+def local_handler():
+    """
+    Returns a handler that runs events through lambda_handler in this process.
+    """
+    import lambda_function
+    return lambda event: event_result(lambda_function.lambda_handler(event, None))
+
+
+def invoking_handler(lambda_client, function_name):
+    """
+    Returns a handler that invokes the deployed function synchronously with each event.
+    """
+    def handle(event):
+        response = lambda_client.invoke(FunctionName=function_name, InvocationType="RequestResponse",
+                                        Payload=json.dumps(event))
+        payload = json.loads(response["Payload"].read() or b"{}")
+        if response.get("FunctionError"):
+            raise RuntimeError(payload.get("errorMessage", response["FunctionError"]))
+        return event_result(payload)
+    return handle
+
+
+class RedriveProgress:
+    """
+    Ids of the messages already redriven, kept in a JSON-lines file that survives an interrupted run.
+    SQS message ids stay the same across receives, unlike receipt handles.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry["status"] == "done":
+                        self.done.add(entry["message_id"])
+        self._file = open(path, "a") if path else None
+
+    def __contains__(self, message_id):
+        return message_id in self.done
+
+    def record(self, message_ids):
+        with self._lock:
+            self.done.update(message_ids)
+            if self._file:
+                self._file.writelines(json.dumps({"message_id": message_id, "status": "done"}) + "\n"
+                                      for message_id in message_ids)
+                self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+class RedriveStats:
+    """
+    Counters shared by the receivers, with the throughput of the run.
+    """
+
+    FIELDS = ("received", "redriven", "resumed", "success_records", "failed", "unreadable", "deleted",
+              "delete_failures", "items_written", "receive_calls", "delete_calls")
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self.counts[name] += value
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self.summary()
+
+    def summary(self):
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        return {
+            **self.counts,
+            "elapsed_s": round(elapsed, 3),
+            "messages_per_second": round(self.counts["received"] / elapsed, 1) if elapsed > 0 else 0.0,
+            "items_per_second": round(self.counts["items_written"] / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+def redrive(sqs_client, queue_url, handler, progress, receivers=RECEIVERS, workers=WORKERS,
+            wait_seconds=WAIT_SECONDS, visibility_timeout=VISIBILITY_TIMEOUT_SECONDS, max_messages=None,
+            stop=None):
+    """
+    Drains `queue_url` with `receivers` long-polling threads, running each message's event through
+    `handler` (event -> (succeeded, items written)) on at most `workers` threads. Returns the run's
+    RedriveStats summary. Stops once the queue is empty, after about `max_messages` messages, or when
+    `stop` (a threading.Event) is set; batches already received are finished and deleted first.
+    """
+    stats = RedriveStats()
+    stop = stop or threading.Event()
+    budget = {"left": max_messages}
+    budget_lock = threading.Lock()
+
+    def reserve():
+        with budget_lock:
+            if budget["left"] is None:
+                return MAX_RECEIVE_BATCH
+            count = min(MAX_RECEIVE_BATCH, budget["left"])
+            budget["left"] -= count
+            return count
+
+    def redrive_message(message):
+        """Returns (message, outcome, items written), outcome being a RedriveStats counter name."""
+        if message["MessageId"] in progress:
+            return message, "resumed", 0
+        try:
+            event = original_event(message["Body"])
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            print(f"⚠️ Unreadable message {message['MessageId']}, left in the queue: {e}")
+            return message, "unreadable", 0
+        if event is None:
+            return message, "success_records", 0
+        try:
+            succeeded, written = handler(event)
+        except Exception as e:
+            print(f"❌ Redrive of message {message['MessageId']} failed: {e}")
+            return message, "failed", 0
+        return message, "redriven" if succeeded else "failed", written
+
+    def delete(messages):
+        entries = [{"Id": str(index), "ReceiptHandle": message["ReceiptHandle"]}
+                   for index, message in enumerate(messages)]
+        try:
+            response = sqs_client.delete_message_batch(QueueUrl=queue_url, Entries=entries)
+            failures = response.get("Failed", [])
+        except Exception as e:
+            failures = entries
+            print(f"⚠️ Could not delete {len(entries)} messages, they will be deleted by a later run: {e}")
+        for failure in failures:
+            if "Code" in failure:
+                print(f"⚠️ Could not delete message {messages[int(failure['Id'])]['MessageId']}: {failure['Code']}")
+        stats.add(deleted=len(entries) - len(failures), delete_failures=len(failures), delete_calls=1)
+
+    def receive_loop(executor):
+        while not stop.is_set():
+            count = reserve()
+            if count == 0:
+                return
+            try:
+                response = sqs_client.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=count,
+                                                      WaitTimeSeconds=wait_seconds,
+                                                      VisibilityTimeout=visibility_timeout)
+            except Exception as e:
+                print(f"❌ ReceiveMessage failed, receiver stopped: {e}")
+                return
+            messages = response.get("Messages", [])
+            stats.add(receive_calls=1, received=len(messages))
+            if not messages:
+                return
+            if len(messages) < count and budget["left"] is not None:
+                with budget_lock:
+                    budget["left"] += count - len(messages)
+
+            outcomes = [future.result() for future in [executor.submit(redrive_message, message)
+                                                       for message in messages]]
+            finished = []
+            for message, outcome, written in outcomes:
+                stats.add(**{outcome: 1, "items_written": written})
+                if outcome in ("redriven", "resumed", "success_records"):
+                    finished.append(message)
+            # Recorded before deleting: a message redriven but not deleted is only deleted by the next run
+            progress.record([message["MessageId"] for message, outcome, _ in outcomes if outcome == "redriven"])
+            if finished:
+                delete(finished)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        threads = [threading.Thread(target=receive_loop, args=(executor,), daemon=True) for _ in range(receivers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            print("⏸️ Interrupted, finishing the batches already received...")
+            stop.set()
+            for thread in threads:
+                thread.join()
+    return stats.finish()
+
+
+def print_summary(summary):
+    print(f"Messages received:  {summary['received']} in {summary['receive_calls']} ReceiveMessage calls")
+    print(f"Events redriven:    {summary['redriven']} ({summary['items_written']} items written)")
+    print(f"Already redriven:   {summary['resumed']} (deleted only)")
+    print(f"Success records:    {summary['success_records']} (deleted only)")
+    print(f"Failed again:       {summary['failed']} (left in the queue)")
+    print(f"Unreadable:         {summary['unreadable']} (left in the queue)")
+    print(f"Deleted:            {summary['deleted']} in {summary['delete_calls']} DeleteMessageBatch calls, "
+          f"{summary['delete_failures']} not deleted")
+    print(f"Throughput:         {summary['messages_per_second']} messages/s, {summary['items_per_second']} items/s "
+          f"over {summary['elapsed_s']} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue-name", default=QUEUE_NAME)
+    parser.add_argument("--function-name", default=LAMBDA_FUNCTION_NAME, help="Function invoked with the events")
+    parser.add_argument("--local", action="store_true", help="Run lambda_handler in this process instead")
+    parser.add_argument("--receivers", type=int, default=RECEIVERS)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--wait-seconds", type=int, default=WAIT_SECONDS)
+    parser.add_argument("--visibility-timeout", type=int, default=VISIBILITY_TIMEOUT_SECONDS)
+    parser.add_argument("--max-messages", type=int, help="Stop after about this many messages")
+    parser.add_argument("--progress", default=PROGRESS_FILE, help="Progress file; reused to resume a redrive")
+    args = parser.parse_args()
+
+    sqs_client = get_client("sqs")
+    queue_url = sqs_client.get_queue_url(QueueName=args.queue_name)["QueueUrl"]
+    if args.local:
+        handler = local_handler()
+    else:
+        handler = invoking_handler(get_client("lambda"), args.function_name)
+    progress = RedriveProgress(args.progress)
+    if progress.done:
+        print(f"🔁 Resuming: {len(progress.done)} messages were already redriven ({args.progress})")
+    try:
+        summary = redrive(sqs_client, queue_url, handler, progress, receivers=args.receivers, workers=args.workers,
+                          wait_seconds=args.wait_seconds, visibility_timeout=args.visibility_timeout,
+                          max_messages=args.max_messages)
+    finally:
+        progress.close()
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
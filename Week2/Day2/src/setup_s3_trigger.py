@@ -1,8 +1,14 @@
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+
+# Direct trigger, one invocation per object; setup_sqs_trigger.py sets up the batched SQS alternative
 
 # AWS Clients
-s3_client = boto3.client('s3')
-lambda_client = boto3.client('lambda')
+s3_client = get_client('s3')
+lambda_client = get_client('lambda')
 
 # Your S3 Bucket and Lambda Function ARN
 BUCKET_NAME = "s3-bucket-lambda"
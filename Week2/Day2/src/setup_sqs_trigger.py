@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+
+# Alternative to setup_s3_trigger.py: S3 notifications go to an SQS queue and the Lambda drains it in batches,
+# so a burst of uploads costs a few invocations instead of one per object, and files the Lambda cannot
+# load are never delivered. Replaces the bucket's notification configuration, including the direct trigger.
+
+# AWS Clients
+s3_client = get_client('s3')
+sqs_client = get_client('sqs')
+lambda_client = get_client('lambda')
+
+# Your S3 Bucket, Lambda Function and queues
+BUCKET_NAME = "s3-bucket-lambda"
+LAMBDA_FUNCTION_NAME = "S3ToDynamoDBLambda"
+QUEUE_NAME = "S3ObjectCreatedQueue"
+DEAD_LETTER_QUEUE_NAME = "S3ObjectCreatedDLQ"  # Messages that kept failing, kept for inspection
+
+# Only keys under KEY_PREFIX with a format lambda_function.py can load are queued.
+# S3 rejects overlapping suffix filters, so ".json" also covers ".ndjson" (and ".json.gz" covers ".ndjson.gz").
+KEY_PREFIX = ""
+FORMAT_SUFFIXES = [".csv", ".json", ".jsonl"]
+COMPRESSION_SUFFIXES = ["", ".gz", ".gzip", ".zst", ".zstd"]
+
+# Batching settings
+BATCH_SIZE = 100  # Messages (one object each) per invocation
+MAX_BATCHING_WINDOW_SECONDS = 10  # How long Lambda waits to fill a batch during a burst
+MAX_CONCURRENCY = 5  # Concurrent invocations draining the queue, so bursts do not pile up on DynamoDB
+LAMBDA_TIMEOUT_SECONDS = 30  # Timeout set by deploy_lambda.py
+VISIBILITY_TIMEOUT_SECONDS = 6 * LAMBDA_TIMEOUT_SECONDS  # AWS recommends at least six times the function timeout
+MAX_RECEIVE_COUNT = 5  # Deliveries of a failing message before it moves to the dead-letter queue
+
+# STEP 1: Create the dead-letter queue and the queue S3 notifications are sent to
+dlq_url = sqs_client.create_queue(QueueName=DEAD_LETTER_QUEUE_NAME)["QueueUrl"]
+dlq_arn = sqs_client.get_queue_attributes(QueueUrl=dlq_url, AttributeNames=["QueueArn"])["Attributes"]["QueueArn"]
+queue_url = sqs_client.create_queue(QueueName=QUEUE_NAME)["QueueUrl"]
+queue_arn = sqs_client.get_queue_attributes(QueueUrl=queue_url, AttributeNames=["QueueArn"])["Attributes"]["QueueArn"]
+
+# Allow S3 to send this bucket's notifications to the queue
+queue_policy = {
+    "Version": "2012-10-17",
+    "Statement": [{
+        "Sid": "AllowS3ObjectCreatedNotifications",
+        "Effect": "Allow",
+        "Principal": {"Service": "s3.amazonaws.com"},
+        "Action": "sqs:SendMessage",
+        "Resource": queue_arn,
+        "Condition": {"ArnLike": {"aws:SourceArn": f"arn:aws:s3:::{BUCKET_NAME}"}}
+    }]
+}
+sqs_client.set_queue_attributes(
+    QueueUrl=queue_url,
+    Attributes={
+        "Policy": json.dumps(queue_policy),
+        "VisibilityTimeout": str(VISIBILITY_TIMEOUT_SECONDS),
+        "RedrivePolicy": json.dumps({"deadLetterTargetArn": dlq_arn, "maxReceiveCount": str(MAX_RECEIVE_COUNT)})
+    }
+)
+print(f"✅ SQS queue ready: {queue_arn} (dead-letter queue {dlq_arn})")
+
+# STEP 2: Send ObjectCreated notifications for loadable keys to the queue
+queue_configurations = []
+for format_suffix in FORMAT_SUFFIXES:
+    for compression_suffix in COMPRESSION_SUFFIXES:
+        suffix = format_suffix + compression_suffix
+        filter_rules = [{"Name": "suffix", "Value": suffix}]
+        if KEY_PREFIX:
+            filter_rules.append({"Name": "prefix", "Value": KEY_PREFIX})
+        queue_configurations.append({
+            "Id": f"QueueObjectCreated{suffix.replace('.', '-')}",
+            "QueueArn": queue_arn,
+            "Events": ["s3:ObjectCreated:*"],
+            "Filter": {"Key": {"FilterRules": filter_rules}}
+        })
+s3_client.put_bucket_notification_configuration(
+    Bucket=BUCKET_NAME,
+    NotificationConfiguration={"QueueConfigurations": queue_configurations}
+)
+print(f"✅ S3 notifications for {len(queue_configurations)} suffixes routed to {QUEUE_NAME} "
+      f"(the direct Lambda trigger of bucket {BUCKET_NAME} was replaced)")
+
+# STEP 3: Let the Lambda drain the queue in batches, reporting failures per message
+# (the function's role needs sqs:ReceiveMessage, sqs:DeleteMessage and sqs:GetQueueAttributes on the queue)
+mapping_settings = {
+    "BatchSize": BATCH_SIZE,
+    "MaximumBatchingWindowInSeconds": MAX_BATCHING_WINDOW_SECONDS,
+    "FunctionResponseTypes": ["ReportBatchItemFailures"],
+    "ScalingConfig": {"MaximumConcurrency": MAX_CONCURRENCY}
+}
+mappings = lambda_client.list_event_source_mappings(EventSourceArn=queue_arn, FunctionName=LAMBDA_FUNCTION_NAME)
+if mappings["EventSourceMappings"]:
+    lambda_client.update_event_source_mapping(UUID=mappings["EventSourceMappings"][0]["UUID"], **mapping_settings)
+    print(f"⚠️ Event source mapping from {QUEUE_NAME} to {LAMBDA_FUNCTION_NAME} already existed, settings updated")
+else:
+    lambda_client.create_event_source_mapping(
+        EventSourceArn=queue_arn,
+        FunctionName=LAMBDA_FUNCTION_NAME,
+        **mapping_settings
+    )
+    print(f"✅ Lambda {LAMBDA_FUNCTION_NAME} now drains {QUEUE_NAME} in batches of up to {BATCH_SIZE} messages")
@@ -1,7 +1,11 @@
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
 
 # Initialize the DMS client
-dms_client = boto3.client('dms')
+dms_client = get_client('dms')
 
 # Define configuration variables
 replication_instance_id = "mysql-postgre-rep-instance"
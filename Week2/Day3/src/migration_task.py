@@ -1,9 +1,13 @@
-import boto3
+import os
+import sys
 import json
-import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+from waiters import DMS_TASK_READY, wait  # noqa: E402
 
 # Initialize AWS DMS client
-dms_client = boto3.client('dms')
+dms_client = get_client('dms')
 
 # Define DMS Task Configuration
 replication_task_id = "mysql-postgre-migration"
@@ -46,22 +50,11 @@ try:
     print(f"DMS Replication Task '{replication_task_id}' has been created successfully.")
     print(f"Task ARN: {task_arn}")
 
-    # Wait for the task to reach 'ready' state before starting
-    while True:
-        task_status = dms_client.describe_replication_tasks(
-            Filters=[{"Name": "replication-task-arn", "Values": [task_arn]}]
-        )["ReplicationTasks"][0]["Status"]
-
-        print(f"Waiting for task to be ready. Current status: {task_status}")
-
-        if task_status in ["ready"]:
-            break  # Task is ready to start
-
-        elif task_status in ["creating"]:
-            time.sleep(10)  # Wait and check again
-
-        else:
-            raise Exception(f"Task cannot be started. Current Status: {task_status}")
+    # Wait for the task to reach 'ready' state before starting; any state but 'creating' on the way is an error
+    result = wait(DMS_TASK_READY, dms_client, task_arn,
+                  on_state=lambda arn, status: print(f"Waiting for task to be ready. Current status: {status}"))
+    if result["outcome"] != "success":
+        raise Exception(f"Task cannot be started. Current Status: {result['state']}")
 
     # Start the Replication Task
     dms_client.start_replication_task(
@@ -1,6 +1,10 @@
-import boto3
+import os
+import sys
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
+
 # AWS Configuration
 AWS_REGION = "us-east-1"
 DB_INSTANCE_IDENTIFIER = "rds-mysql-source"
@@ -13,7 +17,7 @@ ALLOCATED_STORAGE = 20  # 20GB Storage
 SECURITY_GROUP_ID = "sg-01be7c620263ea11f"
 
 # Create RDS client
-rds = boto3.client("rds", region_name=AWS_REGION)
+rds = get_client("rds", AWS_REGION)
 
 # Create the RDS instance
 try:
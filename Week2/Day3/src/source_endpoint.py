@@ -1,7 +1,11 @@
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
 
 # Initialize the AWS DMS client
-dms_client = boto3.client('dms')
+dms_client = get_client('dms')
 
 # Define configuration variables for the source endpoint (RDS MySQL)
 source_endpoint_id = "dms-mysql-source"
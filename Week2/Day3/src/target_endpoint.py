@@ -1,10 +1,14 @@
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))  # Repository root
+from aws_clients import get_client  # noqa: E402
 
 # AWS Configurations
 aws_region = "us-east-1"
 
 # DMS & PostgreSQL Details
-dms_client = boto3.client("dms", region_name=aws_region)
+dms_client = get_client("dms", aws_region)
 postgres_endpoint_identifier = "dms-postgre-target-endpoint"
 postgres_cluster_endpoint = "database-postgre.c2xmycgk2zok.us-east-1.rds.amazonaws.com"
 postgres_db_name = "mydatabase"
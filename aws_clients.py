@@ -0,0 +1,101 @@
+"""
+Shared boto3 clients for the scripts in this repository.
+
+get_client returns one client per (service, region, settings), built on first use from a single
+boto3 session and reused afterwards, so a script that uploads many files or runs many queries pays
+for the client (endpoint and model loading, credential lookup) and its TLS connections once.
+Clients are thread-safe once built; building them is not, so that happens under a lock.
+The connection pool is sized for the thread pools the scripts use, instead of botocore's 10.
+
+Scripts under WeekN/DayN/src put the repository root on sys.path to import it:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+    from aws_clients import get_client
+
+    s3_client = get_client("s3")
+    athena_client = get_client("athena", "us-east-1", read_timeout=120)
+"""
+import json
+import threading
+
+# Client settings (botocore.config.Config arguments); any of them can be overridden per client
+MAX_POOL_CONNECTIONS = 64  # Connections kept per client; covers sync_directory's 32 workers plus their part uploads
+RETRY_MODE = "standard"  # Retries throttling and transient errors with exponential backoff and jitter
+MAX_ATTEMPTS = 5  # Including the first attempt
+CONNECT_TIMEOUT_SECONDS = 5
+READ_TIMEOUT_SECONDS = 60
+
+session = None
+clients = {}  # (service, region, endpoint URL, settings) -> client
+resources = {}  # Same keys, for boto3 resources
+lock = threading.Lock()
+
+
+def client_config(**overrides):
+    """
+    Returns the botocore Config for a client, with `overrides` (Config arguments) applied.
+    """
+    from botocore.config import Config
+    settings = {
+        "max_pool_connections": MAX_POOL_CONNECTIONS,
+        "retries": {"mode": RETRY_MODE, "max_attempts": MAX_ATTEMPTS},
+        "connect_timeout": CONNECT_TIMEOUT_SECONDS,
+        "read_timeout": READ_TIMEOUT_SECONDS,
+        "tcp_keepalive": True
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+def get_session():
+    """
+    Returns the boto3 session all clients are built from, so credentials and service models are loaded once.
+    """
+    global session
+    if session is None:
+        with lock:
+            if session is None:
+                import boto3
+                session = boto3.session.Session()
+    return session
+
+
+def cached(cache, kind, service, region, endpoint_url, config):
+    boto_session = get_session()
+    key = (service, region or boto_session.region_name, endpoint_url, json.dumps(config, sort_keys=True))
+    value = cache.get(key)
+    if value is None:
+        with lock:  # Building clients from one session is not thread-safe
+            value = cache.get(key)
+            if value is None:
+                build = boto_session.client if kind == "client" else boto_session.resource
+                value = cache[key] = build(service, region_name=key[1], endpoint_url=endpoint_url,
+                                           config=client_config(**config))
+    return value
+
+
+def get_client(service, region=None, endpoint_url=None, **config):
+    """
+    Returns the shared low-level client for `service` in `region` (the session's default region if
+    None), building it on first use. `config` overrides the Config settings above, e.g.
+    max_pool_connections=100; each distinct set of settings gets its own client.
+    """
+    return cached(clients, "client", service, region, endpoint_url, config)
+
+
+def get_resource(service, region=None, endpoint_url=None, **config):
+    """
+    Returns the shared boto3 resource for `service`, like get_client.
+    """
+    return cached(resources, "resource", service, region, endpoint_url, config)
+
+
+def clear_clients():
+    """
+    Drops the cached clients, resources and session, e.g. after changing credentials.
+    """
+    global session
+    with lock:
+        clients.clear()
+        resources.clear()
+        session = None
@@ -0,0 +1,162 @@
+"""
+Benchmarks athena_executor.py against running Athena queries one after another, the way Athena.py
+did, with LocalAthena of common.py standing in for Athena. Time is scaled by --time-scale: query
+durations and poll intervals are simulated seconds, reported unscaled.
+
+A reporting job: a database DDL, a table DDL depending on it, and --queries SELECTs on the table,
+each lasting 5 to --max-query-seconds seconds.
+
+- sequential: start a query, poll get_query_execution every 2 s until it finishes, then the next one
+- executor: run_queries with --concurrency queries at a time, polled together
+
+Checks: every query succeeds; no SELECT starts before the table DDL finished; no more than
+--concurrency queries run at once; the executor finishes within the DDLs plus the SELECTs' total
+over the limit and the slowest SELECT, with fewer status calls. Then a failing DDL leaves the queries
+on it SKIPPED, queries throttled by Athena's quota are retried until they run, and a query whose
+wait fails is stopped on Athena.
+
+    python benchmarks/bench_athena_executor.py --queries 60 --concurrency 20
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from common import LocalAthena, add_src_path, scaled_waiter
+
+add_src_path("Week2/Day1/src")
+import athena_executor  # noqa: E402
+import waiters  # noqa: E402
+
+OUTPUT = "s3://athena-executor-bench/results/"
+
+
+def report_job(queries):
+    """The job's queries, as run_queries takes them: two DDLs, then the SELECTs."""
+    job = [{"name": "database", "sql": "CREATE DATABASE IF NOT EXISTS reports;"},
+           {"name": "table", "sql": "CREATE EXTERNAL TABLE IF NOT EXISTS reports.employees (...);",
+            "database": "reports", "depends_on": ["database"]}]
+    job += [{"name": f"report-{i}", "sql": f"SELECT department_id, COUNT(*) FROM employees WHERE job = {i};",
+             "database": "reports", "depends_on": ["table"]} for i in range(queries)]
+    return job
+
+
+def sequential(athena, job, time_scale):
+    """Each query started after the one before it finished, polled every 2 s."""
+    for query in job:
+        query_id = athena.start_query_execution(QueryString=query["sql"],
+                                                ResultConfiguration={"OutputLocation": OUTPUT})["QueryExecutionId"]
+        while athena.get_query_execution(QueryExecutionId=query_id)["QueryExecution"]["Status"]["State"] == "RUNNING":
+            time.sleep(2 * time_scale)
+
+
+async def run_executor(athena, job, concurrency, time_scale):
+    engine = waiters.WaiterEngine(coalesce=athena_executor.POLL_COALESCE_SECONDS * time_scale)
+    executor = athena_executor.AthenaExecutor(athena, OUTPUT, concurrency, engine=engine,
+                                              waiter=scaled_waiter(waiters.ATHENA_QUERY, time_scale))
+    for query in job:
+        executor.submit(query["sql"], query.get("database", "default"), query["name"], query.get("depends_on", ()))
+    await asyncio.gather(*executor.tasks.values())
+    return executor.results, executor.stats()
+
+
+def most_at_once(intervals):
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    running = most = 0
+    for _, change in events:
+        running += change
+        most = max(most, running)
+    return most
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--max-query-seconds", type=float, default=60.0)
+    parser.add_argument("--concurrency", type=int, default=athena_executor.ATHENA_CONCURRENCY)
+    parser.add_argument("--time-scale", type=float, default=0.01, help="Real seconds per simulated second")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    job = report_job(args.queries)
+    durations = {query["sql"]: rng.uniform(5, args.max_query_seconds) for query in job}
+    durations[job[0]["sql"]] = durations[job[1]["sql"]] = 1.0  # DDL is quick
+
+    print(f"{len(job)} queries of up to {args.max_query_seconds:.0f} s, {sum(durations.values()):.0f} s in total; "
+          f"time scale {args.time_scale}")
+    print(f"{'case':<12} {'seconds':>8} {'status calls':>13} {'most at once':>13}")
+    athena = LocalAthena(durations.get, args.time_scale)
+    started = time.perf_counter()
+    sequential(athena, job, args.time_scale)
+    sequential_s = (time.perf_counter() - started) / args.time_scale
+    sequential_calls = athena.requests["GetQueryExecution"]
+    print(f"{'sequential':<12} {sequential_s:>8.0f} {sequential_calls:>13} "
+          f"{most_at_once(athena.intervals()):>13}")
+
+    athena = LocalAthena(durations.get, args.time_scale)
+    started = time.perf_counter()
+    results, stats = asyncio.run(run_executor(athena, job, args.concurrency, args.time_scale))
+    executor_s = (time.perf_counter() - started) / args.time_scale
+    at_once = most_at_once(athena.intervals())
+    print(f"{'executor':<12} {executor_s:>8.0f} {stats['status_calls']:>13} {at_once:>13}")
+    print(f"Executor: {sequential_s / executor_s:.1f}x faster, {sequential_calls / stats['status_calls']:.0f}x fewer "
+          f"status calls")
+
+    check(all(result["state"] == "SUCCEEDED" for result in results.values()), f"not every query succeeded: {stats}")
+    table_end = athena.queries[results["table"]["query_id"]]["end"]
+    check(all(athena.queries[result["query_id"]]["start"] >= table_end for name, result in results.items()
+              if name.startswith("report-")), "a SELECT started before the table DDL finished")
+    check(at_once <= args.concurrency, f"{at_once} queries ran at once, the limit is {args.concurrency}")
+    # Each query holds its slot for its duration plus at most a 2 s poll interval; started greedily, the
+    # SELECTs finish within their total over the limit plus the slowest one, after the two DDLs
+    selects = [durations[query["sql"]] + 2 for query in job[2:]]
+    bound = 2 * (1 + 2) + sum(selects) / args.concurrency + max(selects)
+    check(executor_s <= bound, f"the executor took {executor_s:.0f} s, expected at most {bound:.0f} s")
+    check(stats["status_calls"] < sequential_calls, f"the executor made {stats['status_calls']} status calls, "
+          f"sequential polling {sequential_calls}")
+
+    # A failing DDL: the queries on it are not started
+    athena = LocalAthena(lambda sql: 1.0, args.time_scale)
+    job = [{"name": "table", "sql": "CREATE TABLE broken (...) -- FAIL"},
+           *[{"name": f"on-table-{i}", "sql": f"SELECT {i} FROM broken;", "depends_on": ["table"]} for i in range(3)],
+           {"name": "independent", "sql": "SELECT 1;"}]
+    results, _ = asyncio.run(run_executor(athena, job, args.concurrency, args.time_scale))
+    athena_executor.print_results(results)
+    check(results["table"]["state"] == "FAILED" and results["table"]["error"], "the failing DDL did not fail")
+    check(all(results[f"on-table-{i}"]["state"] == "SKIPPED" for i in range(3)), "a query on the failed DDL ran")
+    check(results["independent"]["state"] == "SUCCEEDED", "the independent query did not run")
+    check(len(athena.queries) == 2, f"{len(athena.queries)} queries started, expected 2")
+
+    # Athena's quota below the executor's limit: throttled starts are retried
+    athena = LocalAthena(lambda sql: 20.0, args.time_scale, quota=4)
+    results = athena_executor.run_queries([{"sql": f"SELECT {i};"} for i in range(12)], athena, OUTPUT, concurrency=8)
+    check(all(result["state"] == "SUCCEEDED" for result in results.values()), "a throttled query did not run")
+    check(athena.requests.get("TooManyRequestsException", 0) > 0, "Athena never throttled a start")
+    print(f"Throttling: 12 queries succeeded after {athena.requests['TooManyRequestsException']} throttled starts")
+
+    # A wait that fails: the query is stopped rather than left running, and its slot is freed
+    def lost(client, query_ids):
+        raise LookupError("Query executions lost")
+
+    async def run_lost():
+        executor = athena_executor.AthenaExecutor(athena, OUTPUT, 1, waiter=waiters.Waiter(
+            "lost", lost, success={"SUCCEEDED"}, batch_size=50, backoff=waiters.Backoff(0.01, 1.5, 0.05)))
+        return await asyncio.gather(*[executor.submit(f"SELECT {i};") for i in range(2)])
+
+    athena = LocalAthena(lambda sql: 600.0, args.time_scale)
+    results = asyncio.run(run_lost())
+    check(all(result["state"] == "FAILED" for result in results), "a query whose wait failed was not reported FAILED")
+    check(athena.requests.get("StopQueryExecution", 0) == 2 and
+          all(query["state"] == "CANCELLED" for query in athena.queries.values()),
+          "a query whose wait failed was left running on Athena")
+    print("✅ Queries ran side by side within the limit, in dependency order, polled in batches")
+
+
+if __name__ == "__main__":
+    main()
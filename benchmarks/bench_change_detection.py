@@ -0,0 +1,87 @@
+"""
+Loads the same employee file twice, the second time with a few changed rows, with and without
+change detection, and reports how many items each pass wrote versus skipped.
+
+Run it against a local DynamoDB stand-in (DynamoDB Local, LocalStack...):
+
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 AWS_DEFAULT_REGION=us-east-1 \
+        python benchmarks/bench_change_detection.py --rows 20000 --changed 50
+"""
+import argparse
+import contextlib
+import os
+import random
+import threading
+import time
+
+from common import EMPLOYEE_HEADER, add_src_path, employee_csv_line, ensure_table
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+def employee_lines(rows, seed):
+    rng = random.Random(seed)
+    return [EMPLOYEE_HEADER] + [employee_csv_line(i, rng) for i in range(1, rows + 1)]
+
+
+def change_rows(lines, count, seed):
+    """Returns a copy of the file with `count` rows given a new salary."""
+    rng = random.Random(seed)
+    lines = list(lines)
+    for index in rng.sample(range(1, len(lines)), count):
+        values = lines[index].rstrip("\n").split(",")
+        values[7] = str(int(values[7]) + 100)
+        lines[index] = ",".join(values) + "\n"
+    return lines
+
+
+def load(lines, read_limiter, requests):
+    requests.clear()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        summary = lambda_function.load_items(lambda_function.process_csv(iter(lines)),
+                                             lambda_function.WriteRateLimiter(None), read_limiter=read_limiter)
+    return summary, time.perf_counter() - start, dict(requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--changed", type=int, default=50, help="Rows changed between the two loads")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    ensure_table(lambda_function.get_client("dynamodb"), lambda_function.TABLE_NAME, "EMPLOYEE_ID")
+    client = lambda_function.get_client(lambda_function.LOAD_CLIENT)  # The one load_items sends its requests with
+
+    # Count the write and read requests sent, and the items in them
+    requests = {}
+    lock = threading.Lock()
+
+    def count(operation, size):
+        def handler(params, **kwargs):
+            with lock:
+                requests[operation] = requests.get(operation, 0) + 1
+                requests[operation + " items"] = requests.get(operation + " items", 0) + size(params)
+        return handler
+
+    table = lambda_function.TABLE_NAME
+    for operation, size in [
+        ("BatchWriteItem", lambda params: len(params["RequestItems"][table])),
+        ("BatchGetItem", lambda params: len(params["RequestItems"][table]["Keys"])),
+        ("PutItem", lambda params: 1),
+    ]:
+        client.meta.events.register(f"provide-client-params.dynamodb.{operation}", count(operation, size))
+
+    original = employee_lines(args.rows, args.seed)
+    updated = change_rows(original, args.changed, args.seed)
+    for label, read_limiter in [("all items", None), ("change detection", lambda_function.WriteRateLimiter(None))]:
+        load(original, read_limiter, requests)  # First load, so the second one sees stored items (and digests)
+        summary, elapsed, sent = load(updated, read_limiter, requests)
+        print(f"{label:<17} {elapsed:6.2f} s  written {summary['written']:>7}  unchanged {summary['unchanged']:>7}  "
+              f"requests {sent}")
+
+
+if __name__ == "__main__":
+    main()
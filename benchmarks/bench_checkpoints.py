@@ -0,0 +1,153 @@
+"""
+Checks the ETL Lambda's checkpointed loads, with lambda_handler run in-process against the local
+stand-ins from common.py. Each invocation is given time for --chunks-per-invocation chunks of
+LOAD_CHUNK_SIZE rows, and the continuations it queues are run until the object is loaded.
+
+- resumed: a --rows row CSV loaded over several invocations; every row ends up in the table and
+  the checkpoint is complete
+- failed writes: a batch fails in the first invocation, before its deadline; the object is reported
+  failed, not continued, and its checkpoint starts over, so retrying the event loads every row
+- failing checkpoint: every checkpoint save fails; the object is reported failed instead of
+  re-invoking itself from the same stale checkpoint
+
+    python benchmarks/bench_checkpoints.py --rows 20000 --chunks-per-invocation 5
+"""
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import time
+
+from bench_pipeline import BUCKET, prepare_inputs
+from common import LocalDynamoDBClient, LocalFileS3, LocalS3Error, QueueingLambdaClient, add_src_path, s3_event
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+class ChunkBudgetContext:
+    """Lambda context whose remaining time runs out after `chunks` deadline checks of load_items."""
+
+    function_name = "S3ToDynamoDBLambda"
+    invoked_function_arn = f"arn:aws:lambda:us-east-1:000000000000:function:{function_name}"
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def get_remaining_time_in_millis(self):
+        self.chunks -= 1
+        return 900000 if self.chunks >= 0 else 0
+
+
+class FailingDynamoDBClient(LocalDynamoDBClient):
+    """LocalDynamoDBClient rejecting batch writes of the keys in `failing_keys` and, if set, checkpoint saves."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failing_keys = set()
+        self.failing_checkpoints = False
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        for request in RequestItems.get(lambda_function.TABLE_NAME, []):
+            if request["PutRequest"]["Item"]["EMPLOYEE_ID"]["S"] in self.failing_keys:
+                raise LocalS3Error("ValidationException", "Item rejected by the bench")
+        return super().batch_write_item(RequestItems, **kwargs)
+
+    def put_item(self, TableName, Item, **kwargs):
+        if self.failing_checkpoints and TableName == lambda_function.CHECKPOINT_TABLE_NAME:
+            raise LocalS3Error("ThrottlingException", "Rate of requests exceeds the allowed throughput")
+        return super().put_item(TableName, Item, **kwargs)
+
+
+def stand_ins(files):
+    lambda_function.clients["s3"] = s3 = LocalFileS3(files)
+    lambda_function.clients["dynamodb"] = dynamodb = FailingDynamoDBClient(
+        {lambda_function.TABLE_NAME: "EMPLOYEE_ID", lambda_function.CHECKPOINT_TABLE_NAME: "OBJECT_ID"})
+    lambda_function.clients[lambda_function.LOAD_CLIENT] = dynamodb
+    lambda_function.clients["lambda"] = lambda_client = QueueingLambdaClient()
+    return s3, dynamodb, lambda_client
+
+
+def load(event, lambda_client, chunks_per_invocation, max_invocations):
+    """Runs the event and the continuations it queues; returns each invocation's result."""
+    results = []
+    events = [event]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        while events and len(results) < max_invocations:
+            response = lambda_function.lambda_handler(events.pop(0), ChunkBudgetContext(chunks_per_invocation))
+            results.append(next(iter(response["results"].values())))
+            events.extend(lambda_client.queued)
+            lambda_client.queued.clear()
+    return results
+
+
+def checkpoint(dynamodb, key):
+    item = dynamodb.tables.get(lambda_function.CHECKPOINT_TABLE_NAME, {}).get(json.dumps({"S": f"{BUCKET}/{key}"}))
+    return lambda_function.deserialize_item(item) if item else {}
+
+
+def loaded_ids(dynamodb):
+    return {json.loads(key)["S"] for key in dynamodb.tables.get(lambda_function.TABLE_NAME, {})}
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--chunks-per-invocation", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "etl-pipeline-bench"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    files = prepare_inputs(args.data_dir, "csv", args.rows, 1, args.seed)
+    key = next(iter(files))
+    all_ids = {str(employee_id) for employee_id in range(1, args.rows + 1)}
+    chunks = -(-args.rows // lambda_function.LOAD_CHUNK_SIZE)
+    expected_invocations = -(-chunks // args.chunks_per_invocation)
+    lambda_function.create_write_limiter = lambda: lambda_function.WriteRateLimiter(None)
+    print(f"{args.rows} rows in {chunks} chunks, {args.chunks_per_invocation} chunks per invocation")
+
+    s3, dynamodb, lambda_client = stand_ins(files)
+    started = time.perf_counter()
+    results = load(s3_event(BUCKET, key, s3.etag(key)), lambda_client, args.chunks_per_invocation, chunks + 2)
+    print(f"resumed: {len(results)} invocations in {time.perf_counter() - started:.2f} s, "
+          f"{', '.join(result['status'] for result in results)}")
+    check([result["status"] for result in results] == ["in_progress"] * (expected_invocations - 1) + ["success"],
+          f"resumed: expected {expected_invocations} invocations, got {[result['status'] for result in results]}")
+    check(loaded_ids(dynamodb) == all_ids, f"resumed: {len(loaded_ids(dynamodb))} of {args.rows} rows loaded")
+    check(checkpoint(dynamodb, key).get("STATUS") == "complete", "resumed: the checkpoint is not complete")
+
+    # Failed writes: a key of the second chunk is rejected, the deadline comes two chunks later
+    s3, dynamodb, lambda_client = stand_ins(files)
+    lost_id = str(lambda_function.LOAD_CHUNK_SIZE + 1)
+    dynamodb.failing_keys = {lost_id}
+    event = s3_event(BUCKET, key, s3.etag(key))
+    results = load(event, lambda_client, args.chunks_per_invocation, chunks + 2)
+    print(f"failed writes: {', '.join(result['status'] for result in results)}, {results[0]['failed']} items failed, "
+          f"checkpoint at row {checkpoint(dynamodb, key).get('ROWS_DONE')}")
+    check(len(results) == 1 and results[0]["status"] == "failed" and results[0]["failed"],
+          f"failed writes: the object was reported {[result['status'] for result in results]}")
+    check(checkpoint(dynamodb, key).get("ROWS_DONE") == 0, "failed writes: the checkpoint skips the failed rows")
+    dynamodb.failing_keys.clear()
+    results = load(event, lambda_client, args.chunks_per_invocation, chunks + 2)
+    check(results[-1]["status"] == "success" and loaded_ids(dynamodb) == all_ids,
+          f"failed writes: retrying the event left {len(all_ids - loaded_ids(dynamodb))} rows missing")
+
+    # Every checkpoint save fails: progress cannot be resumed, so the object must not re-invoke itself
+    s3, dynamodb, lambda_client = stand_ins(files)
+    dynamodb.failing_checkpoints = True
+    results = load(s3_event(BUCKET, key, s3.etag(key)), lambda_client, args.chunks_per_invocation, chunks + 2)
+    print(f"failing checkpoint: {', '.join(result['status'] for result in results)} ({results[-1]['error']})")
+    check(len(results) == 1 and results[0]["status"] == "failed",
+          f"failing checkpoint: the object ran {len(results)} invocations, {results[-1]['status']}")
+    print("✅ Resumed loads wrote every row; failed writes and lost checkpoints were reported, not skipped")
+
+
+if __name__ == "__main__":
+    main()
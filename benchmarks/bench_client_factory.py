@@ -0,0 +1,166 @@
+"""
+Measures what aws_clients.py saves: building a boto3 client for every call, the way the scripts used
+to, against reusing the cached client, and the TLS connections each approach opens.
+
+Construction: --constructions calls of boto3.client() against the same number of get_client() calls.
+
+Connections: --waves waves of --threads concurrent DynamoDB ListTables calls, the way the scripts
+fan out a batch of uploads or queries and wait for it, against a local HTTPS endpoint (a self-signed
+certificate made with openssl, HTTP/1.1 keep-alive) that counts the TLS handshakes it accepts.
+--latency seconds are added to every response.
+
+- per-call: a new client for every operation, so every operation pays for a client and a handshake
+- default-pool: one client with botocore's default Config, whose pool keeps 10 connections; at the end
+  of every wave the connections beyond those 10 are closed, and the next wave opens them again
+- factory: get_client with the pool sized by aws_clients.py
+
+    python benchmarks/bench_client_factory.py --waves 100 --threads 32
+"""
+import argparse
+import json
+import logging
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import add_src_path
+
+add_src_path("")
+import aws_clients  # noqa: E402
+
+REGION = "us-east-1"
+
+
+class DynamoDBHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so a client can reuse its connections
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = json.dumps({"TableNames": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.0")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalTLSServer(ThreadingHTTPServer):
+    """HTTPS server that counts handshakes; each one runs on the connection's own thread."""
+    daemon_threads = True
+
+    def __init__(self, context, latency):
+        super().__init__(("127.0.0.1", 0), DynamoDBHandler)
+        self.context = context
+        self.latency = latency
+        self.handshakes = 0
+        self.lock = threading.Lock()
+
+    def finish_request(self, request, client_address):
+        try:
+            request = self.context.wrap_socket(request, server_side=True)
+        except (ssl.SSLError, OSError):
+            return
+        with self.lock:
+            self.handshakes += 1
+        super().finish_request(request, client_address)
+
+
+def self_signed_certificate(directory):
+    """Writes a certificate for 127.0.0.1 and its key, and returns their paths."""
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=localhost", "-addext", "subjectAltName=IP:127.0.0.1",
+                    "-keyout", key, "-out", cert], check=True, capture_output=True)
+    return cert, key
+
+
+def time_construction(count):
+    import boto3
+    start = time.perf_counter()
+    for _ in range(count):
+        boto3.client("dynamodb", region_name=REGION)
+    per_call = time.perf_counter() - start
+    aws_clients.clear_clients()
+    start = time.perf_counter()
+    for _ in range(count):
+        aws_clients.get_client("dynamodb", REGION)
+    return per_call, time.perf_counter() - start
+
+
+def run_case(case, endpoint_url, waves, threads):
+    import boto3
+    if case == "per-call":
+        def operation():
+            boto3.client("dynamodb", region_name=REGION, endpoint_url=endpoint_url).list_tables()
+    else:
+        client = boto3.client("dynamodb", region_name=REGION, endpoint_url=endpoint_url) if case == "default-pool" \
+            else aws_clients.get_client("dynamodb", REGION, endpoint_url)
+
+        def operation():
+            client.list_tables()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in range(waves):
+            for future in [executor.submit(operation) for _ in range(threads)]:
+                future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--constructions", type=int, default=200)
+    parser.add_argument("--waves", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every response")
+    parser.add_argument("--cases", nargs="+", default=["per-call", "default-pool", "factory"])
+    args = parser.parse_args()
+
+    # Dummy credentials, so no client looks for real ones; the local endpoint does not check signatures
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+    logging.getLogger("urllib3.connectionpool").setLevel(logging.ERROR)  # "Connection pool is full" warnings
+
+    per_call, cached = time_construction(args.constructions)
+    print(f"{args.constructions} clients: boto3.client {per_call:.2f} s ({per_call / args.constructions * 1000:.1f} ms "
+          f"each), get_client {cached * 1000:.1f} ms ({cached / args.constructions * 1e6:.1f} us each)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = self_signed_certificate(directory)
+        os.environ["AWS_CA_BUNDLE"] = cert
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server = LocalTLSServer(context, args.latency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        endpoint_url = f"https://127.0.0.1:{server.server_address[1]}"
+
+        operations = args.waves * args.threads
+        print(f"{args.waves} waves of {args.threads} concurrent ListTables calls, "
+              f"{args.latency * 1000:.0f} ms per response")
+        print(f"{'case':<13} {'seconds':>8} {'calls/s':>9} {'handshakes':>11}")
+        results = {}
+        for case in args.cases:
+            aws_clients.clear_clients()
+            server.handshakes = 0
+            elapsed = run_case(case, endpoint_url, args.waves, args.threads)
+            results[case] = server.handshakes
+            print(f"{case:<13} {elapsed:>8.2f} {operations / elapsed:>9.1f} {server.handshakes:>11}")
+        server.shutdown()
+
+    if "factory" in results and results["factory"] > args.threads:
+        raise SystemExit(f"❌ The factory client opened {results['factory']} connections for {args.threads} threads")
+    print("✅ The factory client opened at most one connection per thread")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Measures what a cold start of the ETL Lambda costs before it reads its first object: importing
+lambda_function, the first handler call on an event without records, and building the S3, DynamoDB
+and Lambda clients the first record needs.
+
+Every run is a fresh interpreter started with `python -X importtime`, so nothing is shared between
+runs; the medians of --runs runs are reported, with the slowest imports from the importtime report.
+Modes:
+
+- lazy: the default, clients and boto3 are loaded on first use
+- prewarm: PREWARM_CLIENTS=1, the clients are built while the module is imported
+- baseline: lambda_function.py from another git revision, e.g. the one with module-level clients
+
+    python benchmarks/bench_cold_start.py --runs 20
+    python benchmarks/bench_cold_start.py --baseline 3df2b1f --json cold_start.json
+
+No AWS endpoint is needed. Credentials are blanked, so a DescribeTable call made by an empty event
+fails at once instead of going to the network. Results from a laptop are far below a 128 MB Lambda,
+which gets a fraction of a vCPU; compare modes and revisions rather than absolute numbers.
+"""
+import argparse
+import json
+import os
+import py_compile
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import REPO_ROOT
+
+LAMBDA_SOURCE = "Week2/Day2/src/lambda_function.py"
+PROBE_MARKER = "-- cold start probe --"
+
+# Runs in the fresh interpreter; its own imports come before the marker so they are not counted
+PROBE = f"""
+import contextlib, io, json, resource, sys, time
+sys.stderr.write({PROBE_MARKER!r} + "\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+import lambda_function
+imported = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    lambda_function.lambda_handler({{"Records": []}}, None)
+handled = time.perf_counter()
+boto3_loaded = "boto3" in sys.modules
+get_client = getattr(lambda_function, "get_client", None)
+if get_client:
+    for name in ("s3", "dynamodb", getattr(lambda_function, "LOAD_CLIENT", "dynamodb"), "lambda"):
+        get_client(name)
+ready = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "empty_event_ms": (handled - imported) * 1000,
+    "clients_ms": (ready - handled) * 1000,
+    "total_ms": (ready - start) * 1000,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "boto3_after_empty_event": boto3_loaded,
+}}))
+"""
+
+
+def probe_environment(prewarm):
+    env = {name: value for name, value in os.environ.items() if not name.startswith("AWS_")}
+    env.update(
+        AWS_DEFAULT_REGION="us-east-1",
+        AWS_SHARED_CREDENTIALS_FILE=os.devnull,
+        AWS_CONFIG_FILE=os.devnull,
+        AWS_EC2_METADATA_DISABLED="true",
+        LOG_LEVEL="ERROR",
+        PYTHONDONTWRITEBYTECODE="1",
+    )
+    env.pop("PYTHONPATH", None)
+    if prewarm:
+        env["PREWARM_CLIENTS"] = "1"
+    return env
+
+
+def parse_importtime(stderr, max_depth=1):
+    """Returns {module: cumulative ms} for the imports after the probe marker, nested at most `max_depth` deep."""
+    imports = {}
+    lines = stderr.splitlines()
+    if PROBE_MARKER in lines:
+        lines = lines[lines.index(PROBE_MARKER) + 1:]
+    for line in lines:
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # importtime indents nested imports by two spaces
+        if depth <= max_depth:
+            imports[name.strip()] = imports.get(name.strip(), 0) + int(cumulative) / 1000
+    return imports
+
+
+def run_mode(module_dir, prewarm, runs):
+    """Runs the probe `runs` times (after one warm-up of the OS file cache) and returns the samples."""
+    samples, imports = [], []
+    for run in range(runs + 1):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE], cwd=module_dir, env=probe_environment(prewarm),
+            capture_output=True, text=True, check=True
+        )
+        if run:
+            samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+            imports.append(parse_importtime(completed.stderr))
+    return samples, imports
+
+
+def prepare_module(directory, source, bytecode):
+    """Copies lambda_function.py into `directory`, with its bytecode unless the package ships source only."""
+    target = os.path.join(directory, "lambda_function.py")
+    with open(target, "wb") as f:
+        f.write(source)
+    if bytecode:
+        py_compile.compile(target, invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH, doraise=True)
+    return directory
+
+
+def git_source(revision):
+    return subprocess.run(["git", "show", f"{revision}:{LAMBDA_SOURCE}"], cwd=REPO_ROOT,
+                          capture_output=True, check=True).stdout
+
+
+def summarize(samples, imports, top):
+    summary = {name: statistics.median(sample[name] for sample in samples)
+               for name in ("import_ms", "empty_event_ms", "clients_ms", "total_ms", "peak_rss_mb")}
+    summary["boto3_after_empty_event"] = any(sample["boto3_after_empty_event"] for sample in samples)
+    modules = {name for run in imports for name in run}
+    medians = {name: statistics.median(run.get(name, 0) for run in imports) for name in modules}
+    summary["slowest_imports_ms"] = dict(sorted(medians.items(), key=lambda entry: -entry[1])[:top])
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--baseline", metavar="REVISION", help="Also measure lambda_function.py at this git revision")
+    parser.add_argument("--no-bytecode", action="store_true",
+                        help="Import lambda_function from source, as Lambda does when the package has no .pyc")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports listed per mode")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with open(os.path.join(REPO_ROOT, LAMBDA_SOURCE), "rb") as f:
+        sources = {"lazy": (f.read(), False)}
+    sources["prewarm"] = (sources["lazy"][0], True)
+    if args.baseline:
+        sources[f"baseline {args.baseline}"] = (git_source(args.baseline), False)
+
+    results = {}
+    for mode, (source, prewarm) in sources.items():
+        directory = tempfile.mkdtemp(prefix="cold_start_")
+        try:
+            module_dir = prepare_module(directory, source, not args.no_bytecode)
+            results[mode] = summarize(*run_mode(module_dir, prewarm, args.runs), args.top)
+        finally:
+            shutil.rmtree(directory)
+
+    print(f"Median of {args.runs} fresh interpreters, Python {sys.version.split()[0]}"
+          + (", source only" if args.no_bytecode else ""))
+    print(f"{'mode':<20} {'import ms':>10} {'empty event ms':>15} {'clients ms':>11} {'total ms':>9} "
+          f"{'peak RSS MB':>12}  boto3 after empty event")
+    for mode, summary in results.items():
+        print(f"{mode:<20} {summary['import_ms']:10.1f} {summary['empty_event_ms']:15.1f} "
+              f"{summary['clients_ms']:11.1f} {summary['total_ms']:9.1f} {summary['peak_rss_mb']:12.1f}  "
+              f"{'yes' if summary['boto3_after_empty_event'] else 'no'}")
+    for mode, summary in results.items():
+        print(f"\nSlowest imports, {mode} (cumulative ms, -X importtime):")
+        for name, milliseconds in summary["slowest_imports_ms"].items():
+            print(f"  {name:<40} {milliseconds:8.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"runs": args.runs, "python": sys.version.split()[0], "bytecode": not args.no_bytecode,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
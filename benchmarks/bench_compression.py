@@ -0,0 +1,90 @@
+"""
+Compares end-to-end latency of the ETL Lambda on the same employee data stored uncompressed,
+gzip-compressed and (if the zstandard package is installed) zstd-compressed, as CSV and NDJSON.
+
+Run it against a local S3 stand-in (moto_server, MinIO, LocalStack...) by pointing boto3 at it:
+
+    AWS_ENDPOINT_URL_S3=http://localhost:5000 AWS_DEFAULT_REGION=us-east-1 \
+        python benchmarks/bench_compression.py --rows 500000
+
+DynamoDB writes are counted and discarded as in bench_streaming_memory.py. A local endpoint hides most
+of the transfer time that compression saves, so the object sizes are reported next to the latencies.
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import random
+import time
+
+import boto3
+
+from common import EMPLOYEE_HEADER, NullDynamoDBClient, RssSampler, add_src_path, employee_record, s3_event
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+def employee_files(rows, seed):
+    """Returns the same employees as CSV and NDJSON bytes."""
+    rng = random.Random(seed)
+    records = [employee_record(i, rng) for i in range(1, rows + 1)]
+    csv_data = EMPLOYEE_HEADER + "".join(",".join(record.values()) + "\n" for record in records)
+    ndjson_data = "".join(json.dumps(record) + "\n" for record in records)
+    return {"csv": csv_data.encode("utf-8"), "ndjson": ndjson_data.encode("utf-8")}
+
+
+def compressors():
+    codecs = {"": lambda data: data, ".gz": lambda data: gzip.compress(data, compresslevel=6)}
+    zstandard = lambda_function.import_zstandard()
+    if zstandard is not None:
+        codecs[".zst"] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+    return codecs
+
+
+def run(bucket, key, repeat):
+    """Runs the handler on one object `repeat` times and returns the best latency and peak RSS."""
+    best, peak = None, 0.0
+    for _ in range(repeat):
+        client = lambda_function.clients["dynamodb"] = NullDynamoDBClient()
+        lambda_function.clients[lambda_function.LOAD_CLIENT] = client
+        start = time.perf_counter()
+        with RssSampler() as sampler, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            response = lambda_function.lambda_handler(s3_event(bucket, key), None)
+        elapsed = time.perf_counter() - start
+        result = response["results"][f"{bucket}/{key}"]
+        if result["status"] != "success":
+            raise RuntimeError(f"{key}: {result['error']}")
+        best = elapsed if best is None else min(best, elapsed)
+        peak = max(peak, sampler.peak_mb)
+    return best, peak, client.items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bucket", default="etl-bench")
+    parser.add_argument("--prefix", default="bench/compression/")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    s3 = boto3.client("s3")
+    with contextlib.suppress(s3.exceptions.BucketAlreadyOwnedByYou):
+        s3.create_bucket(Bucket=args.bucket)
+    lambda_function.create_write_limiter = lambda: lambda_function.WriteRateLimiter(None)
+
+    print(f"{'object':<22} {'size MB':>9} {'ratio':>6} {'latency s':>10} {'rows/s':>11} {'peak RSS MB':>12}")
+    for file_format, data in employee_files(args.rows, args.seed).items():
+        for extension, compress in compressors().items():
+            key = f"{args.prefix}employees.{file_format}{extension}"
+            body = compress(data)
+            s3.put_object(Bucket=args.bucket, Key=key, Body=body)
+            latency, peak, rows = run(args.bucket, key, args.repeat)
+            print(f"{key[len(args.prefix):]:<22} {len(body) / 1024 ** 2:9.1f} {len(data) / len(body):6.1f} "
+                  f"{latency:10.2f} {rows / latency:11,.0f} {peak:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmarks create_file.py, the test data generator.
+
+- text: the original generator (one random.choice per character) against random_text_bytes, in memory,
+  then files of --text-mb written by create_random_txt_file in 1 and --shards shards
+- datasets: employees and ecommerce_sales rows/s and MB/s per format (Parquet only with pyarrow)
+
+Checks: the same seed gives byte-identical output whether the shards are written by one process or
+by --workers; and the employee CSV, JSON and NDJSON files load through lambda_handler (against the
+local S3 and DynamoDB stand-ins of common.py) with every row accepted and EMPLOYEE_ID written as
+a string, the Employees table's key type.
+
+    python benchmarks/bench_create_file.py --text-mb 2048 --rows 2000000 --shards 8 --workers 8
+"""
+import argparse
+import contextlib
+import hashlib
+import os
+import random
+import shutil
+import string
+import tempfile
+import time
+
+from common import LocalDynamoDBClient, LocalFileS3, add_src_path, s3_event
+
+add_src_path("Week1/Day1/src")
+add_src_path("Week2/Day2/src")
+import create_file  # noqa: E402
+import lambda_function  # noqa: E402
+
+BUCKET = "etl-generator-bench"
+READ_SIZE = 1024 * 1024
+
+
+def original_random_text(length):
+    """create_file.generate_random_text before the bulk rewrite."""
+    letters = string.ascii_letters + string.digits + string.punctuation + ' '
+    return ''.join(random.choice(letters) for i in range(length))
+
+
+def files_sha256(paths):
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(READ_SIZE), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def quiet(function, *args):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args)
+
+
+def load_through_lambda(paths):
+    """Runs each file through lambda_handler and returns the items written and the objects not loaded."""
+    keys = {f"generated/{os.path.basename(path)}": path for path in paths}
+    lambda_function.clients["s3"] = LocalFileS3(keys)
+    dynamodb = lambda_function.clients["dynamodb"] = LocalDynamoDBClient(
+        {lambda_function.TABLE_NAME: "EMPLOYEE_ID", lambda_function.CHECKPOINT_TABLE_NAME: "OBJECT_ID"},
+        discard=[lambda_function.TABLE_NAME],
+        key_types={lambda_function.TABLE_NAME: "S", lambda_function.CHECKPOINT_TABLE_NAME: "S"}  # As the tables declare
+    )
+    lambda_function.clients[lambda_function.LOAD_CLIENT] = dynamodb
+    lambda_function.create_write_limiter = lambda: lambda_function.WriteRateLimiter(None)
+    failed = 0
+    for key in keys:
+        response = quiet(lambda_function.lambda_handler, s3_event(BUCKET, key), None)
+        failed += sum(result["status"] != "success" for result in response["results"].values())
+    return dynamodb.items, failed
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--text-mb", type=int, default=1024)
+    parser.add_argument("--baseline-mb", type=float, default=8, help="Text generated by the original function")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--formats", nargs="+", default=list(create_file.FORMATS))
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "etl-generator-bench"))
+    args = parser.parse_args()
+    os.makedirs(args.data_dir, exist_ok=True)
+    formats = [name for name in args.formats if name != "parquet" or create_file.import_pyarrow() is not None]
+
+    size = int(args.baseline_mb * 1024 ** 2)
+    start = time.perf_counter()
+    original_random_text(size)
+    original = args.baseline_mb / (time.perf_counter() - start)
+    start = time.perf_counter()
+    create_file.random_text_bytes(size * 16, random.Random(args.seed))
+    bulk = args.baseline_mb * 16 / (time.perf_counter() - start)
+    print(f"Text in memory: original {original:.1f} MB/s, bulk {bulk:.1f} MB/s ({bulk / original:.0f}x)")
+
+    print(f"{'output':<28} {'shards':>7} {'workers':>8} {'seconds':>8} {'MB':>8} {'MB/s':>8} {'rows/s':>10}")
+    digests = {}
+    for shards, workers in [(1, 1), (args.shards, 1), (args.shards, args.workers)]:
+        path = os.path.join(args.data_dir, "random_text" + ("" if shards > 1 else ".txt"))
+        remove(path)
+        summary = quiet(create_file.create_random_txt_file, path, args.text_mb * 1024 ** 2, args.seed, shards, workers)
+        print(f"{'text':<28} {shards:>7} {workers:>8} {summary['elapsed_s']:>8.2f} "
+              f"{summary['bytes'] / 1024 ** 2:>8.0f} {summary['mb_per_second']:>8.1f} {'-':>10}")
+        if shards > 1:
+            digests.setdefault("text", set()).add(files_sha256(summary["files"]))
+        remove(path)
+
+    for dataset in create_file.DATASETS:
+        for file_format in formats:
+            for shards, workers in [(1, 1), (args.shards, 1), (args.shards, args.workers)]:
+                output = os.path.join(args.data_dir, dataset + ("" if shards > 1 else create_file.FORMATS[file_format]))
+                remove(output)
+                summary = create_file.create_dataset(dataset, output, args.rows, file_format, args.seed, shards, workers)
+                print(f"{dataset + ' ' + file_format:<28} {shards:>7} {workers:>8} {summary['elapsed_s']:>8.2f} "
+                      f"{summary['bytes'] / 1024 ** 2:>8.0f} {summary['mb_per_second']:>8.1f} "
+                      f"{summary['rows_per_second']:>10}")
+                if shards > 1:
+                    digests.setdefault((dataset, file_format), set()).add(files_sha256(summary["files"]))
+                if dataset == "employees" and file_format != "parquet" and shards == 1:
+                    items, failed = load_through_lambda(summary["files"])
+                    check(items == args.rows and not failed,
+                          f"employees {file_format}: {items} of {args.rows} items loaded, {failed} objects failed")
+                remove(output)
+
+    for output, values in digests.items():
+        check(len(values) == 1, f"{output}: the output depends on the number of workers")
+    print("✅ Same seed, same files with any number of workers; every generated employee row loads")
+
+
+if __name__ == "__main__":
+    main()
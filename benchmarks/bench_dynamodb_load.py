@@ -0,0 +1,70 @@
+"""
+Compares the ETL Lambda's batched, concurrent load stage with the old one-put_item-per-row loop.
+
+Run it against a local DynamoDB stand-in (DynamoDB Local, LocalStack...):
+
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 AWS_DEFAULT_REGION=us-east-1 \
+        python benchmarks/bench_dynamodb_load.py --rows 100000
+"""
+import argparse
+import contextlib
+import os
+import random
+import time
+
+import boto3
+
+from common import EMPLOYEE_HEADER, add_src_path, employee_csv_line, ensure_table
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+def employee_items(rows, seed):
+    rng = random.Random(seed)
+    lines = [EMPLOYEE_HEADER] + [employee_csv_line(i, rng) for i in range(1, rows + 1)]
+    return list(lambda_function.process_csv(iter(lines)))
+
+
+def put_item_loop(dynamodb, items):
+    """The load loop the Lambda used before batching: one request per row."""
+    table = dynamodb.Table(lambda_function.TABLE_NAME)
+    for item in items:
+        table.put_item(Item=item)
+
+
+def timed(label, rows, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f} s {rows / elapsed:12,.0f} items/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--baseline-rows", type=int, default=10000,
+                        help="Rows written with put_item; the per-row loop is extrapolated from this sample")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb", **lambda_function.CLIENT_SETTINGS["dynamodb"])  # The old loop's resource API
+    ensure_table(lambda_function.get_client("dynamodb"), lambda_function.TABLE_NAME, "EMPLOYEE_ID")
+
+    # Parsing is done up front (with per-row logging silenced) so only the load stage is timed
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        items = employee_items(args.rows, args.seed)
+
+    baseline_rows = min(args.baseline_rows, args.rows)
+    baseline = timed("put_item per row", baseline_rows, put_item_loop, dynamodb, items[:baseline_rows])
+    # The local table is on-demand, so pacing is switched off to measure the raw write path
+    batched = timed("BatchWriteItem x%d workers" % lambda_function.MAX_WRITE_WORKERS, args.rows,
+                    lambda_function.load_items, iter(items), lambda_function.WriteRateLimiter(None))
+
+    speedup = (baseline / baseline_rows) / (batched / args.rows)
+    print(f"Speed-up: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Compares peak memory and rows/sec of the ETL Lambda's JSON parsing paths on the same data:
+
+- json.loads of the whole document into a list (how process_json used to work)
+- the incremental JSON array parser
+- newline-delimited JSON
+
+Then the array is corrupted right after its first element; the incremental parser must raise
+ValueError within the first two chunks instead of buffering the rest of the file.
+
+Runs locally on generated files, no AWS endpoint needed:
+
+    python benchmarks/bench_json_parsing.py --rows 500000
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from common import add_src_path, employee_record
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+def file_chunks(path):
+    with open(path, "rb") as f:
+        yield from iter(lambda: f.read(lambda_function.READ_CHUNK_SIZE), b"")
+
+
+def whole_document(path):
+    with open(path, "rb") as f:
+        return list(lambda_function.process_json(json.loads(f.read().decode("utf-8"))))
+
+
+def incremental_array(path, chunks=None):
+    chunks = file_chunks(path) if chunks is None else chunks
+    for _ in lambda_function.process_json(lambda_function.iter_json_array(lambda_function.iter_text(chunks))):
+        pass
+
+
+def ndjson(path):
+    for _ in lambda_function.process_ndjson(lambda_function.iter_lines(file_chunks(path))):
+        pass
+
+
+def write_inputs(directory, rows, seed):
+    rng = random.Random(seed)
+    array_path = os.path.join(directory, "employees.json")
+    ndjson_path = os.path.join(directory, "employees.ndjson")
+    with open(array_path, "w") as array_file, open(ndjson_path, "w") as ndjson_file:
+        array_file.write("[")
+        for employee_id in range(1, rows + 1):
+            line = json.dumps(employee_record(employee_id, rng))
+            array_file.write(("," if employee_id > 1 else "") + line)
+            ndjson_file.write(line + "\n")
+        array_file.write("]")
+    return array_path, ndjson_path
+
+
+def corrupt(array_path, first_line, damage):
+    """Writes a copy of the array with `damage` in place of the comma after its first element."""
+    path = f"{array_path}.{len(damage)}-{ord(damage[-1])}.json"
+    with open(array_path) as source, open(path, "w") as target:
+        source.read(1 + len(first_line) + 1)
+        target.write("[" + first_line + damage)
+        for block in iter(lambda: source.read(lambda_function.READ_CHUNK_SIZE), ""):
+            target.write(block)
+    return path
+
+
+def chunks_until_error(path):
+    """Parses the array at `path`; returns the chunks read and the ValueError raised, if any."""
+    read = []
+
+    def counted():
+        for chunk in file_chunks(path):
+            read.append(len(chunk))
+            yield chunk
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            incremental_array(path, counted())
+    except ValueError as e:
+        return len(read), e
+    return len(read), None
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def measure(label, func, path, rows):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        func(path)
+        elapsed = time.perf_counter() - start
+
+        # Peak memory is measured on a second run, since tracing allocations slows parsing down
+        tracemalloc.start()
+        func(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"{label:<22} {rows / elapsed:12,.0f} rows/s {peak / 1024 ** 2:10.1f} MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        array_path, ndjson_path = write_inputs(directory, args.rows, args.seed)
+        print(f"{args.rows} rows: JSON array {os.path.getsize(array_path) / 1024 ** 2:.0f} MB, "
+              f"NDJSON {os.path.getsize(ndjson_path) / 1024 ** 2:.0f} MB")
+        measure("json.loads (old path)", whole_document, array_path, args.rows)
+        measure("incremental array", incremental_array, array_path, args.rows)
+        measure("NDJSON", ndjson, ndjson_path, args.rows)
+
+        first_line = json.dumps(employee_record(1, random.Random(args.seed)))
+        total = -(-os.path.getsize(array_path) // lambda_function.READ_CHUNK_SIZE)
+        for label, damage in [("missing comma", " "), ("double comma", ",,"), ("bad element", ",@"),
+                              ("bad literal", ", tru")]:
+            read, error = chunks_until_error(corrupt(array_path, first_line, damage))
+            print(f"{label:<22} ValueError after {read} of {total} chunks: {error}")
+            check(error is not None, f"{label}: the corrupted array was accepted")
+            check(read <= 2, f"{label}: {read} chunks read before the error")
+        print("✅ Corrupted arrays were rejected without reading the rest of the file")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmarks multipart_upload.upload_file (used by upload_object in Week1/Day1/src) on a multi-GB file
+across part sizes and concurrency, against LocalUploadS3 from common.py. The stand-in gives every
+connection --bandwidth-mb MB/s and every request --latency seconds, so a single stream is bound by
+one connection the way a real upload is; bodies are hashed and discarded.
+
+Reported per setting: MB/s, peak RSS and requests. Every upload is checked against the ETag S3 would
+compute for the file. A final resume check fails one part for good, reruns the upload from its
+manifest and checks that only the missing parts are sent again.
+
+    python benchmarks/bench_multipart_upload.py --size-mb 4096 --part-sizes-mb 8 64 --concurrency 1 8 16
+"""
+import argparse
+import contextlib
+import hashlib
+import os
+import tempfile
+
+from common import LocalUploadS3, RssSampler, add_src_path, multipart_etag
+
+add_src_path("Week1/Day1/src")
+import multipart_upload  # noqa: E402
+
+BUCKET = "etl-upload-bench"
+KEY = "bench/upload/large.bin"
+
+
+def write_source(path, size_mb, seed):
+    """Writes `size_mb` MB of incompressible data to `path` unless it is already there."""
+    if os.path.exists(path) and os.path.getsize(path) == size_mb * 1024 ** 2:
+        return
+    block = os.urandom(1024 ** 2)
+    with open(path + ".partial", "wb") as f:
+        for index in range(size_mb):
+            f.write(index.to_bytes(8, "big") + block[8:])  # Distinct blocks, so misplaced parts change the ETag
+    os.replace(path + ".partial", path)
+
+
+def expected_etag(path, part_size):
+    """
+    The ETag S3 gives `path` uploaded by upload_file with `part_size`: a plain MD5 when the file fits
+    in one part and goes up with a single PutObject, the multipart ETag otherwise.
+    """
+    size = os.path.getsize(path)
+    part_size = max(part_size, multipart_upload.MIN_PART_SIZE, -(-size // multipart_upload.MAX_PARTS))
+    if size > part_size:
+        return multipart_etag(path, part_size)
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 ** 2), b""):
+            digest.update(block)
+    return f'"{digest.hexdigest()}"'
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--part-sizes-mb", type=int, nargs="+", default=[8, 64])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--checksum", choices=sorted(multipart_upload.CHECKSUMS))
+    parser.add_argument("--bandwidth-mb", type=float, default=100, help="MB/s of each stand-in connection")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every request")
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "etl-upload-bench"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    path = os.path.join(args.data_dir, f"upload-{args.size_mb}mb-{args.seed}.bin")
+    write_source(path, args.size_mb, args.seed)
+    manifest = os.path.join(args.data_dir, "upload-manifest.json")
+    bandwidth = args.bandwidth_mb * 1024 ** 2
+
+    print(f"{args.size_mb} MB file, {args.bandwidth_mb:.0f} MB/s per connection, {args.latency * 1000:.0f} ms "
+          f"per request, checksum {args.checksum or 'none'}")
+    print(f"{'part MB':>8} {'concurrency':>12} {'parts':>6} {'seconds':>8} {'MB/s':>8} {'peak RSS MB':>12} "
+          f"{'requests':>9}")
+    for part_size_mb in args.part_sizes_mb:
+        part_size = part_size_mb * 1024 ** 2
+        expected = expected_etag(path, part_size)
+        for concurrency in args.concurrency:
+            s3 = LocalUploadS3(latency=args.latency, bandwidth=bandwidth)
+            with RssSampler(0.1) as rss:
+                summary = multipart_upload.upload_file(s3, path, BUCKET, KEY, part_size=part_size,
+                                                       concurrency=concurrency, checksum=args.checksum,
+                                                       manifest_path=manifest)
+            print(f"{part_size_mb:>8} {concurrency:>12} {summary['parts']:>6} {summary['elapsed_s']:>8.2f} "
+                  f"{summary['mb_per_second']:>8.1f} {rss.peak_mb:>12.0f} {sum(s3.requests.values()):>9}")
+            check(s3.objects[(BUCKET, KEY)]["ETag"] == expected, f"{part_size_mb} MB x {concurrency}: ETag mismatch")
+
+    # Resume: one part keeps failing, so the first attempt stops; the second only sends what is missing
+    part_size = max(min(args.part_sizes_mb) * 1024 ** 2, multipart_upload.MIN_PART_SIZE)
+    part_count = -(-os.path.getsize(path) // part_size)
+    if part_count < 2:
+        print("✅ Uploads match the file; resume not checked, the file fits in one part")
+        return
+    concurrency = args.concurrency[-1]
+    s3 = LocalUploadS3(latency=args.latency, bandwidth=bandwidth)
+    s3.fail_parts = {part_count // 2 + 1}
+    multipart_upload.BACKOFF_BASE_SECONDS = 0.01
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            multipart_upload.upload_file(s3, path, BUCKET, KEY, part_size=part_size, concurrency=concurrency,
+                                         checksum=args.checksum, manifest_path=manifest)
+            raise SystemExit("❌ The upload should have failed")
+        except ConnectionError:
+            pass
+    first_parts = s3.requests["UploadPart"] - multipart_upload.MAX_PART_ATTEMPTS
+    s3.fail_parts.clear()
+    summary = multipart_upload.upload_file(s3, path, BUCKET, KEY, part_size=part_size, concurrency=concurrency,
+                                           checksum=args.checksum, manifest_path=manifest)
+    print(f"Resume: first attempt uploaded {first_parts} of {part_count} parts, the second skipped "
+          f"{summary['parts_skipped']} and uploaded {summary['parts_uploaded']}")
+    check(summary["parts_skipped"] == first_parts, "parts uploaded before the failure were sent again")
+    check(summary["parts_skipped"] + summary["parts_uploaded"] == part_count, "parts are missing")
+    check(s3.objects[(BUCKET, KEY)]["ETag"] == expected_etag(path, part_size), "resumed upload has the wrong ETag")
+    check(not os.path.exists(manifest), "the manifest was not removed after the upload completed")
+    print("✅ Resumed upload skipped the parts already uploaded and matches the file")
+
+
+if __name__ == "__main__":
+    main()
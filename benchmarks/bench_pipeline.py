@@ -0,0 +1,304 @@
+"""
+End-to-end benchmark of the S3 -> Lambda -> DynamoDB pipeline that setup_s3_trigger.py and
+deploy_lambda.py wire up, with lambda_handler run in-process on one S3 event per object, as the
+bucket notification delivers them. Objects stopped at the deadline are continued from the
+re-invocations the handler queues, and their time is added to the object's latency.
+
+Inputs are generated employee files shaped like Week2/Day2/Data/employees.csv, split into --objects
+objects per case and cached in --data-dir. Each case runs in a fresh interpreter, so its peak RSS and
+cold start are its own. Reported per case: rows/sec, p50/p99 per-object latency, peak RSS and the
+number of requests per API operation; the results are saved as JSON for later comparison.
+
+Backends:
+
+- local (default): in-memory stand-ins from common.py. Objects are served from the cached files and
+  Employees items are only counted, so 10M-row cases need no AWS endpoint and little memory.
+- moto: moto's in-process S3 and DynamoDB (pip install "moto[s3,dynamodb]"); objects and items live in memory.
+- endpoint: whatever boto3 is configured for, e.g. LocalStack or DynamoDB Local plus MinIO.
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --rows 1000 1000000 10000000 --formats csv ndjson.gz
+    AWS_ENDPOINT_URL=http://localhost:4566 AWS_DEFAULT_REGION=us-east-1 \\
+        python benchmarks/bench_pipeline.py --backend endpoint --rows 10000
+    python benchmarks/bench_pipeline.py --compare pipeline-20260101-120000.json pipeline-20260201-120000.json
+
+Writes are not paced to the table's capacity unless --paced is given: the stand-ins have no capacity to protect.
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import (REPO_ROOT, EMPLOYEE_HEADER, FakeLambdaContext, LocalDynamoDBClient, LocalFileS3,
+                    QueueingLambdaClient, add_src_path, current_rss_mb, employee_record, ensure_table, percentile,
+                    s3_event)
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+FORMATS = ["csv", "json", "ndjson", "csv.gz", "json.gz", "ndjson.gz"]
+DEFAULT_ROWS = [1000, 10000, 100000, 1000000]
+BUCKET = "etl-pipeline-bench"
+KEY_PREFIX = "bench/pipeline/"
+LAMBDA_TIMEOUT_MS = 30000  # deploy_lambda.py's Timeout
+
+
+def write_part(path, file_format, first_id, rows, seed):
+    """Writes employees first_id..first_id+rows-1 to `path` in `file_format` (gzip if it ends in .gz)."""
+    rng = random.Random(seed)
+    base_format = file_format.split(".")[0]
+    temporary = path + ".partial"
+    with (gzip.open if file_format.endswith(".gz") else open)(temporary, "wt", encoding="utf-8") as f:
+        if base_format == "csv":
+            f.write(EMPLOYEE_HEADER)
+        elif base_format == "json":
+            f.write("[\n")
+        for employee_id in range(first_id, first_id + rows):
+            record = employee_record(employee_id, rng)
+            if base_format == "csv":
+                f.write(",".join(record.values()) + "\n")
+            elif base_format == "json":
+                f.write(("" if employee_id == first_id else ",\n") + json.dumps(record))
+            else:
+                f.write(json.dumps(record) + "\n")
+        if base_format == "json":
+            f.write("\n]\n")
+    os.replace(temporary, path)
+
+
+def prepare_inputs(data_dir, file_format, rows, objects, seed):
+    """Returns {key: path} for the case's objects, generating the files that are not cached yet."""
+    files = {}
+    per_object, extra = divmod(rows, objects)
+    first_id = 1
+    for part in range(objects):
+        part_rows = per_object + (part < extra)
+        name = f"employees-{rows}x{objects}-{seed}-{part:04d}.{file_format}"
+        path = os.path.join(data_dir, name)
+        if not os.path.exists(path):
+            write_part(path, file_format, first_id, part_rows, seed + part)
+        files[KEY_PREFIX + name] = path
+        first_id += part_rows
+    return files
+
+
+class Backend:
+    """Points lambda_function at the benchmark's S3, DynamoDB and Lambda stand-ins and counts their requests."""
+
+    def __init__(self, name, files):
+        self.name = name
+        self.boto3_requests = {}
+        self._lock = threading.Lock()
+        self.lambda_client = lambda_function.clients["lambda"] = QueueingLambdaClient()
+        self.stand_ins = [self.lambda_client]
+        if name == "local":
+            self.dynamodb = lambda_function.clients["dynamodb"] = LocalDynamoDBClient(
+                {lambda_function.TABLE_NAME: "EMPLOYEE_ID", lambda_function.CHECKPOINT_TABLE_NAME: "OBJECT_ID"},
+                discard=[lambda_function.TABLE_NAME]
+            )
+            lambda_function.clients[lambda_function.LOAD_CLIENT] = self.dynamodb
+            self.s3 = lambda_function.clients["s3"] = LocalFileS3(files)
+            self.stand_ins += [self.s3, self.dynamodb]
+            return
+        if name == "moto":
+            from moto import mock_aws
+            for variable, value in [("AWS_DEFAULT_REGION", "us-east-1"), ("AWS_ACCESS_KEY_ID", "testing"),
+                                    ("AWS_SECRET_ACCESS_KEY", "testing")]:
+                os.environ.setdefault(variable, value)
+            mock_aws().start()
+        self.s3 = lambda_function.get_client("s3")
+        self.dynamodb = lambda_function.get_client("dynamodb")
+        with contextlib.suppress(self.s3.exceptions.BucketAlreadyOwnedByYou):
+            self.s3.create_bucket(Bucket=BUCKET)
+        for key, path in files.items():
+            self.s3.upload_file(path, BUCKET, key)
+        ensure_table(self.dynamodb, lambda_function.TABLE_NAME, "EMPLOYEE_ID")
+        ensure_table(self.dynamodb, lambda_function.CHECKPOINT_TABLE_NAME, "OBJECT_ID")
+        for client in (self.s3, self.dynamodb, lambda_function.get_client(lambda_function.LOAD_CLIENT)):
+            client.meta.events.register("before-call", self.count_boto3_request)
+
+    def count_boto3_request(self, event_name, **kwargs):
+        _, service, operation = event_name.split(".")
+        name = f"{service}.{operation}"
+        with self._lock:
+            self.boto3_requests[name] = self.boto3_requests.get(name, 0) + 1
+
+    def requests(self):
+        """Returns {"service.Operation": count} for the requests made since the last reset_counts."""
+        counts = dict(self.boto3_requests)
+        for service, stand_in in [("lambda", self.lambda_client), ("s3", self.s3), ("dynamodb", self.dynamodb)]:
+            if stand_in in self.stand_ins:
+                counts.update({f"{service}.{operation}": count for operation, count in stand_in.requests.items()})
+        return dict(sorted(counts.items()))
+
+    def reset_counts(self):
+        self.boto3_requests.clear()
+        for stand_in in self.stand_ins:
+            stand_in.requests.clear()
+
+    def etag(self, key):
+        return self.s3.head_object(Bucket=BUCKET, Key=key)["ETag"]
+
+
+def run_case(case):
+    """Runs one case in this interpreter and returns its results."""
+    files = case["files"]
+    backend = Backend(case["backend"], files)
+    if not case["paced"]:
+        lambda_function.create_write_limiter = lambda: lambda_function.WriteRateLimiter(None)
+    etags = {key: backend.etag(key) for key in files}
+    backend.reset_counts()
+
+    latencies, statuses, errors, rows = [], {}, [], 0
+    invocations = 0
+    baseline_rss = current_rss_mb()
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for key in files:
+            object_started = time.perf_counter()
+            event = s3_event(BUCKET, key, etags[key])
+            while event is not None:
+                invocations += 1
+                response = lambda_function.lambda_handler(event, FakeLambdaContext(case["timeout_ms"]))
+                result = response["results"][f"{BUCKET}/{key}"]
+                rows += result["written"] + result["unchanged"]
+                event = backend.lambda_client.queued.pop(0) if backend.lambda_client.queued else None
+            latencies.append((time.perf_counter() - object_started) * 1000)
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+            if result["error"]:
+                errors.append(f"{key}: {result['error']}")
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return {
+        "backend": case["backend"],
+        "format": case["format"],
+        "rows": case["rows"],
+        "objects": len(files),
+        "input_mb": sum(os.path.getsize(path) for path in files.values()) / 1024 ** 2,
+        "elapsed_s": elapsed,
+        "rows_per_second": case["rows"] / elapsed if elapsed else None,
+        "latency_ms": {"p50": percentile(latencies, 50), "p99": percentile(latencies, 99), "max": max(latencies)},
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss,
+        "invocations": invocations,
+        "statuses": statuses,
+        "rows_loaded": rows,
+        "errors": errors[:10],
+        "requests": backend.requests(),
+    }
+
+
+def run_isolated(case):
+    """Runs a case in a fresh interpreter so its memory and module state are not shared with other cases."""
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", json.dumps(case)],
+                               capture_output=True, text=True)
+    if completed.returncode:
+        raise RuntimeError(f"{case['format']} x {case['rows']} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_revision():
+    completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True)
+    return completed.stdout.strip() or None
+
+
+def print_header():
+    print(f"{'backend':<9} {'format':<10} {'rows':>9} {'objects':>7} {'rows/s':>11} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'peak RSS MB':>12} {'invocations':>11}  requests")
+
+
+def print_results(results):
+    for result in results:
+        requests = ", ".join(f"{name} {count}" for name, count in result["requests"].items())
+        print(f"{result['backend']:<9} {result['format']:<10} {result['rows']:>9} {result['objects']:>7} "
+              f"{result['rows_per_second']:>11,.0f} {result['latency_ms']['p50']:>9.1f} "
+              f"{result['latency_ms']['p99']:>9.1f} {result['peak_rss_mb']:>12.1f} {result['invocations']:>11}  "
+              f"{requests}")
+        if result["rows_loaded"] != result["rows"] or set(result["statuses"]) != {"success"}:
+            print(f"  ⚠️ loaded {result['rows_loaded']} of {result['rows']} rows, statuses {result['statuses']}: "
+                  + "; ".join(result["errors"]))
+
+
+def compare(old_path, new_path):
+    """Prints how each case present in both result files changed."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old_path} ({old['revision']}) -> {new_path} ({new['revision']})")
+
+    def case_key(result):
+        return result["backend"], result["format"], result["rows"], result["objects"]
+
+    previous = {case_key(result): result for result in old["results"]}
+    print(f"{'backend':<9} {'format':<10} {'rows':>9} {'rows/s':>20} {'p99 ms':>20} {'peak RSS MB':>16}")
+    for result in new["results"]:
+        before = previous.get(case_key(result))
+        if before is None:
+            continue
+        print(f"{result['backend']:<9} {result['format']:<10} {result['rows']:>9} "
+              f"{result['rows_per_second'] / before['rows_per_second']:>19.2f}x "
+              f"{before['latency_ms']['p99']:>9.1f} -> {result['latency_ms']['p99']:<7.1f} "
+              f"{before['peak_rss_mb']:>6.1f} -> {result['peak_rss_mb']:<6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["local", "moto", "endpoint"], default="local")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--rows", nargs="+", type=int, default=DEFAULT_ROWS, help="Total rows per case")
+    parser.add_argument("--objects", type=int, default=10, help="Objects (and events) the rows are split into")
+    parser.add_argument("--timeout-ms", type=int, default=LAMBDA_TIMEOUT_MS, help="Deadline of each invocation")
+    parser.add_argument("--paced", action="store_true", help="Pace writes to the table's capacity as deployed")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "etl-pipeline-bench"),
+                        help="Where generated inputs are cached between runs")
+    parser.add_argument("--output", help="Results file (default: pipeline-<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two results files and exit")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case))))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = []
+    print_header()
+    for rows in args.rows:
+        for file_format in args.formats:
+            files = prepare_inputs(args.data_dir, file_format, rows, min(args.objects, rows), args.seed)
+            results.append(run_isolated({"backend": args.backend, "format": file_format, "rows": rows,
+                                         "files": files, "timeout_ms": args.timeout_ms, "paced": args.paced}))
+            print_results(results[-1:])
+
+    output = args.output or time.strftime("pipeline-%Y%m%d-%H%M%S.json")
+    with open(output, "w") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "arguments": {name: value for name, value in vars(args).items() if name not in ("case", "compare")},
+            "results": results,
+        }, f, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmarks ranged_download.py against a single-stream GET, on a large object served by LocalFileS3
+from common.py. The stand-in gives every connection --bandwidth-mb MB/s and every request --latency
+seconds, so one stream is bound by one connection the way a real GET is.
+
+Cases:
+
+- get-read: get_object()["Body"].read(), the whole object as one bytes object
+- get-stream: one GET streamed to a file with iter_chunks
+- file: download_file, ranges written into a memory map of the preallocated file
+- bytes: download_bytes, ranges written into one preallocated bytearray
+- iter: iter_object, ranges consumed in order as they arrive (hashed, as a pipeline would)
+
+Reported per case: MB/s and the peak RSS above the process's baseline. The pages of the memory-mapped
+file count towards RSS in the file case, but they are page cache the kernel can write out and drop.
+Every result is checked against the SHA-256 of the source file, and the ranged cases against reading
+more than READ_SIZE bytes of a body at once (urllib3 allocates a temporary of the size asked for).
+Then a range that is denied, and one whose connection drops mid-body, must fail download_file and
+download_bytes with their own error and leave no file behind.
+
+    python benchmarks/bench_ranged_download.py --size-mb 2048 --concurrency 1 8 16 --range-sizes-mb 8 32
+"""
+import argparse
+import contextlib
+import gc
+import hashlib
+import os
+import tempfile
+import time
+
+from bench_multipart_upload import write_source
+from common import LocalFileBody, LocalFileS3, LocalS3Error, RssSampler, add_src_path, current_rss_mb
+
+add_src_path("Week1/Day1/src")
+import ranged_download  # noqa: E402
+
+BUCKET = "etl-download-bench"
+KEY = "bench/download/large.bin"
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def run_case(case, s3, target, range_size, concurrency):
+    """Runs one case and returns the SHA-256 of what it downloaded."""
+    if case == "get-read":
+        return hashlib.sha256(s3.get_object(Bucket=BUCKET, Key=KEY)["Body"].read()).hexdigest()
+    if case == "get-stream":
+        with open(target, "wb") as f:
+            for chunk in s3.get_object(Bucket=BUCKET, Key=KEY)["Body"].iter_chunks(READ_CHUNK_SIZE):
+                f.write(chunk)
+        return file_sha256(target)
+    if case == "file":
+        ranged_download.download_file(s3, BUCKET, KEY, target, range_size, concurrency)
+        return file_sha256(target)
+    if case == "bytes":
+        return hashlib.sha256(ranged_download.download_bytes(s3, BUCKET, KEY, range_size, concurrency)).hexdigest()
+    digest = hashlib.sha256()
+    for chunk in ranged_download.iter_object(s3, BUCKET, KEY, range_size, concurrency):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DroppingBody(LocalFileBody):
+    """Body whose connection drops once half of it has been read."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.size = self.remaining
+
+    def readinto(self, buffer):
+        if self.remaining <= self.size // 2:
+            raise ConnectionError("Connection reset by peer")
+        return super().readinto(buffer)
+
+
+class FailingRangeS3(LocalFileS3):
+    """LocalFileS3 failing every GET of the range starting at `failing_start`: denied, or dropped mid-body."""
+
+    def __init__(self, files, failing_start, failure):
+        super().__init__(files)
+        self.failing_start = failing_start
+        self.failure = failure
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        response = super().get_object(Bucket, Key, Range, IfMatch)
+        if Range and int(Range.split("=")[1].split("-")[0]) == self.failing_start:
+            if self.failure == "denied":
+                raise LocalS3Error("AccessDenied", "Access Denied")
+            body = response["Body"]
+            response["Body"] = DroppingBody(body.path, body.start, body.start + body.remaining - 1)
+        return response
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--range-sizes-mb", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16])
+    parser.add_argument("--cases", nargs="+", default=["get-read", "get-stream", "file", "bytes", "iter"])
+    parser.add_argument("--bandwidth-mb", type=float, default=100, help="MB/s of each stand-in connection")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every request")
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "etl-upload-bench"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    source = os.path.join(args.data_dir, f"upload-{args.size_mb}mb-{args.seed}.bin")
+    write_source(source, args.size_mb, args.seed)
+    expected = file_sha256(source)
+    target = os.path.join(args.data_dir, "download.bin")
+    s3 = LocalFileS3({KEY: source}, latency=args.latency, bandwidth=args.bandwidth_mb * 1024 ** 2)
+
+    print(f"{args.size_mb} MB object, {args.bandwidth_mb:.0f} MB/s per connection, "
+          f"{args.latency * 1000:.0f} ms per request")
+    print(f"{'case':<11} {'range MB':>9} {'concurrency':>12} {'seconds':>8} {'MB/s':>8} {'peak RSS MB':>12} "
+          f"{'GETs':>6}")
+    for case in args.cases:
+        settings = [(None, 1)] if case.startswith("get") else \
+            [(size, concurrency) for size in args.range_sizes_mb for concurrency in args.concurrency]
+        for range_size_mb, concurrency in settings:
+            gc.collect()
+            baseline = current_rss_mb()
+            s3.requests.clear()
+            LocalFileBody.largest_read = 0
+            start = time.perf_counter()
+            with RssSampler(0.05) as rss:
+                digest = run_case(case, s3, target, (range_size_mb or 1) * 1024 ** 2, concurrency)
+            elapsed = time.perf_counter() - start
+            print(f"{case:<11} {range_size_mb or '-':>9} {concurrency:>12} {elapsed:>8.2f} "
+                  f"{args.size_mb / elapsed:>8.1f} {max(0.0, rss.peak_mb - baseline):>12.0f} "
+                  f"{s3.requests.get('GetObject', 0):>6}")
+            check(digest == expected, f"{case}: the download does not match the object")
+            check(case.startswith("get") or LocalFileBody.largest_read <= ranged_download.READ_SIZE,
+                  f"{case}: read {LocalFileBody.largest_read} bytes at once, more than READ_SIZE")
+            if os.path.exists(target):
+                os.remove(target)
+
+    # A failing range: the caller gets the range's own error, not BufferError from closing the buffer
+    range_size = args.range_sizes_mb[0] * 1024 ** 2
+    ranged_download.BACKOFF_BASE_SECONDS = 0.001
+    for failure, error in [("denied", LocalS3Error), ("dropped", ConnectionError)]:
+        s3 = FailingRangeS3({KEY: source}, range_size * (args.size_mb * 1024 ** 2 // range_size // 2), failure)
+        for case in ("file", "bytes"):
+            try:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    run_case(case, s3, target, range_size, max(args.concurrency))
+                raised = None
+            except Exception as e:
+                raised = e
+            check(isinstance(raised, error), f"{case}, {failure} range: raised {raised!r}, expected {error.__name__}")
+            check(not os.path.exists(target) and not os.path.exists(target + ".partial"),
+                  f"{case}, {failure} range: a file was left behind")
+        print(f"Failing range ({failure}): download_file and download_bytes raised {error.__name__}")
+    print("✅ Every download matches the object; failing ranges raise their own error")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Measures the throughput of redrive_failures.py against a local SQS stand-in (LocalSQSClient in
+common.py) filled with the failure records lambda_destination.py's LambdaFailureQueue collects,
+one per S3 event, plus success records from LambdaSuccessTopic and a few unreadable messages.
+The events are run through lambda_handler in-process against the local S3 and DynamoDB stand-ins.
+
+Each receivers x workers configuration drains a fresh queue and is checked: every object loaded,
+only the unreadable messages left. --handler-latency-ms adds the round trip of invoking the deployed
+function to every event, --latency the round trip of every SQS request.
+
+A final resume check interrupts a redrive halfway, with some deletes failing, and runs it again
+from the progress file: no event may be redriven twice.
+
+    python benchmarks/bench_redrive.py --objects 2000 --configs 1x1 4x8 8x16
+"""
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from bench_pipeline import BUCKET, prepare_inputs
+from common import LocalDynamoDBClient, LocalFileS3, LocalSQSClient, QueueingLambdaClient, add_src_path, s3_event
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+import redrive_failures  # noqa: E402
+
+FUNCTION_ARN = "arn:aws:lambda:us-east-1:000000000000:function:S3ToDynamoDBLambda"
+TOPIC_ARN = "arn:aws:sns:us-east-1:000000000000:LambdaSuccessTopic"
+
+
+def invocation_record(event, condition):
+    """Builds the record Lambda sends to an asynchronous invocation's destination."""
+    succeeded = condition == "Success"
+    return {
+        "version": "1.0",
+        "timestamp": "2026-10-18T12:00:00.000Z",
+        "requestContext": {"requestId": "00000000-0000-0000-0000-000000000000", "functionArn": f"{FUNCTION_ARN}:$LATEST",
+                           "condition": condition, "approximateInvokeCount": 1 if succeeded else 3},
+        "requestPayload": event,
+        "responseContext": {"statusCode": 200, "executedVersion": "$LATEST",
+                            **({} if succeeded else {"functionError": "Unhandled"})},
+        "responsePayload": {"statusCode": 200} if succeeded else {"errorMessage": "Task timed out after 30.00 seconds"}
+    }
+
+
+def fill_queue(sqs, s3, files, success_records, unreadable):
+    """Sends one failure record per object, `success_records` SNS-wrapped success records and junk."""
+    for key in files:
+        sqs.send_message(QueueUrl=sqs.queue_url,
+                         MessageBody=json.dumps(invocation_record(s3_event(BUCKET, key, s3.etag(key)), "RetriesExhausted")))
+    for index in range(success_records):
+        record = invocation_record(s3_event(BUCKET, f"done/{index}.csv"), "Success")
+        sqs.send_message(QueueUrl=sqs.queue_url, MessageBody=json.dumps(
+            {"Type": "Notification", "TopicArn": TOPIC_ARN, "Message": json.dumps(record)}))
+    for index in range(unreadable):
+        sqs.send_message(QueueUrl=sqs.queue_url, MessageBody=f"not an invocation record {index}")
+    sqs.requests.clear()
+
+
+def stand_ins(files, args, delete_failure_rate=0.0):
+    """Points lambda_function at fresh S3, DynamoDB and Lambda stand-ins and returns them with a filled queue."""
+    s3 = lambda_function.clients["s3"] = LocalFileS3(files)
+    dynamodb = lambda_function.clients["dynamodb"] = LocalDynamoDBClient(
+        {lambda_function.TABLE_NAME: "EMPLOYEE_ID", lambda_function.CHECKPOINT_TABLE_NAME: "OBJECT_ID"},
+        discard=[lambda_function.TABLE_NAME]
+    )
+    lambda_function.clients[lambda_function.LOAD_CLIENT] = dynamodb
+    lambda_function.clients["lambda"] = QueueingLambdaClient()
+    sqs = LocalSQSClient(latency=args.latency, delete_failure_rate=delete_failure_rate)
+    fill_queue(sqs, s3, files, int(len(files) * args.success_records), args.unreadable)
+    return sqs, dynamodb
+
+
+def counting_handler(latency):
+    """Returns lambda_handler as a redrive handler that sleeps `latency` seconds per event and counts the events."""
+    run_event = redrive_failures.local_handler()
+    calls = {"events": 0, "keys": {}}
+    lock = threading.Lock()
+
+    def handle(event):
+        if latency:
+            time.sleep(latency)
+        with lock:
+            calls["events"] += 1
+            for record in event["Records"]:
+                key = record["s3"]["object"]["key"]
+                calls["keys"][key] = calls["keys"].get(key, 0) + 1
+        return run_event(event)
+    return handle, calls
+
+
+def run(sqs, handler, progress, receivers, workers, args, max_messages=None):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return redrive_failures.redrive(sqs, sqs.queue_url, handler, progress, receivers=receivers, workers=workers,
+                                        wait_seconds=args.wait_seconds, max_messages=max_messages)
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=1000, help="Failure records, one object each")
+    parser.add_argument("--rows-per-object", type=int, default=20)
+    parser.add_argument("--success-records", type=float, default=0.2, help="As a fraction of --objects")
+    parser.add_argument("--unreadable", type=int, default=5)
+    parser.add_argument("--configs", nargs="+", default=["1x1", "2x4", "4x8", "8x16"], help="RECEIVERSxWORKERS")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds added to every SQS request")
+    parser.add_argument("--handler-latency-ms", type=float, default=20, help="Added to every redriven event")
+    parser.add_argument("--wait-seconds", type=int, default=1, help="Long-poll time (SQS allows up to 20)")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "etl-pipeline-bench"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    files = prepare_inputs(args.data_dir, "csv", args.objects * args.rows_per_object, args.objects, args.seed)
+    rows = args.objects * args.rows_per_object
+    lambda_function.create_write_limiter = lambda: lambda_function.WriteRateLimiter(None)
+    handler_latency = args.handler_latency_ms / 1000
+
+    print(f"{args.objects} failure records of {args.rows_per_object} rows, "
+          f"{int(args.objects * args.success_records)} success records, {args.unreadable} unreadable; "
+          f"SQS latency {args.latency * 1000:.0f} ms, handler latency {args.handler_latency_ms:.0f} ms")
+    print(f"{'receivers':>9} {'workers':>8} {'seconds':>8} {'messages/s':>11} {'items/s':>10} "
+          f"{'ReceiveMessage':>15} {'DeleteMessageBatch':>19} {'left':>5}")
+    for config in args.configs:
+        receivers, workers = (int(part) for part in config.split("x"))
+        sqs, dynamodb = stand_ins(files, args)
+        handler, calls = counting_handler(handler_latency)
+        summary = run(sqs, handler, redrive_failures.RedriveProgress(None), receivers, workers, args)
+        print(f"{receivers:>9} {workers:>8} {summary['elapsed_s']:>8.2f} {summary['messages_per_second']:>11.1f} "
+              f"{summary['items_per_second']:>10.1f} {summary['receive_calls']:>15} {summary['delete_calls']:>19} "
+              f"{len(sqs.messages):>5}")
+        check(dynamodb.items == rows, f"{config}: {dynamodb.items} items loaded, expected {rows}")
+        check(summary["redriven"] == args.objects, f"{config}: {summary['redriven']} events redriven")
+        check(len(sqs.messages) == args.unreadable, f"{config}: {len(sqs.messages)} messages left in the queue")
+
+    # Resume: interrupt halfway with some deletes failing, then run again from the progress file
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "progress.jsonl")
+        receivers, workers = (int(part) for part in args.configs[-1].split("x"))
+        sqs, dynamodb = stand_ins(files, args, delete_failure_rate=0.3)
+        handler, calls = counting_handler(0)
+        progress = redrive_failures.RedriveProgress(path)
+        first = run(sqs, handler, progress, receivers, workers, args, max_messages=args.objects // 2)
+        progress.close()
+        sqs.release_all()
+        sqs.delete_failure_rate = 0.0
+        progress = redrive_failures.RedriveProgress(path)
+        second = run(sqs, handler, progress, receivers, workers, args)
+        progress.close()
+    print(f"Resume: first run redrove {first['redriven']} events ({first['delete_failures']} deletes failed), "
+          f"second run redrove {second['redriven']} and only deleted {second['resumed']} already redriven")
+    check(first["received"] <= args.objects // 2, f"first run received {first['received']} messages")
+    check(calls["events"] == args.objects, f"{calls['events']} events redriven, expected {args.objects}")
+    check(max(calls["keys"].values()) == 1, "an event was redriven twice")
+    check(dynamodb.items == rows, f"{dynamodb.items} items loaded, expected {rows}")
+    check(len(sqs.messages) == args.unreadable, f"{len(sqs.messages)} messages left in the queue")
+    print("✅ Every event redriven once, only the unreadable messages are left")
+
+
+if __name__ == "__main__":
+    main()
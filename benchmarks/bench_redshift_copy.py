@@ -0,0 +1,163 @@
+"""
+Benchmarks redshift_copy.py's COPY loads against batched multi-row INSERTs, the way create_table.py
+loaded its rows, on a local PostgreSQL standing in for the cluster (see bench_redshift_pool.py).
+LocalRedshift of common.py runs Redshift's COPY from the LocalUploadS3 stand-in, with --slices slices.
+
+- insert: INSERT ... VALUES of --insert-batch rows per statement, for --insert-rows of the rows
+- copy-file: an employees CSV made by create_file.py, loaded with load_file
+- copy-rows: the same rows, straight from the generator, loaded with load_rows
+
+Checks: every case loads every row; the files staged are a multiple of the slice count, and deleted
+once loaded; with MAXERROR 10, a file with 3 bad rows loads the rest and reports the 3 rows with their
+line and column; with MAXERROR 0 the same file loads nothing and still reports the first bad row.
+
+    python benchmarks/bench_redshift_copy.py --dsn postgresql://postgres@localhost:5432/postgres --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import LocalRedshift, LocalUploadS3, add_src_path
+
+add_src_path("Week1/Day1/src")
+add_src_path("Week1/Day2/src/Redshift")
+import create_file  # noqa: E402
+import redshift_copy  # noqa: E402
+import redshift_db  # noqa: E402
+
+TABLE = "bench_copy_employees"
+BUCKET = "redshift-copy-bench"
+DATASET = create_file.DATASETS["employees"]
+COLUMNS = [name.lower() for name, _ in DATASET["columns"]]
+CREATE_TABLE = f"""
+CREATE TABLE {TABLE} (
+    employee_id INT, first_name VARCHAR(20), last_name VARCHAR(25), email VARCHAR(25),
+    phone_number VARCHAR(20), hire_date VARCHAR(9), job_id VARCHAR(10), salary INT,
+    commission_pct DECIMAL(2, 2), manager_id INT, department_id INT
+);
+"""
+BAD_ROWS = {  # Line of the error file -> row COPY must reject
+    5: "not-a-number,Pat,Fay,PFAY,650.121.0001,17-AUG-05,MK_REP,6000, - ,201,20",
+    11: "131,Pat,Fay,PFAY_WITH_AN_EMAIL_FAR_TOO_LONG,650.121.0001,17-AUG-05,MK_REP,6000, - ,201,20",
+    17: "132,Pat,Fay,PFAY,650.121.0001,17-AUG-05,MK_REP,lots, - ,201,20",
+}
+
+
+def generated_rows(rows, seed):
+    for columns in create_file.chunk_rows(DATASET, rows, 0, seed):
+        yield from zip(*columns)
+
+
+def reset_table(pool):
+    with pool.transaction() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE};")
+        cursor.execute(CREATE_TABLE)
+
+
+def row_count(pool):
+    return pool.query(f"SELECT COUNT(*) FROM {TABLE};")[0][0]
+
+
+def insert_rows(pool, rows, batch):
+    """INSERT ... VALUES (...), (...), ... of `batch` rows per statement, in one transaction."""
+    from psycopg2.extras import execute_values
+    with pool.transaction() as cursor:
+        execute_values(cursor, f"INSERT INTO {TABLE} ({', '.join(COLUMNS)}) VALUES %s;", rows, page_size=batch)
+
+
+def write_error_file(path, good_rows, seed):
+    """A CSV of generated rows with BAD_ROWS at their lines (the header is line 1)."""
+    create_file.create_dataset("employees", path, good_rows, "csv", seed)
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    for line, row in sorted(BAD_ROWS.items()):
+        lines.insert(line - 1, row)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.environ.get("REDSHIFT_BENCH_DSN", "postgresql://postgres@localhost:5432/postgres"))
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--insert-rows", type=int, default=100000)
+    parser.add_argument("--insert-batch", type=int, default=1000)
+    parser.add_argument("--slices", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "redshift-copy-bench"))
+    args = parser.parse_args()
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    s3 = LocalUploadS3(keep_bodies=True)
+    redshift = LocalRedshift(args.dsn, s3, args.slices).install()
+    pool = redshift_db.ConnectionPool(args.dsn, max_size=2, connect=redshift.connect)
+    path = os.path.join(args.data_dir, "employees.csv")
+    create_file.create_dataset("employees", path, args.rows, "csv", args.seed)
+    loads = {
+        "copy-file": lambda: redshift_copy.load_file(path, TABLE, COLUMNS, null_as=DATASET["csv_null"],
+                                                     bucket=BUCKET, pool=pool, s3_client=s3),
+        "copy-rows": lambda: redshift_copy.load_rows(generated_rows(args.rows, args.seed), TABLE, COLUMNS,
+                                                     bucket=BUCKET, pool=pool, s3_client=s3),
+    }
+
+    print(f"{args.rows} employee rows ({os.path.getsize(path) / 1024 ** 2:.0f} MB of CSV), {args.slices} slices")
+    print(f"{'case':<10} {'rows':>9} {'seconds':>8} {'rows/s':>9} {'files':>6} {'staged MB':>10} {'stage s':>8} "
+          f"{'COPY s':>7}")
+    reset_table(pool)
+    start = time.perf_counter()
+    insert_rows(pool, generated_rows(args.insert_rows, args.seed), args.insert_batch)
+    elapsed = time.perf_counter() - start
+    print(f"{'insert':<10} {args.insert_rows:>9} {elapsed:>8.2f} {args.insert_rows / elapsed:>9.0f} {'-':>6} {'-':>10} "
+          f"{'-':>8} {'-':>7}")
+    check(row_count(pool) == args.insert_rows, "insert: rows missing")
+    rates = {"insert": args.insert_rows / elapsed}
+
+    for case, load in loads.items():
+        reset_table(pool)
+        report = load()
+        print(f"{case:<10} {report['rows_loaded']:>9} {report['elapsed_s']:>8.2f} {report['rows_per_second']:>9} "
+              f"{report['files']:>6} {report['staged_bytes'] / 1024 ** 2:>10.1f} {report['stage_s']:>8.2f} "
+              f"{report['copy_s']:>7.2f}")
+        check(report["status"] == "loaded" and not report["errors"], f"{case}: {report['error']} {report['errors']}")
+        check(report["rows"] == report["rows_loaded"] == row_count(pool) == args.rows,
+              f"{case}: {report['rows_loaded']} of {args.rows} rows loaded")
+        check(report["files"] % args.slices == 0, f"{case}: {report['files']} files for {args.slices} slices")
+        check(not s3.objects, f"{case}: {len(s3.objects)} staged objects left behind")
+        rates[case] = args.rows / report["elapsed_s"]
+    print(f"COPY loads {rates['copy-file'] / rates['insert']:.1f}x (file) and {rates['copy-rows'] / rates['insert']:.1f}x "
+          f"(rows) as many rows/s as INSERT")
+
+    error_path = os.path.join(args.data_dir, "employees_with_errors.csv")
+    write_error_file(error_path, 1000, args.seed)
+    for max_errors in [10, 0]:
+        reset_table(pool)
+        report = redshift_copy.load_file(error_path, TABLE, COLUMNS, null_as=DATASET["csv_null"], max_errors=max_errors,
+                                         bucket=BUCKET, pool=pool, s3_client=s3)
+        redshift_copy.print_report(report)
+        rejected = sorted(error["raw_line"] for error in report["errors"])
+        if max_errors:
+            check(rejected == sorted(BAD_ROWS.values()), f"MAXERROR {max_errors}: rejected {rejected}")
+        else:  # The COPY stops at the first bad row
+            check(len(rejected) == 1 and rejected[0] in BAD_ROWS.values(), f"MAXERROR 0: rejected {rejected}")
+        check(all(error["column"] and error["code"] for error in report["errors"]),
+              f"MAXERROR {max_errors}: error details missing")
+        expected = (report["rows"] - len(BAD_ROWS), "loaded") if max_errors else (0, "failed")
+        check((row_count(pool), report["status"]) == expected,
+              f"MAXERROR {max_errors}: {row_count(pool)} rows in the table, {report['status']}")
+    check(s3.objects, "the staged files of the failed load were deleted")
+
+    pool.close()
+    redshift.close()
+    for name in [path, error_path]:
+        os.remove(name)
+    print("✅ Every row loaded with one COPY; bad rows reported with their line and column, MAXERROR respected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmarks redshift_export.py's streaming exports against fetchall, the way view_data.py read the
+employees table, on a local PostgreSQL standing in for the cluster (see bench_redshift_pool.py).
+
+- fetchall: execute, fetchall, then write the CSV
+- stream-csv, stream-ndjson, stream-parquet: export_query through a server-side cursor, --fetch-size
+  rows per batch (Parquet only with pyarrow)
+- parallel-csv: export_table split into --parts key ranges, exported side by side
+
+Each case runs in a fresh process, so its peak RSS is its own. Checks: every case exports every row,
+the CSV exports hold the same rows as the fetchall one, and streaming keeps the peak RSS growth
+under a quarter of fetchall's.
+
+    python benchmarks/bench_redshift_export.py --dsn postgresql://postgres@localhost:5432/postgres --rows 5000000
+"""
+import argparse
+import csv
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from common import add_src_path, current_rss_mb
+
+add_src_path("Week1/Day2/src/Redshift")
+import redshift_db  # noqa: E402
+import redshift_export  # noqa: E402
+
+TABLE = "bench_export_employees"
+SELECT = f"SELECT * FROM {TABLE};"
+
+
+def prepare_table(dsn, rows):
+    pool = redshift_db.ConnectionPool(dsn, max_size=1)
+    with pool.transaction() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE};")
+        cursor.execute(f"CREATE TABLE {TABLE} (id BIGINT, name VARCHAR(100), department VARCHAR(50), "
+                       f"salary DECIMAL(10, 2), hire_date DATE, bonus DOUBLE PRECISION);")
+        cursor.execute(f"INSERT INTO {TABLE} SELECT i, 'Employee ' || i, (ARRAY['IT', 'HR', 'Finance'])[i %% 3 + 1], "
+                       f"50000 + (i %% 50000) / 4.0, DATE '2001-01-01' + (i %% 8000), "
+                       f"CASE WHEN i %% 5 = 0 THEN NULL ELSE i %% 1000 / 8.0 END FROM generate_series(1, %s) AS i;",
+                       (rows,))
+    pool.close()
+
+
+def run_case(case, dsn, output, fetch_size, parts):
+    """Runs in its own process; returns (rows, seconds, peak RSS growth in MB, files)."""
+    import resource
+
+    import psycopg2  # noqa: F401  Imported before the baseline, like pyarrow, so it only counts the rows
+    if case.endswith("parquet"):
+        redshift_export.import_pyarrow()
+    baseline = current_rss_mb()
+    pool = redshift_db.ConnectionPool(dsn, max_size=max(parts, 1))
+    started = time.perf_counter()
+    if case == "fetchall":
+        rows = pool.query(SELECT)
+        columns = [name for name, in pool.query(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = %s ORDER BY ordinal_position;",
+            (TABLE,))]
+        with open(output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(columns)
+            writer.writerows(rows)
+        summary = {"rows": len(rows), "files": [output]}
+    elif case == "parallel-csv":
+        summary = redshift_export.export_table(TABLE, output, key="id", parts=parts, fetch_size=fetch_size, pool=pool)
+    else:
+        summary = redshift_export.export_query(SELECT, output, case.split("-")[1], fetch_size=fetch_size, pool=pool)
+    elapsed = time.perf_counter() - started
+    pool.close()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return summary["rows"], elapsed, peak - baseline, summary["files"]
+
+
+def csv_digest(paths):
+    """Order-independent digest of the data lines of CSV files (headers skipped)."""
+    total = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            next(f)
+            for line in f:
+                total = (total + int.from_bytes(hashlib.md5(line).digest(), "big")) % (1 << 128)
+    return total
+
+
+def parquet_rows(path):
+    import pyarrow.parquet
+    return pyarrow.parquet.ParquetFile(path).metadata.num_rows
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.environ.get("REDSHIFT_BENCH_DSN", "postgresql://postgres@localhost:5432/postgres"))
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--fetch-size", type=int, default=redshift_export.FETCH_SIZE)
+    parser.add_argument("--parts", type=int, default=4)
+    parser.add_argument("--cases", nargs="+",
+                        default=["fetchall", "stream-csv", "stream-ndjson", "stream-parquet", "parallel-csv"])
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "redshift-export-bench"))
+    args = parser.parse_args()
+    os.makedirs(args.data_dir, exist_ok=True)
+    cases = [case for case in args.cases if case != "stream-parquet" or redshift_export.import_pyarrow() is not None]
+
+    prepare_table(args.dsn, args.rows)
+    print(f"{args.rows} rows, {args.fetch_size} rows per fetch")
+    print(f"{'case':<15} {'rows':>9} {'seconds':>8} {'rows/s':>9} {'files':>6} {'MB':>7} {'peak RSS +MB':>13}")
+    results = {}
+    for case in cases:
+        extension = {"ndjson": ".ndjson", "parquet": ".parquet"}.get(case.split("-")[-1], ".csv")
+        output = os.path.join(args.data_dir, case + ("" if case == "parallel-csv" else extension))
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            rows, elapsed, growth, files = executor.submit(run_case, case, args.dsn, output, args.fetch_size,
+                                                           args.parts).result()
+        size = sum(os.path.getsize(path) for path in files)
+        print(f"{case:<15} {rows:>9} {elapsed:>8.2f} {rows / elapsed:>9.0f} {len(files):>6} {size / 1024 ** 2:>7.0f} "
+              f"{growth:>13.1f}")
+        check(rows == args.rows, f"{case}: {rows} of {args.rows} rows exported")
+        if case.endswith("csv") or case == "fetchall":
+            results[case] = (growth, csv_digest(files))
+        elif case == "stream-parquet":
+            check(parquet_rows(output) == args.rows, "stream-parquet: rows missing from the file")
+            results[case] = (growth, None)
+        else:
+            results[case] = (growth, None)
+        shutil.rmtree(output) if os.path.isdir(output) else os.remove(output)
+
+    if "fetchall" in results:
+        fetchall_growth, fetchall_digest = results.pop("fetchall")
+        for case, (growth, digest) in results.items():
+            check(digest is None or digest == fetchall_digest, f"{case}: the rows differ from fetchall's")
+            check(growth < fetchall_growth / 4, f"{case}: peak RSS grew {growth:.0f} MB, fetchall {fetchall_growth:.0f} MB")
+    print("✅ Every row exported; streaming kept memory flat whatever the table size")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmarks redshift_merge.py's incremental refresh against a full reload of the employees table, on a
+local PostgreSQL standing in for the cluster with LocalRedshift of common.py (see bench_redshift_copy.py).
+
+- full: DROP TABLE, CREATE TABLE and a COPY of all --rows rows, as delete_table_data.py followed by
+  create_table.py and a redshift_copy.py load would
+- incremental: upsert_file of a change file into the loaded table; --change-fraction of the rows,
+  half of them changed and half new, plus as many rows sent again unchanged
+
+While each refresh runs, a reader on its own connection looks for a row of the table every 50 ms, and
+the bench reports how often it found the table missing or empty. Checks: the incremental refresh
+reports the rows inserted, updated and left unchanged, the table ends with the expected rows and
+salaries, and its reader always found rows; delete_missing removes the rows missing from a snapshot.
+
+    python benchmarks/bench_redshift_merge.py --dsn postgresql://postgres@localhost:5432/postgres --rows 10000000
+"""
+import argparse
+import csv
+import os
+import tempfile
+import threading
+import time
+
+from common import LocalRedshift, LocalUploadS3, add_src_path
+
+add_src_path("Week1/Day1/src")
+add_src_path("Week1/Day2/src/Redshift")
+import create_file  # noqa: E402
+import redshift_copy  # noqa: E402
+import redshift_db  # noqa: E402
+import redshift_merge  # noqa: E402
+
+TABLE = "bench_merge_employees"
+BUCKET = "redshift-merge-bench"
+DATASET = create_file.DATASETS["employees"]
+COLUMNS = [name.lower() for name, _ in DATASET["columns"]]
+KEY = ["employee_id"]
+CREATE_TABLE = f"""
+CREATE TABLE {TABLE} (
+    employee_id INT, first_name VARCHAR(20), last_name VARCHAR(25), email VARCHAR(25),
+    phone_number VARCHAR(20), hire_date VARCHAR(9), job_id VARCHAR(10), salary INT,
+    commission_pct DECIMAL(2, 2), manager_id INT, department_id INT
+);
+"""
+SALARY = COLUMNS.index("salary")
+
+
+class Reader(threading.Thread):
+    """Reads a row of the table until stopped, counting the reads that found it missing or empty."""
+
+    def __init__(self, dsn):
+        super().__init__(daemon=True)
+        import psycopg2
+        self.connection = psycopg2.connect(dsn)
+        self.connection.autocommit = True
+        self.reads = self.missing = self.empty = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.execute(f"SELECT 1 FROM {TABLE} LIMIT 1;")
+                    self.empty += not cursor.fetchall()
+            except Exception:
+                self.missing += 1
+            self.reads += 1
+            time.sleep(0.05)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.connection.close()
+        return self
+
+    def summary(self):
+        return f"{self.missing} missing, {self.empty} empty of {self.reads}"
+
+
+def write_changes(path, base_path, rows, changes, seed):
+    """
+    Writes a change file: changes / 2 rows from the middle of the table with new values, changes / 2
+    new rows after the last one, and the first `changes` rows of base_path unchanged.
+    Returns (updated ids, the salary total of the changed and new rows).
+    """
+    updates, new = changes // 2, changes - changes // 2
+    updated_ids = set()
+    salaries = 0
+    with open(base_path, newline="", encoding="utf-8") as base, open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        reader = csv.reader(base)
+        writer.writerow(next(reader))
+        for _, row in zip(range(changes), reader):
+            writer.writerow(row)
+        for first_index, count in [(rows // 2, updates), (rows, new)]:
+            for columns in create_file.chunk_rows(DATASET, count, first_index, f"{seed}/changes"):
+                columns[COLUMNS.index("commission_pct")] = [DATASET["csv_null"] if value is None else value
+                                                            for value in columns[COLUMNS.index("commission_pct")]]
+                for row in zip(*columns):
+                    writer.writerow(row)
+                    salaries += row[SALARY]
+                    if first_index < rows:
+                        updated_ids.add(int(row[0]))
+    return updated_ids, salaries
+
+
+def reset_table(pool):
+    with pool.transaction() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE};")
+        cursor.execute(CREATE_TABLE)
+
+
+def totals(pool):
+    return tuple(pool.query(f"SELECT COUNT(*), COALESCE(SUM(salary), 0) FROM {TABLE};")[0])
+
+
+def full_refresh(pool, path, s3):
+    """DROP, CREATE and COPY everything."""
+    started = time.perf_counter()
+    reset_table(pool)
+    report = redshift_copy.load_file(path, TABLE, COLUMNS, null_as=DATASET["csv_null"], bucket=BUCKET, pool=pool,
+                                     s3_client=s3)
+    return time.perf_counter() - started, report
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.environ.get("REDSHIFT_BENCH_DSN", "postgresql://postgres@localhost:5432/postgres"))
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--change-fraction", type=float, default=0.01)
+    parser.add_argument("--slices", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "redshift-merge-bench"))
+    args = parser.parse_args()
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    s3 = LocalUploadS3(keep_bodies=True)
+    redshift = LocalRedshift(args.dsn, s3, args.slices).install()
+    pool = redshift_db.ConnectionPool(args.dsn, max_size=2, connect=redshift.connect)
+    base_path = os.path.join(args.data_dir, "employees.csv")
+    changes_path = os.path.join(args.data_dir, "employees_changes.csv")
+    create_file.create_dataset("employees", base_path, args.rows, "csv", args.seed)
+    changes = max(2, int(args.rows * args.change_fraction))
+    updated_ids, new_salaries = write_changes(changes_path, base_path, args.rows, changes, args.seed)
+    print(f"{args.rows} rows ({os.path.getsize(base_path) / 1024 ** 2:.0f} MB of CSV), {args.slices} slices; "
+          f"change file of {changes * 2} rows ({os.path.getsize(changes_path) / 1024 ** 2:.1f} MB)")
+    print(f"{'refresh':<12} {'rows sent':>10} {'seconds':>8} {'stage s':>8} {'COPY s':>7} {'merge s':>8} "
+          f"{'reader saw':>28}")
+
+    full_refresh(pool, base_path, s3)  # The table as it is before a refresh
+    reader = Reader(args.dsn)
+    reader.start()
+    full_elapsed, report = full_refresh(pool, base_path, s3)
+    reader.stop()
+    check(report["status"] == "loaded" and report["rows_loaded"] == args.rows, f"full: {report['error']}")
+    print(f"{'full':<12} {report['rows']:>10} {full_elapsed:>8.2f} {report['stage_s']:>8.2f} "
+          f"{report['copy_s']:>7.2f} {'-':>8} {reader.summary():>28}")
+
+    _, before_salaries = totals(pool)
+    replaced = pool.query(f"SELECT COALESCE(SUM(salary), 0) FROM {TABLE} WHERE employee_id = ANY(%s);",
+                          (sorted(updated_ids),))[0][0]
+    reader = Reader(args.dsn)
+    reader.start()
+    report = redshift_merge.upsert_file(changes_path, TABLE, KEY, COLUMNS, null_as=DATASET["csv_null"], bucket=BUCKET,
+                                        pool=pool, s3_client=s3)
+    reader.stop()
+    print(f"{'incremental':<12} {report['rows']:>10} {report['elapsed_s']:>8.2f} {report['stage_s']:>8.2f} "
+          f"{report['copy_s']:>7.2f} {report['merge_s']:>8.2f} {reader.summary():>28}")
+    redshift_merge.print_report(report)
+    print(f"Incremental refresh: {full_elapsed / report['elapsed_s']:.1f}x faster than the full reload")
+
+    expected = (args.rows + changes - len(updated_ids), before_salaries - replaced + new_salaries)
+    check(report["status"] == "merged", f"incremental: {report['error']}")
+    check((report["inserted"], report["updated"], report["unchanged"]) ==
+          (changes - len(updated_ids), len(updated_ids), changes),
+          f"incremental: {report['inserted']} inserted, {report['updated']} updated, {report['unchanged']} unchanged")
+    check(totals(pool) == expected, f"incremental: (rows, salaries) {totals(pool)}, expected {expected}")
+    check(not reader.missing and not reader.empty, f"incremental: the reader found {reader.summary()} reads")
+
+    # A snapshot of the first rows only: delete_missing removes every other row
+    kept = 1000
+    snapshot = pool.query(f"SELECT {', '.join(COLUMNS)} FROM {TABLE} ORDER BY employee_id LIMIT %s;", (kept,))
+    report = redshift_merge.upsert_rows(snapshot, TABLE, KEY, COLUMNS, delete_missing=True, bucket=BUCKET, pool=pool,
+                                        s3_client=s3)
+    redshift_merge.print_report(report)
+    check(report["status"] == "merged" and report["unchanged"] == kept and report["deleted"] == expected[0] - kept,
+          f"delete_missing: {report['deleted']} deleted, {report['unchanged']} unchanged")
+    check(totals(pool)[0] == kept, f"delete_missing: {totals(pool)[0]} rows left, expected {kept}")
+    check(not s3.objects, f"{len(s3.objects)} staged objects left behind")
+
+    pool.close()
+    redshift.close()
+    for name in [base_path, changes_path]:
+        os.remove(name)
+    print("✅ Only changed rows rewritten, in one transaction; readers never found the table missing or empty")
+
+
+if __name__ == "__main__":
+    main()
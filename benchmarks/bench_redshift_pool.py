@@ -0,0 +1,152 @@
+"""
+Benchmarks redshift_db.py's ConnectionPool against opening a connection per query, the way the
+Redshift scripts used to, on a local PostgreSQL standing in for the cluster (same protocol and
+driver). Start one with e.g. docker run -e POSTGRES_HOST_AUTH_METHOD=trust -p 5432:5432 postgres.
+
+A connection to a real cluster costs a TLS handshake and authentication over the network;
+--connect-latency seconds are added to every connect to stand in for them.
+
+- per-query: psycopg2.connect, query, close, as create_table.py and friends did
+- pool: get a pooled connection, query, return it
+
+Each case runs --queries primary-key lookups on a small employees table from --threads threads and
+reports queries/s, latency percentiles and connections opened. A final check terminates every pooled
+connection on the server while idle and confirms the pool's health checks replace them with no
+failed query.
+
+    python benchmarks/bench_redshift_pool.py --dsn postgresql://postgres@localhost:5432/postgres --threads 1 8 32
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import add_src_path, percentile
+
+add_src_path("Week1/Day2/src/Redshift")
+import redshift_db  # noqa: E402
+
+TABLE = "bench_pool_employees"
+ROWS = 1000
+LOOKUP = f"SELECT id, name, department, salary FROM {TABLE} WHERE id = %s;"
+
+
+def latency_connect(latency):
+    """psycopg2.connect, plus `latency` seconds for the handshake with a remote cluster."""
+    import psycopg2
+
+    def connect(*args, **kwargs):
+        time.sleep(latency)
+        return psycopg2.connect(*args, **kwargs)
+    return connect
+
+
+def prepare_table(dsn):
+    pool = redshift_db.ConnectionPool(dsn, max_size=1)
+    with pool.transaction() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE};")
+        cursor.execute(f"CREATE TABLE {TABLE} (id INT PRIMARY KEY, name VARCHAR(100), department VARCHAR(50), "
+                       f"salary DECIMAL(10, 2));")
+        cursor.executemany(f"INSERT INTO {TABLE} VALUES (%s, %s, %s, %s);",
+                           [(i, f"Employee {i}", random.choice(["IT", "HR", "Finance"]), 50000 + i) for i in range(ROWS)])
+    pool.close()
+
+
+def run_case(case, dsn, connect, queries, threads):
+    """Returns (seconds, per-query latencies, connections opened, failed queries)."""
+    pool = redshift_db.ConnectionPool(dsn, max_size=threads, connect=connect) if case == "pool" else None
+    opened = [0]
+
+    def lookup(employee_id):
+        started = time.perf_counter()
+        try:
+            if pool:
+                row = pool.query(LOOKUP, (employee_id,))
+            else:
+                connection = connect(dsn)
+                opened[0] += 1
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(LOOKUP, (employee_id,))
+                        row = cursor.fetchall()
+                finally:
+                    connection.close()
+            return time.perf_counter() - started, len(row) == 1
+        except Exception:
+            return time.perf_counter() - started, False
+
+    ids = [random.randrange(ROWS) for _ in range(queries)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lookup, ids))
+    elapsed = time.perf_counter() - started
+    if pool:
+        opened[0] = pool.stats()["connects"]
+        pool.close()
+    return elapsed, [latency for latency, _ in results], opened[0], sum(not ok for _, ok in results)
+
+
+def check_health_checks(dsn, connect, threads):
+    """Drops the pool's idle connections on the server side, then checks no query fails."""
+    import psycopg2
+    pool = redshift_db.ConnectionPool(dsn, max_size=threads, connect=connect, health_check_idle=0,
+                                      application_name="bench_redshift_pool")
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda i: pool.query(LOOKUP, (i,)), range(threads * 4)))
+    before = pool.stats()
+    admin = psycopg2.connect(dsn)
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE application_name = %s;",
+                       ("bench_redshift_pool",))
+        terminated = cursor.rowcount
+    admin.close()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        rows = list(executor.map(lambda i: pool.query(LOOKUP, (i,)), range(threads * 4)))
+    after = pool.stats()
+    pool.close()
+    return terminated, after["discarded"] - before["discarded"], after["connects"] - before["connects"], len(rows)
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.environ.get("REDSHIFT_BENCH_DSN", "postgresql://postgres@localhost:5432/postgres"))
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--connect-latency", type=float, default=0.05, help="Seconds added to every connect")
+    parser.add_argument("--cases", nargs="+", default=["per-query", "pool"])
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    connect = latency_connect(args.connect_latency)
+
+    prepare_table(args.dsn)
+    print(f"{args.queries} lookups per case, {args.connect_latency * 1000:.0f} ms added per connect")
+    print(f"{'case':<10} {'threads':>8} {'seconds':>8} {'queries/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'connects':>9}")
+    for threads in args.threads:
+        for case in args.cases:
+            elapsed, latencies, opened, failed = run_case(case, args.dsn, connect, args.queries, threads)
+            print(f"{case:<10} {threads:>8} {elapsed:>8.2f} {args.queries / elapsed:>10.1f} "
+                  f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} "
+                  f"{percentile(latencies, 99) * 1000:>8.1f} {opened:>9}")
+            check(not failed, f"{case} with {threads} threads: {failed} queries failed")
+            if case == "pool":
+                check(opened <= threads, f"the pool opened {opened} connections for {threads} threads")
+
+    threads = max(args.threads)
+    terminated, discarded, reconnected, answered = check_health_checks(args.dsn, connect, threads)
+    print(f"Health checks: {terminated} connections terminated on the server, {discarded} discarded by the pool, "
+          f"{reconnected} reopened, {answered} queries answered afterwards")
+    check(terminated > 0 and discarded == terminated, "the pool did not replace every terminated connection")
+    print("✅ Every query answered; the pool never opened more connections than threads")
+
+
+if __name__ == "__main__":
+    main()
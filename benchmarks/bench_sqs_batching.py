@@ -0,0 +1,111 @@
+"""
+Compares the two ingest topologies on a burst of small uploads, with lambda_handler run in-process
+against the local stand-ins from common.py:
+
+- direct: setup_s3_trigger.py, one S3 event (and invocation) per object, unsupported files included
+- sqs: setup_sqs_trigger.py, only loadable keys are queued and each invocation gets a batch of
+  --batch-size messages, whose small objects are loaded together
+
+Reports invocations, wall time, DynamoDB requests and how full the BatchWriteItem calls were:
+
+    python benchmarks/bench_sqs_batching.py --objects 1000 --rows-per-object 40 --junk 0.1
+"""
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import time
+
+from bench_pipeline import BUCKET, KEY_PREFIX, prepare_inputs
+from common import LocalDynamoDBClient, LocalFileS3, QueueingLambdaClient, add_src_path, s3_event
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+def sqs_message(message_id, key, size):
+    """Wraps an S3 notification for one object in an SQS message, as the event source mapping delivers it."""
+    notification = s3_event(BUCKET, key)
+    notification["Records"][0]["eventName"] = "ObjectCreated:Put"
+    notification["Records"][0]["s3"]["object"]["size"] = size
+    return {"messageId": message_id, "eventSource": "aws:sqs", "body": json.dumps(notification)}
+
+
+def run(topology, files, batch_size):
+    """Loads every object through `topology` and returns the invocation and request counts."""
+    s3 = lambda_function.clients["s3"] = LocalFileS3(files)
+    dynamodb = lambda_function.clients["dynamodb"] = LocalDynamoDBClient(
+        {lambda_function.TABLE_NAME: "EMPLOYEE_ID", lambda_function.CHECKPOINT_TABLE_NAME: "OBJECT_ID"},
+        discard=[lambda_function.TABLE_NAME]
+    )
+    lambda_function.clients[lambda_function.LOAD_CLIENT] = dynamodb
+    lambda_client = lambda_function.clients["lambda"] = QueueingLambdaClient()
+
+    if topology == "direct":
+        events = [s3_event(BUCKET, key) for key in files]
+    else:
+        # The notification's suffix filters keep files the Lambda cannot load out of the queue
+        loadable = [key for key in files
+                    if lambda_function.detect_file_format(lambda_function.detect_compression(key)[1]) is not None]
+        messages = [sqs_message(f"m{index}", key, os.path.getsize(files[key])) for index, key in enumerate(loadable)]
+        events = [{"Records": messages[start:start + batch_size]} for start in range(0, len(messages), batch_size)]
+
+    invocations, retried = 0, 0
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        while events:
+            invocations += 1
+            response = lambda_function.lambda_handler(events.pop(0), None)
+            retried += len(response.get("batchItemFailures", []))
+            events.extend(lambda_client.queued)
+            lambda_client.queued.clear()
+    elapsed = time.perf_counter() - start
+
+    batch_writes = dynamodb.requests.get("BatchWriteItem", 0)
+    return {
+        "invocations": invocations,
+        "elapsed_s": elapsed,
+        "items": dynamodb.items,
+        "batch_writes": batch_writes,
+        "items_per_batch": dynamodb.items / batch_writes if batch_writes else 0,
+        "dynamodb_requests": sum(dynamodb.requests.values()),
+        "s3_requests": sum(s3.requests.values()),
+        "retried_messages": retried,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=1000, help="Loadable objects in the burst")
+    parser.add_argument("--rows-per-object", type=int, default=40)
+    parser.add_argument("--junk", type=float, default=0.1, help="Extra unsupported files, as a fraction of --objects")
+    parser.add_argument("--format", default="csv", choices=["csv", "json", "ndjson", "csv.gz", "ndjson.gz"])
+    parser.add_argument("--batch-size", type=int, default=100, help="SQS messages per invocation")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "etl-pipeline-bench"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    files = prepare_inputs(args.data_dir, args.format, args.objects * args.rows_per_object, args.objects, args.seed)
+    for index in range(int(args.objects * args.junk)):
+        path = os.path.join(args.data_dir, f"upload-{index:04d}.txt")
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                f.write("not an employee file\n")
+        files[f"{KEY_PREFIX}upload-{index:04d}.txt"] = path
+    lambda_function.create_write_limiter = lambda: lambda_function.WriteRateLimiter(None)
+
+    print(f"{len(files)} objects ({args.objects} x {args.rows_per_object} rows of {args.format}, "
+          f"{len(files) - args.objects} unsupported), SQS batches of {args.batch_size}")
+    print(f"{'topology':<9} {'invocations':>11} {'seconds':>8} {'items':>8} {'BatchWriteItem':>15} "
+          f"{'items/batch':>12} {'DynamoDB reqs':>14} {'S3 reqs':>8} {'retried':>8}")
+    for topology in ("direct", "sqs"):
+        result = run(topology, files, args.batch_size)
+        print(f"{topology:<9} {result['invocations']:>11} {result['elapsed_s']:>8.2f} {result['items']:>8} "
+              f"{result['batch_writes']:>15} {result['items_per_batch']:>12.1f} {result['dynamodb_requests']:>14} "
+              f"{result['s3_requests']:>8} {result['retried_messages']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Checks that the S3 -> DynamoDB Lambda keeps a flat memory profile on very large CSV objects.
+
+Run it against a local S3 stand-in (moto_server, MinIO, LocalStack...) by pointing boto3 at it:
+
+    AWS_ENDPOINT_URL_S3=http://localhost:5000 AWS_DEFAULT_REGION=us-east-1 \
+        python benchmarks/bench_streaming_memory.py --size-gb 2
+
+DynamoDB writes are counted, discarded and not paced, so the run measures the extract/transform path only.
+"""
+import argparse
+import contextlib
+import os
+import time
+
+import boto3
+
+from common import NullDynamoDBClient, RssSampler, SyntheticCsvStream, add_src_path, current_rss_mb
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bucket", default="etl-bench")
+    parser.add_argument("--key", default="bench/employees_large.csv")
+    parser.add_argument("--size-gb", type=float, default=2.0)
+    parser.add_argument("--skip-upload", action="store_true", help="Reuse an object uploaded by a previous run")
+    args = parser.parse_args()
+
+    s3 = boto3.client("s3")
+    if not args.skip_upload:
+        with contextlib.suppress(s3.exceptions.BucketAlreadyOwnedByYou):
+            s3.create_bucket(Bucket=args.bucket)
+        stream = SyntheticCsvStream(int(args.size_gb * 1024 ** 3))
+        print(f"Uploading {args.size_gb} GB synthetic object to s3://{args.bucket}/{args.key} ...")
+        s3.upload_fileobj(stream, args.bucket, args.key)
+        print(f"Uploaded {stream.produced / 1024 ** 2:.0f} MB ({stream.rows} rows)")
+
+    client = lambda_function.clients["dynamodb"] = NullDynamoDBClient()
+    lambda_function.clients[lambda_function.LOAD_CLIENT] = client
+    lambda_function.create_write_limiter = lambda: lambda_function.WriteRateLimiter(None)
+    event = {"Records": [{"s3": {"bucket": {"name": args.bucket}, "object": {"key": args.key}}}]}
+
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    # Per-row log lines go to /dev/null so they neither flood the terminal nor accumulate in memory
+    with RssSampler() as sampler, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        lambda_function.lambda_handler(event, None)
+    elapsed = time.perf_counter() - start
+
+    rows = client.items
+    samples = [rss for _, rss in sampler.samples]
+    print(f"Rows loaded:      {rows}")
+    print(f"Elapsed:          {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s)")
+    print(f"Baseline RSS:     {baseline:.1f} MB")
+    print(f"RSS during run:   min {min(samples):.1f} MB / max {max(samples):.1f} MB")
+    print(f"RSS growth:       {sampler.peak_mb - baseline:.1f} MB")
+    print("RSS samples (MB): " + " ".join(f"{rss:.0f}" for rss in samples[:: max(1, len(samples) // 20)]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmarks sync_directory.py on a large tree (100k small files by default) against LocalUploadS3 from
+common.py, which starts out holding a copy of the tree from an earlier sync. Before each run the copy
+is made stale: --changed of the objects are older than their edited files, --added of the files have
+no object yet and --removed as many objects have no file any more.
+
+Reported per comparison mode: seconds, requests by operation, files uploaded and deleted. Each run is
+checked, and a second sync right after it has to find nothing to do. The first run is given the prefix
+without its trailing "/", and must neither upload outside the folder nor delete the object next to it
+or a folder marker. --naive also times uploading
+every file again, as upload_object would.
+
+    python benchmarks/bench_sync.py --files 100000 --changed 0.01
+"""
+import argparse
+import contextlib
+import hashlib
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from common import LocalUploadS3, add_src_path, employee_csv_line
+
+add_src_path("Week1/Day1/src")
+import sync_directory  # noqa: E402
+from multipart_upload import upload_file  # noqa: E402
+
+BUCKET = "etl-sync-bench"
+PREFIX = "bench/sync/"
+# Keys the sync must leave alone: a folder marker under the prefix, and an object next to the folder
+# that a prefix without its trailing "/" also matches
+KEPT_KEYS = [f"{PREFIX}archive/", f"{PREFIX.rstrip('/')}-backup/employees.csv"]
+FILES_PER_DIRECTORY = 1000
+
+
+def build_tree(directory, files, seed):
+    """Writes `files` small employee CSV files under `directory`, unless the tree is already there."""
+    marker = directory + ".complete"
+    if os.path.exists(marker):
+        return
+    rng = random.Random(seed)
+    for index in range(files):
+        subdirectory = os.path.join(directory, f"d{index // FILES_PER_DIRECTORY:04d}")
+        if index % FILES_PER_DIRECTORY == 0:
+            os.makedirs(subdirectory, exist_ok=True)
+        with open(os.path.join(subdirectory, f"employees-{index:06d}.csv"), "w") as f:
+            f.write("".join(employee_csv_line(index * 3 + row, rng) for row in range(3)))
+    open(marker, "w").close()
+
+
+def synced_copy(local, args):
+    """Returns a stand-in holding the tree as an earlier sync left it, made stale as described above."""
+    s3 = LocalUploadS3(latency=args.latency)
+    rng = random.Random(args.seed)
+    relatives = sorted(local)
+    changed = set(rng.sample(relatives, int(len(relatives) * args.changed)))
+    added = set(rng.sample(sorted(set(relatives) - changed), int(len(relatives) * args.added)))
+    synced_at = datetime.now(timezone.utc)
+    for relative in relatives:
+        if relative in added:
+            continue
+        path, size, mtime = local[relative]
+        if relative in changed:
+            # Uploaded before the file was edited: same size, older content
+            s3.add_object(BUCKET, PREFIX + relative, size, '"0123456789abcdef0123456789abcdef"',
+                          datetime.fromtimestamp(mtime, timezone.utc) - timedelta(hours=1))
+        else:
+            with open(path, "rb") as f:
+                s3.add_object(BUCKET, PREFIX + relative, size, f'"{hashlib.md5(f.read()).hexdigest()}"', synced_at)
+    removed = int(len(relatives) * args.removed)
+    for index in range(removed):
+        s3.add_object(BUCKET, f"{PREFIX}removed/employees-{index:06d}.csv", 100, '"0"', synced_at)
+    for key in KEPT_KEYS:
+        s3.add_object(BUCKET, key, 0 if key.endswith("/") else 100, '"0"', synced_at)
+    return s3, len(changed) + len(added), removed
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"❌ {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--changed", type=float, default=0.01, help="Fraction of files edited since the last sync")
+    parser.add_argument("--added", type=float, default=0.002, help="Fraction of files new since the last sync")
+    parser.add_argument("--removed", type=float, default=0.002, help="Objects whose files were deleted, as a fraction")
+    parser.add_argument("--workers", type=int, default=sync_directory.SYNC_WORKERS)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every request")
+    parser.add_argument("--naive", action="store_true", help="Also time uploading every file again")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "etl-sync-bench"))
+    args = parser.parse_args()
+
+    directory = os.path.join(args.data_dir, f"tree-{args.files}-{args.seed}")
+    os.makedirs(directory, exist_ok=True)
+    build_tree(directory, args.files, args.seed)
+    start = time.perf_counter()
+    local = sync_directory.scan_local(directory)
+    print(f"{len(local)} files scanned in {time.perf_counter() - start:.2f} s; "
+          f"{args.latency * 1000:.0f} ms per request, {args.workers} workers")
+    print(f"{'compare':<11} {'seconds':>8} {'uploaded':>9} {'deleted':>8} {'unchanged':>10} {'requests':>9}  by operation")
+
+    for compare in sync_directory.COMPARE_MODES:
+        s3, expected_uploads, expected_deletes = synced_copy(local, args)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            summary = sync_directory.sync_directory(s3, directory, BUCKET, PREFIX.rstrip("/"), compare, delete=True,
+                                                    workers=args.workers)
+        operations = ", ".join(f"{name} {count}" for name, count in sorted(s3.requests.items()))
+        print(f"{compare:<11} {summary['elapsed_s']:>8.2f} {summary['uploaded']:>9} {summary['deleted']:>8} "
+              f"{summary['unchanged']:>10} {sum(s3.requests.values()):>9}  {operations}")
+        check(summary["uploaded"] == expected_uploads, f"{compare}: uploaded {summary['uploaded']}, "
+                                                       f"expected {expected_uploads}")
+        check(summary["deleted"] == expected_deletes, f"{compare}: deleted {summary['deleted']}, "
+                                                      f"expected {expected_deletes}")
+        again = sync_directory.sync_directory(s3, directory, BUCKET, PREFIX, compare, delete=True,
+                                              workers=args.workers)
+        check(again["to_upload"] == 0 and again["to_delete"] == 0, f"{compare}: a second sync found changes")
+        check(all((BUCKET, key) in s3.objects for key in KEPT_KEYS), f"{compare}: deleted a key outside the folder "
+                                                                   f"or a folder marker")
+
+    if args.naive:
+        s3 = LocalUploadS3(latency=args.latency)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            list(executor.map(lambda relative: upload_file(s3, local[relative][0], BUCKET, PREFIX + relative),
+                              local))
+        print(f"{'re-upload':<11} {time.perf_counter() - start:>8.2f} {len(local):>9} {0:>8} {0:>10} "
+              f"{sum(s3.requests.values()):>9}")
+    print("✅ Only new and changed files were uploaded, and a second sync found nothing to do")
+
+
+if __name__ == "__main__":
+    main()
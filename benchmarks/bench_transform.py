@@ -0,0 +1,162 @@
+"""
+Micro-benchmark of the ETL Lambda's transform stage: CPU time per row to turn parsed CSV/JSON rows into items.
+
+- the hand-written converters the Lambda used before EMPLOYEE_SCHEMA (kept below as the baseline),
+  with csv.DictReader and the per-row print going to /dev/null
+- process_csv / process_json with the compiled per-row converters
+- process_csv with the batch converter (one call per TRANSFORM_BATCH_SIZE rows)
+
+CSV is timed from decoded lines, JSON from already parsed objects. Runs locally, no AWS endpoint needed:
+
+    python benchmarks/bench_transform.py --rows 200000
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import random
+import time
+from decimal import Decimal
+
+from common import EMPLOYEE_HEADER, add_src_path, employee_csv_line, employee_record
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+def legacy_csv(lines):
+    """process_csv as it was before the schema."""
+    for row in csv.DictReader(lines):
+        salary_str = row["SALARY"].strip()
+        if salary_str in ["", "-"]:
+            salary = Decimal("0")
+        else:
+            try:
+                salary = Decimal(salary_str)
+            except Exception as e:
+                print(f"Error converting SALARY value '{salary_str}': {e}")
+                salary = Decimal("0")
+        commission_str = row["COMMISSION_PCT"].strip()
+        if commission_str in ["", "-"]:
+            commission_pct = Decimal("0")
+        else:
+            try:
+                commission_pct = Decimal(commission_str)
+            except Exception as e:
+                print(f"Error converting COMMISSION_PCT value '{commission_str}': {e}")
+                commission_pct = Decimal("0")
+        transformed_record = {
+            "EMPLOYEE_ID": row["EMPLOYEE_ID"],
+            "FIRST_NAME": row["FIRST_NAME"],
+            "LAST_NAME": row["LAST_NAME"],
+            "EMAIL": row["EMAIL"],
+            "PHONE_NUMBER": row["PHONE_NUMBER"],
+            "HIRE_DATE": row["HIRE_DATE"],
+            "JOB_ID": row["JOB_ID"],
+            "SALARY": salary,
+            "COMMISSION_PCT": commission_pct,
+            "MANAGER_ID": row["MANAGER_ID"],
+            "DEPARTMENT_ID": row["DEPARTMENT_ID"]
+        }
+        print("Row read from CSV:", row)
+        yield transformed_record
+
+
+def legacy_csv_quiet(lines):
+    """legacy_csv with the per-row print removed, to separate its cost from the conversion itself."""
+    for row in csv.DictReader(lines):
+        salary_str = row["SALARY"].strip()
+        salary = Decimal("0") if salary_str in ["", "-"] else Decimal(salary_str)
+        commission_str = row["COMMISSION_PCT"].strip()
+        commission_pct = Decimal("0") if commission_str in ["", "-"] else Decimal(commission_str)
+        yield {
+            "EMPLOYEE_ID": row["EMPLOYEE_ID"],
+            "FIRST_NAME": row["FIRST_NAME"],
+            "LAST_NAME": row["LAST_NAME"],
+            "EMAIL": row["EMAIL"],
+            "PHONE_NUMBER": row["PHONE_NUMBER"],
+            "HIRE_DATE": row["HIRE_DATE"],
+            "JOB_ID": row["JOB_ID"],
+            "SALARY": salary,
+            "COMMISSION_PCT": commission_pct,
+            "MANAGER_ID": row["MANAGER_ID"],
+            "DEPARTMENT_ID": row["DEPARTMENT_ID"]
+        }
+
+
+def legacy_json(objects):
+    """process_json as it was before the schema."""
+    for item in objects:
+        try:
+            salary = Decimal(str(item.get("SALARY", "0")))
+        except Exception as e:
+            print(f"Error converting SALARY: {e}")
+            salary = Decimal("0")
+        try:
+            commission_pct = Decimal(str(item.get("COMMISSION_PCT", "0")))
+        except Exception as e:
+            print(f"Error converting COMMISSION_PCT: {e}")
+            commission_pct = Decimal("0")
+        yield {
+            "EMPLOYEE_ID": item.get("EMPLOYEE_ID", "Unknown"),
+            "FIRST_NAME": item.get("FIRST_NAME", ""),
+            "LAST_NAME": item.get("LAST_NAME", ""),
+            "EMAIL": item.get("EMAIL", ""),
+            "PHONE_NUMBER": item.get("PHONE_NUMBER", ""),
+            "HIRE_DATE": item.get("HIRE_DATE", ""),
+            "JOB_ID": item.get("JOB_ID", ""),
+            "SALARY": salary,
+            "COMMISSION_PCT": commission_pct,
+            "MANAGER_ID": item.get("MANAGER_ID", ""),
+            "DEPARTMENT_ID": item.get("DEPARTMENT_ID", "")
+        }
+
+
+def timed(label, rows, func, *args, repeat=3):
+    best = None
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.process_time()
+            for _ in func(*args):
+                pass
+            elapsed = time.process_time() - start
+            best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<28} {best / rows * 1e6:8.2f} us/row {rows / best:12,.0f} rows/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lines = [EMPLOYEE_HEADER] + [employee_csv_line(i, rng) for i in range(1, args.rows + 1)]
+    objects = [json.loads(json.dumps(employee_record(i, rng))) for i in range(1, args.rows + 1)]
+    batch_size = lambda_function.TRANSFORM_BATCH_SIZE
+
+    # Every converter must produce the same items
+    sample = lines[:1000]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        assert list(legacy_csv(sample)) == list(lambda_function.process_csv(sample)) \
+            == list(lambda_function.process_csv(sample, batch_size))
+        assert list(legacy_json(objects[:1000])) == list(lambda_function.process_json(objects[:1000]))
+
+    print(f"CSV, {args.rows} rows")
+    baseline = timed("hand-written + print (old)", args.rows, legacy_csv, lines)
+    quiet = timed("hand-written, no print", args.rows, legacy_csv_quiet, lines)
+    compiled = timed("compiled per row", args.rows, lambda_function.process_csv, lines)
+    columnar = timed(f"compiled batch x{batch_size}", args.rows, lambda_function.process_csv, lines, batch_size)
+    print(f"Speed-up vs old: {baseline / compiled:.1f}x per row, {baseline / columnar:.1f}x batched "
+          f"({quiet / compiled:.1f}x / {quiet / columnar:.1f}x against the old code without its print)")
+
+    print(f"JSON, {args.rows} objects")
+    baseline = timed("hand-written (old)", args.rows, legacy_json, objects)
+    compiled = timed("compiled per object", args.rows, lambda_function.process_json, objects)
+    print(f"Speed-up vs old: {baseline / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,840 @@
+import base64
+import bisect
+import csv
+import gzip
+import hashlib
+import io
+import json
+import re
+import math
+import os
+import sys
+import threading
+import time
+import random
+import zlib
+from datetime import datetime, timezone
+
+# Repository root, used to import the scripts under WeekN/DayN/src
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EMPLOYEE_HEADER = "EMPLOYEE_ID,FIRST_NAME,LAST_NAME,EMAIL,PHONE_NUMBER,HIRE_DATE,JOB_ID,SALARY,COMMISSION_PCT,MANAGER_ID,DEPARTMENT_ID\n"
+FIRST_NAMES = ["Donald", "Douglas", "Jennifer", "Michael", "Pat", "Susan", "Hermann", "Shelley", "William", "Steven"]
+LAST_NAMES = ["OConnell", "Grant", "Whalen", "Hartstein", "Fay", "Mavris", "Baer", "Higgins", "Gietz", "King"]
+JOB_IDS = ["SH_CLERK", "AD_ASST", "MK_MAN", "MK_REP", "HR_REP", "PR_REP", "AC_MGR", "AC_ACCOUNT", "AD_PRES", "SA_REP"]
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+
+def add_src_path(relative_path):
+    """Makes a WeekN/DayN/src directory importable, e.g. add_src_path("Week2/Day2/src")."""
+    path = os.path.join(REPO_ROOT, relative_path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def employee_record(employee_id, rng):
+    """Builds one employee as a dict of strings, shaped like a row of Week2/Day2/Data/employees.csv."""
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    return {
+        "EMPLOYEE_ID": str(employee_id),
+        "FIRST_NAME": first,
+        "LAST_NAME": last,
+        "EMAIL": (first[0] + last).upper()[:8],
+        "PHONE_NUMBER": f"{rng.randint(100, 999)}.{rng.randint(100, 999)}.{rng.randint(1000, 9999)}",
+        "HIRE_DATE": f"{rng.randint(1, 28):02d}-{rng.choice(MONTHS)}-{rng.randint(0, 9):02d}",
+        "JOB_ID": rng.choice(JOB_IDS),
+        "SALARY": str(rng.randint(21, 240) * 100),
+        "COMMISSION_PCT": " - " if rng.random() < 0.7 else f"{rng.randint(1, 4) / 10:.1f}",
+        "MANAGER_ID": str(rng.randint(100, 205)),
+        "DEPARTMENT_ID": str(rng.randint(1, 11) * 10),
+    }
+
+
+def employee_csv_line(employee_id, rng):
+    """Builds one CSV line shaped like Week2/Day2/Data/employees.csv."""
+    return ",".join(employee_record(employee_id, rng).values()) + "\n"
+
+
+class SyntheticCsvStream:
+    """
+    Read-only file-like object that generates employee CSV rows on demand until `total_bytes`
+    have been produced, so multi-GB objects can be uploaded without holding them in memory.
+    """
+
+    def __init__(self, total_bytes, seed=42):
+        self.total_bytes = total_bytes
+        self.produced = 0
+        self.rows = 0
+        self._rng = random.Random(seed)
+        self._buffer = EMPLOYEE_HEADER.encode("utf-8")
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.total_bytes
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while length < size and self.produced + length < self.total_bytes:
+            self.rows += 1
+            line = employee_csv_line(self.rows, self._rng).encode("utf-8")
+            parts.append(line)
+            length += len(line)
+        buffer = b"".join(parts)
+        data, self._buffer = buffer[:size], buffer[size:]
+        self.produced += len(data)
+        return data
+
+
+def current_rss_mb():
+    """Returns the resident set size of this process in MB (Linux /proc, with a getrusage fallback)."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler:
+    """Samples RSS on a background thread while used as a context manager."""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append((time.perf_counter(), current_rss_mb()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.samples.append((time.perf_counter(), current_rss_mb()))
+
+    @property
+    def peak_mb(self):
+        return max(rss for _, rss in self.samples)
+
+
+class FakeLambdaContext:
+    """Minimal stand-in for the Lambda context object with a wall-clock deadline."""
+
+    def __init__(self, timeout_ms, function_name="S3ToDynamoDBLambda"):
+        self.function_name = function_name
+        self.invoked_function_arn = f"arn:aws:lambda:us-east-1:000000000000:function:{function_name}"
+        self._deadline = time.monotonic() + timeout_ms / 1000
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def ensure_table(dynamodb_client, table_name, key_name):
+    """Creates an on-demand table with a string hash key on the local endpoint if it is missing."""
+    if table_name not in dynamodb_client.list_tables()["TableNames"]:
+        dynamodb_client.create_table(
+            TableName=table_name,
+            KeySchema=[{"AttributeName": key_name, "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": key_name, "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        dynamodb_client.get_waiter("table_exists").wait(TableName=table_name)
+
+
+def s3_event(bucket, key, etag=None):
+    """Builds an S3 ObjectCreated event with a single record, as delivered to the Lambda."""
+    s3_object = {"key": key}
+    if etag:
+        s3_object["eTag"] = etag.strip('"')
+    return {"Records": [{"eventSource": "aws:s3", "s3": {"bucket": {"name": bucket}, "object": s3_object}}]}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values`, e.g. percentile(latencies, 99); None when there are no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class RequestCounter:
+    """Base for the local stand-ins below: counts the API operations they are called with."""
+
+    def __init__(self):
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def count(self, operation):
+        with self._lock:
+            self.requests[operation] = self.requests.get(operation, 0) + 1
+
+
+class NullDynamoDBClient(RequestCounter):
+    """Stands in for the DynamoDB client and only counts the items it receives."""
+
+    def __init__(self):
+        super().__init__()
+        self.items = 0
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self.count("BatchWriteItem")
+        with self._lock:
+            self.items += sum(len(requests) for requests in RequestItems.values())
+        return {"UnprocessedItems": {}}
+
+
+class LocalDynamoDBClient(NullDynamoDBClient):
+    """
+    Stands in for the DynamoDB client with on-demand tables kept in memory; `key_names` maps each
+    table to its hash key. Items of the tables in `discard` (typically the 10M-row Employees table)
+    are only counted, so the stand-in does not inflate the memory of the process being measured.
+    With `key_types` (table -> "S", "N" or "B"), writes whose hash key has another attribute type
+    are rejected with a ValidationException, as DynamoDB does.
+    """
+
+    def __init__(self, key_names, discard=(), key_types=None):
+        super().__init__()
+        self.key_names = key_names
+        self.discard = set(discard)
+        self.key_types = key_types or {}
+        self.tables = {}
+
+    def _key(self, table_name, item):
+        return json.dumps(item[self.key_names[table_name]], sort_keys=True)
+
+    def _check_key(self, table_name, item):
+        expected = self.key_types.get(table_name)
+        actual = next(iter(item[self.key_names[table_name]]))
+        if expected and actual != expected:
+            raise LocalS3Error("ValidationException", f"One or more parameter values were invalid: Type mismatch "
+                                                      f"for key {self.key_names[table_name]} expected: {expected} "
+                                                      f"actual: {actual}")
+
+    def _store(self, table_name, item):
+        if table_name not in self.discard:
+            with self._lock:
+                self.tables.setdefault(table_name, {})[self._key(table_name, item)] = item
+
+    def describe_table(self, TableName, **kwargs):
+        self.count("DescribeTable")
+        return {"Table": {"TableName": TableName, "BillingModeSummary": {"BillingMode": "PAY_PER_REQUEST"}}}
+
+    def get_item(self, TableName, Key, **kwargs):
+        self.count("GetItem")
+        item = self.tables.get(TableName, {}).get(self._key(TableName, Key))
+        return {"Item": item} if item else {}
+
+    def put_item(self, TableName, Item, **kwargs):
+        self.count("PutItem")
+        self._check_key(TableName, Item)
+        if TableName in self.discard:
+            with self._lock:
+                self.items += 1
+        self._store(TableName, Item)
+        return {}
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        for table_name, requests in RequestItems.items():
+            for request in requests:
+                self._check_key(table_name, request["PutRequest"]["Item"])
+        for table_name, requests in RequestItems.items():
+            for request in requests:
+                self._store(table_name, request["PutRequest"]["Item"])
+        return super().batch_write_item(RequestItems, **kwargs)
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self.count("BatchGetItem")
+        responses = {}
+        for table_name, request in RequestItems.items():
+            stored = self.tables.get(table_name, {})
+            found = [stored.get(self._key(table_name, key)) for key in request["Keys"]]
+            responses[table_name] = [item for item in found if item]
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+
+class LocalFileBody:
+    """
+    Streaming body over bytes start..end of a local file, with the iter_chunks method the Lambda reads
+    S3 objects with and the read/readinto methods of botocore's StreamingBody and its urllib3 stream.
+    With a `bandwidth` (bytes/sec), reads take as long as they would over one connection.
+    `largest_read` is the largest read or readinto request any body has served.
+    """
+
+    largest_read = 0
+
+    def __init__(self, path, start=0, end=None, bandwidth=None):
+        self.path = path
+        self.start = start
+        self.remaining = (os.path.getsize(path) if end is None else end + 1) - start
+        self.bandwidth = bandwidth
+        self._file = None
+
+    def _throttle(self, size):
+        if self.bandwidth and size:
+            time.sleep(size / self.bandwidth)
+
+    def iter_chunks(self, chunk_size):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "rb")
+            self._file.seek(self.start)
+        return self._file
+
+    def read(self, amt=None):
+        size = self.remaining if amt is None else min(amt, self.remaining)
+        LocalFileBody.largest_read = max(LocalFileBody.largest_read, size)
+        data = self._open().read(size) if size > 0 else b""
+        self.remaining -= len(data)
+        self._throttle(len(data))
+        if not data:
+            self.close()
+        return data
+
+    def readinto(self, buffer):
+        view = memoryview(buffer)[:self.remaining]
+        LocalFileBody.largest_read = max(LocalFileBody.largest_read, len(view))
+        count = self._open().readinto(view) if len(view) else 0
+        self.remaining -= count
+        self._throttle(count)
+        if not count:
+            self.close()
+        return count
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LocalS3Error(Exception):
+    """Carries an error code in the shape of botocore's ClientError.response."""
+
+    def __init__(self, code, message):
+        super().__init__(f"An error occurred ({code}): {message}")
+        self.response = {"Error": {"Code": code, "Message": message}}
+
+
+class LocalFileS3(RequestCounter):
+    """
+    Stands in for the S3 client and serves objects from local files, given as {key: path} for any bucket.
+    Each request takes `latency` seconds and each body streams at `bandwidth` bytes/sec, if given.
+    """
+
+    def __init__(self, files, latency=0.0, bandwidth=None):
+        super().__init__()
+        self.files = files
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def etag(self, key):
+        stat = os.stat(self.files[key])
+        return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+    def _request(self, operation):
+        self.count(operation)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        self._request("GetObject")
+        if IfMatch is not None and IfMatch != self.etag(Key):
+            raise LocalS3Error("PreconditionFailed", "At least one of the pre-conditions you specified did not hold")
+        start, end = 0, None
+        if Range:
+            first, last = Range.split("=")[1].split("-")
+            start, end = int(first), int(last) if last else None
+        return {"Body": LocalFileBody(self.files[Key], start, end, self.bandwidth), "ETag": self.etag(Key)}
+
+    def head_object(self, Bucket, Key):
+        self._request("HeadObject")
+        return {"ContentLength": os.path.getsize(self.files[Key]), "ETag": self.etag(Key)}
+
+
+class QueueingLambdaClient(RequestCounter):
+    """Stands in for the Lambda client; asynchronous invocations are queued for the caller to run."""
+
+    def __init__(self):
+        super().__init__()
+        self.queued = []
+
+    def invoke(self, FunctionName, Payload, InvocationType="RequestResponse", **kwargs):
+        self.count("Invoke")
+        with self._lock:
+            self.queued.append(json.loads(Payload))
+        return {"StatusCode": 202}
+
+
+class LocalSQSClient(RequestCounter):
+    """
+    Stands in for the SQS client with one in-memory standard queue: received messages stay invisible
+    for their visibility timeout and are only removed by DeleteMessageBatch with their latest receipt
+    handle. Long polls wait for a visible message up to WaitTimeSeconds. `latency` seconds are added to
+    every request, as a stand-in for the round trip to SQS; a `delete_failure_rate` share of deletes fails.
+    """
+
+    def __init__(self, queue_url="https://sqs.us-east-1.amazonaws.com/000000000000/LambdaFailureQueue",
+                 latency=0.0, delete_failure_rate=0.0, seed=1):
+        super().__init__()
+        self.queue_url = queue_url
+        self.latency = latency
+        self.delete_failure_rate = delete_failure_rate
+        self.messages = {}  # message id -> {"body", "visible_at", "receipt_handle", "receive_count"}
+        self._rng = random.Random(seed)
+        self._available = threading.Condition(self._lock)
+        self._next_id = 0
+
+    def _request(self, operation):
+        self.count(operation)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_queue_url(self, QueueName, **kwargs):
+        self._request("GetQueueUrl")
+        return {"QueueUrl": self.queue_url}
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        self._request("SendMessage")
+        with self._available:
+            self._next_id += 1
+            message_id = f"{self._next_id:08d}-0000-0000-0000-000000000000"
+            self.messages[message_id] = {"body": MessageBody, "visible_at": 0.0, "receipt_handle": None,
+                                         "receive_count": 0}
+            self._available.notify_all()
+        return {"MessageId": message_id}
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages=1, WaitTimeSeconds=0, VisibilityTimeout=30, **kwargs):
+        if not 1 <= MaxNumberOfMessages <= 10:
+            raise ValueError("MaxNumberOfMessages must be between 1 and 10")
+        self._request("ReceiveMessage")
+        deadline = time.monotonic() + WaitTimeSeconds
+        with self._available:
+            while True:
+                now = time.monotonic()
+                visible = [message_id for message_id, message in self.messages.items() if message["visible_at"] <= now]
+                if visible or now >= deadline:
+                    break
+                self._available.wait(min(deadline - now, 0.1))
+            received = []
+            for message_id in visible[:MaxNumberOfMessages]:
+                message = self.messages[message_id]
+                message["visible_at"] = now + VisibilityTimeout
+                message["receive_count"] += 1
+                message["receipt_handle"] = f"{message_id}#{message['receive_count']}"
+                received.append({"MessageId": message_id, "ReceiptHandle": message["receipt_handle"],
+                                 "Body": message["body"]})
+        return {"Messages": received} if received else {}
+
+    def delete_message_batch(self, QueueUrl, Entries, **kwargs):
+        if not 1 <= len(Entries) <= 10:
+            raise ValueError("DeleteMessageBatch takes between 1 and 10 entries")
+        self._request("DeleteMessageBatch")
+        successful, failed = [], []
+        with self._lock:
+            for entry in Entries:
+                message_id = entry["ReceiptHandle"].split("#")[0]
+                message = self.messages.get(message_id)
+                if self._rng.random() < self.delete_failure_rate:
+                    failed.append({"Id": entry["Id"], "Code": "InternalError", "SenderFault": False})
+                elif message is not None and message["receipt_handle"] != entry["ReceiptHandle"]:
+                    failed.append({"Id": entry["Id"], "Code": "ReceiptHandleIsInvalid", "SenderFault": True})
+                else:
+                    self.messages.pop(message_id, None)
+                    successful.append({"Id": entry["Id"]})
+        return {"Successful": successful, "Failed": failed}
+
+    def release_all(self):
+        """Makes every in-flight message visible again, as if their visibility timeouts had passed."""
+        with self._available:
+            for message in self.messages.values():
+                message["visible_at"] = 0.0
+            self._available.notify_all()
+
+
+class LocalUploadS3(RequestCounter):
+    """
+    Stands in for the S3 client's PutObject, multipart upload, ListObjectsV2 and DeleteObjects operations.
+    Bodies are hashed and discarded, so multi-GB uploads need no memory; objects keep their size,
+    S3-style ETag and last-modified time. With `keep_bodies`, PutObject bodies are kept for GetObject.
+    Each request takes `latency` seconds plus its body size over `bandwidth` bytes/sec per connection,
+    as a stand-in for the network. Uploads of the part numbers in `fail_parts` raise until it is cleared.
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None, keep_bodies=False):
+        super().__init__()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.keep_bodies = keep_bodies
+        self.fail_parts = set()
+        self.objects = {}  # (bucket, key) -> {"size": ..., "ETag": ..., "LastModified": ...}
+        self.bodies = {}  # (bucket, key) -> bytes, with keep_bodies
+        self._keys = {}  # bucket -> sorted keys, for listing
+        self.uploads = {}  # upload id -> {"bucket", "key", "parts": {number: (size, md5 digest)}}
+
+    def _transfer(self, operation, size=0):
+        self.count(operation)
+        delay = self.latency + (size / self.bandwidth if self.bandwidth else 0)
+        if delay:
+            time.sleep(delay)
+
+    @staticmethod
+    def _verify_checksum(data, kwargs):
+        digests = {"ChecksumCRC32": lambda: zlib.crc32(data).to_bytes(4, "big"),
+                   "ChecksumSHA1": lambda: hashlib.sha1(data).digest(),
+                   "ChecksumSHA256": lambda: hashlib.sha256(data).digest()}
+        for parameter, digest in digests.items():
+            if parameter in kwargs:
+                if base64.b64encode(digest()).decode("ascii") != kwargs[parameter]:
+                    raise ValueError(f"BadDigest: {parameter} does not match the body")
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        if hasattr(Body, "read"):
+            Body = Body.read()
+        elif isinstance(Body, str):
+            Body = Body.encode("utf-8")
+        self._verify_checksum(Body, kwargs)
+        self._transfer("PutObject", len(Body))
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        self.add_object(Bucket, Key, len(Body), etag)
+        if self.keep_bodies:
+            with self._lock:
+                self.bodies[(Bucket, Key)] = Body
+        return {"ETag": etag}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        if (Bucket, Key) not in self.bodies:
+            self._transfer("GetObject")
+            raise LocalS3Error("NoSuchKey", f"The specified key does not exist: {Key}")
+        body = self.bodies[(Bucket, Key)]
+        self._transfer("GetObject", len(body))
+        return {"Body": io.BytesIO(body), "ContentLength": len(body), "ETag": self.objects[(Bucket, Key)]["ETag"]}
+
+    def add_object(self, bucket, key, size, etag, last_modified=None):
+        """Stores an object's metadata, e.g. to start from a bucket that already holds a copy of a tree."""
+        with self._lock:
+            if (bucket, key) not in self.objects:
+                bisect.insort(self._keys.setdefault(bucket, []), key)
+            self.objects[(bucket, key)] = {"size": size, "ETag": etag,
+                                           "LastModified": last_modified or datetime.now(timezone.utc)}
+
+    def list_objects_v2(self, Bucket, Prefix="", ContinuationToken=None, MaxKeys=1000, **kwargs):
+        self._transfer("ListObjectsV2")
+        with self._lock:
+            keys = self._keys.get(Bucket, [])
+            start = bisect.bisect_right(keys, ContinuationToken) if ContinuationToken else bisect.bisect_left(keys, Prefix)
+            page = []
+            for key in keys[start:]:
+                if not key.startswith(Prefix) or len(page) == MaxKeys:
+                    break
+                page.append(key)
+            contents = [{"Key": key, "Size": self.objects[(Bucket, key)]["size"],
+                         "ETag": self.objects[(Bucket, key)]["ETag"],
+                         "LastModified": self.objects[(Bucket, key)]["LastModified"]} for key in page]
+            truncated = len(page) == MaxKeys and start + len(page) < len(keys) and \
+                keys[start + len(page)].startswith(Prefix)
+        response = {"Contents": contents, "KeyCount": len(contents), "IsTruncated": truncated}
+        if truncated:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        if len(Delete["Objects"]) > 1000:
+            raise ValueError("DeleteObjects takes at most 1000 keys")
+        self._transfer("DeleteObjects")
+        with self._lock:
+            keys = self._keys.get(Bucket, [])
+            for entry in Delete["Objects"]:
+                self.bodies.pop((Bucket, entry["Key"]), None)
+                if self.objects.pop((Bucket, entry["Key"]), None) is not None:
+                    keys.pop(bisect.bisect_left(keys, entry["Key"]))
+        return {} if Delete.get("Quiet") else {"Deleted": [{"Key": entry["Key"]} for entry in Delete["Objects"]]}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self._transfer("CreateMultipartUpload")
+        with self._lock:
+            upload_id = f"upload-{len(self.uploads) + 1}"
+            self.uploads[upload_id] = {"bucket": Bucket, "key": Key, "parts": {}}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        if PartNumber in self.fail_parts:
+            self._transfer("UploadPart")
+            raise ConnectionError(f"Connection reset while uploading part {PartNumber}")
+        self._verify_checksum(Body, kwargs)
+        self._transfer("UploadPart", len(Body))
+        digest = hashlib.md5(Body).digest()
+        with self._lock:
+            self.uploads[UploadId]["parts"][PartNumber] = (len(Body), digest)
+        return {"ETag": f'"{digest.hex()}"'}
+
+    def list_parts(self, Bucket, Key, UploadId, PartNumberMarker=0, MaxParts=1000, **kwargs):
+        self._transfer("ListParts")
+        if UploadId not in self.uploads:
+            raise KeyError(f"NoSuchUpload: {UploadId}")
+        numbers = sorted(number for number in self.uploads[UploadId]["parts"] if number > PartNumberMarker)
+        page = numbers[:MaxParts]
+        parts = [{"PartNumber": number, "Size": self.uploads[UploadId]["parts"][number][0],
+                  "ETag": f'"{self.uploads[UploadId]["parts"][number][1].hex()}"'} for number in page]
+        response = {"Parts": parts, "IsTruncated": len(numbers) > MaxParts}
+        if response["IsTruncated"]:
+            response["NextPartNumberMarker"] = page[-1]
+        return response
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self._transfer("CompleteMultipartUpload")
+        with self._lock:
+            upload = self.uploads.pop(UploadId)
+            stored = upload["parts"]
+            numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+            if numbers != sorted(numbers) or any(f'"{stored[number][1].hex()}"' != part["ETag"]
+                                                 for number, part in zip(numbers, MultipartUpload["Parts"])):
+                raise ValueError("InvalidPart: parts are out of order or do not match the uploaded ones")
+            digests = b"".join(stored[number][1] for number in numbers)
+            etag = f'"{hashlib.md5(digests).hexdigest()}-{len(numbers)}"'
+        self.add_object(Bucket, Key, sum(stored[number][0] for number in numbers), etag)
+        return {"ETag": etag}
+
+
+def multipart_etag(path, part_size):
+    """Returns the ETag S3 gives `path` when it is uploaded in parts of `part_size` bytes."""
+    digests = []
+    with open(path, "rb") as f:
+        for part in iter(lambda: f.read(part_size), b""):
+            digests.append(hashlib.md5(part).digest())
+    return f'"{hashlib.md5(b"".join(digests)).hexdigest()}-{len(digests)}"'
+
+
+class LocalRedshift:
+    """
+    Stands in for a Redshift cluster on top of a local PostgreSQL, which speaks the same protocol.
+    install() adds what the PostgreSQL catalog lacks: an stv_slices table with `slices` rows, an
+    stl_load_errors table, and pg_last_copy_id() / pg_last_copy_count() functions. connect() returns
+    psycopg2 connections whose cursors run Redshift's COPY ... FROM 's3://...' themselves: the staged
+    files (or the files a MANIFEST lists) are read from `s3`, a LocalUploadS3 with keep_bodies, and
+    fed to PostgreSQL's COPY FROM STDIN. A file PostgreSQL rejects is retried line by line; the bad
+    lines go to stl_load_errors, and more of them than MAXERROR fails the COPY, as on Redshift.
+    """
+
+    COPY_PATTERN = re.compile(r"^\s*COPY\s+(?P<table>[\w.]+)\s*(?:\((?P<columns>[^)]*)\))?\s+FROM\s+"
+                              r"'s3://(?P<bucket>[^/']+)/(?P<key>[^']*)'(?P<options>.*?);?\s*$", re.I | re.S)
+    ERROR_CODES = {"22P02": 1207, "22001": 1204, "22003": 1216, "22007": 1205, "22008": 1206, "23502": 1213}
+
+    def __init__(self, dsn, s3, slices=4):
+        import psycopg2
+        import psycopg2.extensions
+        self.dsn = dsn
+        self.s3 = s3
+        self.slices = slices
+        self.copies = 0
+        stand_in = self
+
+        class Cursor(psycopg2.extensions.cursor):
+            def execute(self, sql, params=None):
+                return stand_in.execute(self, sql, params)
+
+        self.cursor_class = Cursor
+        self._base_execute = psycopg2.extensions.cursor.execute
+        self._log = psycopg2.connect(dsn)  # stl_load_errors rows outlive the failed COPY's transaction
+        self._log.autocommit = True
+        self._lock = threading.Lock()
+
+    def install(self):
+        with self._log.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS stv_slices; CREATE TABLE stv_slices (node INT, slice INT);")
+            cursor.execute("INSERT INTO stv_slices SELECT 0, generate_series(0, %s - 1);", (self.slices,))
+            cursor.execute("CREATE TABLE IF NOT EXISTS stl_load_errors (query INT, session INT, filename TEXT, "
+                           "line_number BIGINT, colname TEXT, err_code INT, err_reason TEXT, raw_line TEXT, "
+                           "starttime TIMESTAMP DEFAULT now());")
+            cursor.execute("SELECT COALESCE(MAX(query), 0) FROM stl_load_errors;")  # Query ids stay unique
+            self.copies = cursor.fetchone()[0]
+            for name, setting in [("pg_last_copy_id", "last_copy_id"), ("pg_last_copy_count", "last_copy_count")]:
+                cursor.execute(f"CREATE OR REPLACE FUNCTION {name}() RETURNS BIGINT LANGUAGE sql AS "
+                               f"$$ SELECT COALESCE(NULLIF(current_setting('redshift.{setting}', true), ''), "
+                               f"'-1')::BIGINT $$;")
+        return self
+
+    def connect(self, *args, **kwargs):
+        import psycopg2
+        return psycopg2.connect(*args, cursor_factory=self.cursor_class, **kwargs)
+
+    def execute(self, cursor, sql, params):
+        rendered = cursor.mogrify(sql, params).decode("utf-8") if params is not None else str(sql)
+        match = self.COPY_PATTERN.match(rendered)
+        if match and " STDIN" not in rendered.upper():
+            return self.copy(cursor, match)
+        return self._base_execute(cursor, sql, params)
+
+    def _read_files(self, bucket, key, manifest):
+        if manifest:
+            entries = json.loads(self.s3.get_object(Bucket=bucket, Key=key)["Body"].read())["entries"]
+            return [entry["url"][len("s3://"):].split("/", 1) for entry in entries]
+        listing = self.s3.list_objects_v2(Bucket=bucket, Prefix=key)
+        return [(bucket, item["Key"]) for item in listing.get("Contents", [])]
+
+    def copy(self, cursor, match):
+        options = " ".join(match.group("options").split())
+        upper = options.upper()
+        table = match.group("table")
+        columns = [name.strip() for name in match.group("columns").split(",")] if match.group("columns") else None
+        null_as = re.search(r"NULL\s+AS\s+'((?:[^']|'')*)'", options, re.I)
+        null_as = null_as.group(1).replace("''", "'") if null_as else "\\N"
+        max_errors = int(re.search(r"MAXERROR\s+(?:AS\s+)?(\d+)", upper).group(1)) if "MAXERROR" in upper else 0
+        skip = int(re.search(r"IGNOREHEADER\s+(?:AS\s+)?(\d+)", upper).group(1)) if "IGNOREHEADER" in upper else 0
+        is_json = "JSON" in upper
+        if is_json and columns is None:
+            self._base_execute(cursor, "SELECT column_name FROM information_schema.columns WHERE table_name = %s "
+                                       "ORDER BY ordinal_position;", (table.split(".")[-1],))
+            columns = [row[0] for row in cursor.fetchall()]
+        target = f"{table} ({', '.join(columns)})" if columns else table
+        copy_sql = f"COPY {target} FROM STDIN WITH (FORMAT csv, NULL '{null_as.replace(chr(39), chr(39) * 2)}')"
+        with self._lock:
+            self.copies += 1
+            query_id = self.copies
+        self._base_execute(cursor, "SELECT pg_backend_pid();")
+        session = cursor.fetchone()[0]
+
+        loaded, errors = 0, 0
+        for bucket, key in self._read_files(match.group("bucket"), match.group("key"), "MANIFEST" in upper):
+            data = self.s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+            if "GZIP" in upper:
+                data = gzip.decompress(data)
+            lines = data.decode("utf-8").splitlines(keepends=True)[skip:]
+            if is_json:
+                lines = [self._json_line(line, columns, null_as) for line in lines if line.strip()]
+            self._base_execute(cursor, "SAVEPOINT redshift_copy_file;")
+            try:
+                cursor.copy_expert(copy_sql, io.StringIO("".join(lines)))
+                loaded += cursor.rowcount
+                continue
+            except Exception:
+                self._base_execute(cursor, "ROLLBACK TO SAVEPOINT redshift_copy_file;")
+            for number, line in enumerate(lines, start=skip + 1):
+                self._base_execute(cursor, "SAVEPOINT redshift_copy_line;")
+                try:
+                    cursor.copy_expert(copy_sql, io.StringIO(line))
+                    loaded += 1
+                except Exception as e:
+                    self._base_execute(cursor, "ROLLBACK TO SAVEPOINT redshift_copy_line;")
+                    errors += 1
+                    column = re.search(r'column (\w+)', getattr(e.diag, "context", "") or "")
+                    with self._log.cursor() as log:
+                        log.execute("INSERT INTO stl_load_errors (query, session, filename, line_number, colname, "
+                                    "err_code, err_reason, raw_line) VALUES (%s, %s, %s, %s, %s, %s, %s, %s);",
+                                    (query_id, session, f"s3://{bucket}/{key}", number,
+                                     column.group(1) if column else "", self.ERROR_CODES.get(e.pgcode, 1200),
+                                     e.diag.message_primary, line.rstrip("\r\n")))
+                    if errors > max_errors:
+                        raise RuntimeError(f"Load into table '{table}' failed. Check 'stl_load_errors' system "
+                                           f"table for details.") from e
+        self._base_execute(cursor, "SELECT set_config('redshift.last_copy_id', %s, false), "
+                                   "set_config('redshift.last_copy_count', %s, false);", (str(query_id), str(loaded)))
+
+    @staticmethod
+    def _json_line(line, columns, null_as):
+        """Turns one JSON object into a CSV line of `columns`, matching keys case-insensitively ('auto ignorecase')."""
+        record = {key.lower(): value for key, value in json.loads(line).items()}
+        values = [record.get(column.lower()) for column in columns]
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow([null_as if value is None else value for value in values])
+        return buffer.getvalue()
+
+    def close(self):
+        self._log.close()
+
+
+def scaled_waiter(waiter, time_scale):
+    """A waiters.py Waiter with its backoff delays multiplied by time_scale, for waits in scaled time."""
+    add_src_path("")
+    import waiters
+    backoff = waiter.backoff
+    return waiters.Waiter(waiter.name, waiter.describe, waiter.success, waiter.failure, waiter.pending,
+                          waiter.batch_size, waiters.Backoff(backoff.first * time_scale, backoff.factor,
+                                                             backoff.cap * time_scale, backoff.jitter), waiter.timeout)
+
+
+class LocalAthena(RequestCounter):
+    """
+    Stands in for the Athena client's StartQueryExecution, GetQueryExecution, BatchGetQueryExecution
+    and StopQueryExecution. A query runs for duration(sql) seconds times `time_scale`, and fails if
+    its SQL contains "FAIL". Starting a query while `quota` are running raises TooManyRequestsException.
+    `intervals` records each query's (start, end) time, to check how many ran at once.
+    """
+
+    class exceptions:
+        class TooManyRequestsException(Exception):
+            pass
+
+    def __init__(self, duration, time_scale=1.0, quota=None):
+        super().__init__()
+        self.duration = duration
+        self.time_scale = time_scale
+        self.quota = quota
+        self.queries = {}  # id -> {"sql", "database", "start", "end", "state"}
+        self.lock = threading.Lock()
+
+    def _state(self, query):
+        if query["state"] == "RUNNING" and time.monotonic() >= query["end"]:
+            query["state"] = "FAILED" if "FAIL" in query["sql"] else "SUCCEEDED"
+        return query["state"]
+
+    def running(self):
+        with self.lock:
+            return sum(self._state(query) == "RUNNING" for query in self.queries.values())
+
+    def start_query_execution(self, QueryString, QueryExecutionContext=None, ResultConfiguration=None, WorkGroup=None):
+        self.count("StartQueryExecution")
+        if self.quota is not None and self.running() >= self.quota:
+            self.count("TooManyRequestsException")
+            raise self.exceptions.TooManyRequestsException("Too many queries running")
+        now = time.monotonic()
+        query_id = f"query-{len(self.queries) + 1:06d}"
+        with self.lock:
+            self.queries[query_id] = {"sql": QueryString, "database": (QueryExecutionContext or {}).get("Database"),
+                                      "output": (ResultConfiguration or {}).get("OutputLocation"), "start": now,
+                                      "end": now + self.duration(QueryString) * self.time_scale, "state": "RUNNING"}
+        return {"QueryExecutionId": query_id}
+
+    def _execution(self, query_id):
+        query = self.queries[query_id]
+        state = self._state(query)
+        return {"QueryExecutionId": query_id, "Query": query["sql"],
+                "Status": {"State": state, **({"StateChangeReason": "FAILED: the query asked to fail"}
+                                              if state == "FAILED" else {})},
+                "Statistics": {"DataScannedInBytes": len(query["sql"]) * 1000},
+                "ResultConfiguration": {"OutputLocation": f"{query['output']}{query_id}.csv"}}
+
+    def get_query_execution(self, QueryExecutionId):
+        self.count("GetQueryExecution")
+        with self.lock:
+            return {"QueryExecution": self._execution(QueryExecutionId)}
+
+    def batch_get_query_execution(self, QueryExecutionIds):
+        self.count("BatchGetQueryExecution")
+        with self.lock:
+            return {"QueryExecutions": [self._execution(query_id) for query_id in QueryExecutionIds],
+                    "UnprocessedQueryExecutionIds": []}
+
+    def stop_query_execution(self, QueryExecutionId):
+        self.count("StopQueryExecution")
+        with self.lock:
+            query = self.queries[QueryExecutionId]
+            if self._state(query) == "RUNNING":
+                query.update(state="CANCELLED", end=time.monotonic())
+        return {}
+
+    def intervals(self):
+        return [(query["start"], query["end"]) for query in self.queries.values()]
@@ -0,0 +1,79 @@
+"""
+Runs the ETL Lambda locally with a short fake deadline to exercise checkpointed, resumable ingestion.
+
+Each invocation gets a FakeLambdaContext with --timeout-ms; instead of re-invoking the deployed
+function, the continuation events are queued and run in-process until the object is loaded.
+Point boto3 at local S3 and DynamoDB stand-ins:
+
+    AWS_ENDPOINT_URL_S3=http://localhost:5000 AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 \
+        AWS_DEFAULT_REGION=us-east-1 python benchmarks/run_resumable_ingest.py --size-mb 50
+"""
+import argparse
+import contextlib
+import os
+import threading
+import time
+
+import boto3
+
+from common import FakeLambdaContext, SyntheticCsvStream, add_src_path, ensure_table, s3_event
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bucket", default="etl-bench")
+    parser.add_argument("--key", default="bench/employees_resumable.csv")
+    parser.add_argument("--size-mb", type=float, default=50)
+    parser.add_argument("--timeout-ms", type=int, default=30000, help="Deadline given to each invocation")
+    parser.add_argument("--max-invocations", type=int, default=1000)
+    args = parser.parse_args()
+
+    s3 = boto3.client("s3")
+    with contextlib.suppress(s3.exceptions.BucketAlreadyOwnedByYou):
+        s3.create_bucket(Bucket=args.bucket)
+    stream = SyntheticCsvStream(int(args.size_mb * 1024 ** 2))
+    s3.upload_fileobj(stream, args.bucket, args.key)
+    etag = s3.head_object(Bucket=args.bucket, Key=args.key)["ETag"]
+    print(f"Uploaded s3://{args.bucket}/{args.key}: {stream.rows} rows")
+
+    dynamodb_client = lambda_function.get_client("dynamodb")
+    ensure_table(dynamodb_client, lambda_function.TABLE_NAME, "EMPLOYEE_ID")
+    ensure_table(dynamodb_client, lambda_function.CHECKPOINT_TABLE_NAME, "OBJECT_ID")
+
+    # Count every item sent to BatchWriteItem so duplicated work would show up
+    sent = {"items": 0}
+    lock = threading.Lock()
+
+    def count_items(params, **kwargs):
+        with lock:
+            sent["items"] += len(params["RequestItems"].get(lambda_function.TABLE_NAME, []))
+
+    load_client = lambda_function.get_client(lambda_function.LOAD_CLIENT)
+    load_client.meta.events.register("provide-client-params.dynamodb.BatchWriteItem", count_items)
+
+    queued = []
+    lambda_function.continue_in_new_invocation = lambda records, context: queued.append({"Records": records})
+
+    event = s3_event(args.bucket, args.key, etag)
+    invocations = 0
+    start = time.perf_counter()
+    while event and invocations < args.max_invocations:
+        invocations += 1
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            response = lambda_function.lambda_handler(event, FakeLambdaContext(args.timeout_ms))
+        result = next(iter(response["results"].values()))
+        print(f"Invocation {invocations}: {result['status']}, {result['written']} items written")
+        event = queued.pop() if queued else None
+    elapsed = time.perf_counter() - start
+
+    print(f"Invocations:       {invocations}")
+    print(f"Total time:        {elapsed:.1f} s ({stream.rows / elapsed:,.0f} rows/s)")
+    print(f"Rows in file:      {stream.rows}")
+    print(f"Items sent:        {sent['items']} ({sent['items'] - stream.rows} more than the file, incl. UnprocessedItems retries)")
+
+
+if __name__ == "__main__":
+    main()
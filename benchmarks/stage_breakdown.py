@@ -0,0 +1,53 @@
+"""
+Runs the ETL Lambda on a local file and prints where the time went, stage by stage.
+
+The file is served to lambda_handler as if it were an S3 object, so extract, decompress, parse and
+transform run exactly as deployed. Writes go to a counting stand-in unless --dynamodb is given, in
+which case they go to the DynamoDB endpoint boto3 is configured for:
+
+    python benchmarks/stage_breakdown.py Week2/Day2/Data/employees.csv
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 AWS_DEFAULT_REGION=us-east-1 \
+        python benchmarks/stage_breakdown.py employees.ndjson.gz --dynamodb
+"""
+import argparse
+import contextlib
+import os
+
+from common import LocalFileS3, NullDynamoDBClient, add_src_path, s3_event
+
+add_src_path("Week2/Day2/src")
+import lambda_function  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV, JSON or NDJSON file, optionally .gz/.zst compressed")
+    parser.add_argument("--dynamodb", action="store_true", help="Write to DynamoDB instead of discarding items")
+    args = parser.parse_args()
+
+    key = os.path.basename(args.path)
+    lambda_function.clients["s3"] = LocalFileS3({key: args.path})
+    lambda_function.Checkpoint.save = lambda self: None
+    if not args.dynamodb:
+        lambda_function.clients["dynamodb"] = lambda_function.clients[lambda_function.LOAD_CLIENT] = NullDynamoDBClient()
+        lambda_function.create_write_limiter = lambda: lambda_function.WriteRateLimiter(None)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        response = lambda_function.lambda_handler(s3_event("local", key), None)
+    result = response["results"][f"local/{key}"]
+    metrics = result["metrics"]
+
+    print(f"{key}: {result['status']}" + (f" ({result['error']})" if result["error"] else ""))
+    total = metrics["total_ms"] or 1
+    for stage in lambda_function.STAGES + ("other",):
+        milliseconds = metrics[f"{stage}_ms"]
+        print(f"  {stage:<11} {milliseconds:10.1f} ms {100 * milliseconds / total:6.1f} %")
+    print(f"  {'total':<11} {metrics['total_ms']:10.1f} ms")
+    print(f"Rows: {metrics['rows']}  ({metrics['rows_per_second']:,.0f} rows/s)")
+    print(f"Bytes read: {metrics['bytes_read']:,}")
+    print(f"DynamoDB retries: {metrics['retries']}, throttles: {metrics['throttles']}")
+    print(f"Cold start: {metrics['cold_start']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Waits for AWS resources and queries to reach a state, for the scripts in this repository.
+
+Instead of each script sleeping a fixed 2, 10 or 30 seconds between checks, every wait polls on an
+adaptive schedule: quickly at first, when short jobs finish, then less and less often, up to a cap,
+with jitter so waits started together do not poll in lockstep. WaiterEngine runs any number of waits
+on one asyncio event loop, and polls of the same kind that fall due together are merged into one
+describe call where the API takes several ids (Athena, Glue, DMS and RDS; Redshift lists the clusters).
+Every wait has a timeout, and a wait task can be cancelled like any other.
+
+    from waiters import ATHENA_QUERY, REDSHIFT_CLUSTER_AVAILABLE, wait, wait_many
+
+    result = wait(REDSHIFT_CLUSTER_AVAILABLE, redshift, "my-redshift-cluster")
+    if result["outcome"] == "success":
+        print(result["response"]["Endpoint"]["Address"])
+    results = wait_many(ATHENA_QUERY, athena_client, query_ids, timeout=600)
+
+A result is a dict: resource id, outcome ("success", "failure" or "timeout"), the last state and
+describe response, the number of polls and the seconds waited. A describe call that fails (throttling,
+a network error) counts as a missed poll: the wait tries again on its next tick, and the result keeps
+the count of missed polls and the last error. A describe function raises LookupError for a resource
+that does not exist, e.g. a wrong cluster id, and the wait fails with it at once. retry() retries a call, e.g. a first
+database connection, on the same kind of schedule.
+"""
+import asyncio
+import random
+import time
+
+# Polls of one kind that fall due within this many seconds of each other share a describe call
+COALESCE_SECONDS = 0.05
+
+
+class Backoff:
+    """
+    Delays between polls: `first` seconds, then `factor` times longer each time up to `cap` seconds.
+    Each delay is drawn between (1 - jitter) and 1 times its value.
+    """
+
+    def __init__(self, first=1.0, factor=1.5, cap=30.0, jitter=0.2):
+        self.first = first
+        self.factor = factor
+        self.cap = cap
+        self.jitter = jitter
+
+    def delays(self):
+        delay = self.first
+        while True:
+            yield random.uniform(delay * (1 - self.jitter), delay)
+            delay = min(self.cap, delay * self.factor)
+
+
+class Waiter:
+    """
+    What to wait for: describe(client, ids) returns {id: (state, response)} for up to batch_size ids,
+    leaving out the ones it cannot find yet, or raises LookupError for ids that cannot exist. The wait succeeds on a `success` state, and fails on a
+    `failure` state or, when `pending` is given, on any state that is neither success nor pending.
+    """
+
+    def __init__(self, name, describe, success, failure=(), pending=None, batch_size=1, backoff=None, timeout=1800):
+        self.name = name
+        self.describe = describe
+        self.success = set(success)
+        self.failure = set(failure)
+        self.pending = None if pending is None else set(pending)
+        self.batch_size = batch_size
+        self.backoff = backoff or Backoff()
+        self.timeout = timeout
+
+    def outcome(self, state):
+        if state in self.success:
+            return "success"
+        if state in self.failure or (self.pending is not None and state is not None and state not in self.pending):
+            return "failure"
+        return None
+
+
+def describe_athena_queries(client, query_ids):
+    response = client.batch_get_query_execution(QueryExecutionIds=query_ids)
+    return {execution["QueryExecutionId"]: (execution["Status"]["State"], execution)
+            for execution in response["QueryExecutions"]}
+
+
+def describe_glue_crawlers(client, names):
+    """A crawler's state; once it is READY again, the status of its last crawl (SUCCEEDED, FAILED, CANCELLED)."""
+    results = {}
+    for crawler in client.batch_get_crawlers(CrawlerNames=names)["Crawlers"]:
+        state = crawler["State"]
+        if state == "READY":
+            state = crawler.get("LastCrawl", {}).get("Status", state)
+        results[crawler["Name"]] = (state, crawler)
+    return results
+
+
+def describe_dms_tasks(client, task_arns):
+    response = client.describe_replication_tasks(Filters=[{"Name": "replication-task-arn", "Values": task_arns}])
+    return {task["ReplicationTaskArn"]: (task["Status"], task) for task in response["ReplicationTasks"]}
+
+
+def describe_rds_instances(client, instance_ids):
+    response = client.describe_db_instances(Filters=[{"Name": "db-instance-id", "Values": instance_ids}])
+    return {instance["DBInstanceIdentifier"]: (instance["DBInstanceStatus"], instance)
+            for instance in response["DBInstances"]}
+
+
+def describe_redshift_clusters(client, cluster_ids):
+    """One cluster is described by id; several are listed in one go and picked out."""
+    if len(cluster_ids) == 1:
+        try:
+            clusters = client.describe_clusters(ClusterIdentifier=cluster_ids[0])["Clusters"]
+        except client.exceptions.ClusterNotFoundFault as e:
+            raise LookupError(f"Redshift cluster '{cluster_ids[0]}' not found") from e
+    else:
+        clusters = [cluster for page in client.get_paginator("describe_clusters").paginate()
+                    for cluster in page["Clusters"]]
+    return {cluster["ClusterIdentifier"]: (cluster["ClusterStatus"], cluster) for cluster in clusters
+            if cluster["ClusterIdentifier"] in cluster_ids}
+
+
+# The waits the scripts use. Each backoff is capped at the interval the script used to sleep, so a wait
+# never notices a change later than before; it notices early ones sooner.
+ATHENA_QUERY = Waiter("athena-query", describe_athena_queries, success={"SUCCEEDED"},
+                      failure={"FAILED", "CANCELLED"}, batch_size=50, backoff=Backoff(0.2, 1.5, 2.0), timeout=1800)
+GLUE_CRAWLER_FINISHED = Waiter("glue-crawler", describe_glue_crawlers, success={"SUCCEEDED"},
+                               failure={"FAILED", "CANCELLED"}, batch_size=100, backoff=Backoff(2.0, 1.5, 10.0),
+                               timeout=3600)
+DMS_TASK_READY = Waiter("dms-task-ready", describe_dms_tasks, success={"ready"}, pending={"creating"},
+                        batch_size=100, backoff=Backoff(1.0, 1.5, 10.0), timeout=1800)
+RDS_INSTANCE_AVAILABLE = Waiter("rds-instance-available", describe_rds_instances, success={"available"},
+                                failure={"failed", "deleting", "storage-full", "incompatible-network",
+                                         "incompatible-option-group", "incompatible-parameters",
+                                         "incompatible-restore", "inaccessible-encryption-credentials"},
+                                batch_size=100, backoff=Backoff(5.0, 1.5, 30.0), timeout=3600)
+REDSHIFT_CLUSTER_AVAILABLE = Waiter("redshift-cluster-available", describe_redshift_clusters,
+                                    success={"available"},
+                                    failure={"deleting", "hardware-failure", "storage-full", "incompatible-hsm",
+                                             "incompatible-network", "incompatible-parameters",
+                                             "incompatible-restore"},
+                                    batch_size=100, backoff=Backoff(5.0, 1.5, 30.0), timeout=3600)
+CONNECT_BACKOFF = Backoff(1.0, 2.0, 10.0)  # For retry(), e.g. the first connection to a new database
+
+
+class BatchPoller:
+    """
+    Describes resources of one Waiter with one client. Polls requested within COALESCE_SECONDS of
+    each other are answered by the same describe calls, batch_size ids each, run in a worker thread
+    so the event loop keeps going. A poll is answered with (state, response, error); error is the
+    exception of a failed describe call, for the wait to retry. LookupError is raised to the waits.
+    """
+
+    def __init__(self, waiter, client, coalesce=COALESCE_SECONDS):
+        self.waiter = waiter
+        self.client = client
+        self.coalesce = coalesce
+        self.pending = {}  # id -> futures waiting for its next description
+        self.flush_task = None
+        self.calls = 0
+
+    async def poll(self, resource_id):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.setdefault(resource_id, []).append(future)
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush())
+        return await future
+
+    async def flush(self):
+        await asyncio.sleep(self.coalesce)
+        pending, self.pending, self.flush_task = self.pending, {}, None
+        ids = list(pending)
+        for start in range(0, len(ids), self.waiter.batch_size):
+            batch = ids[start:start + self.waiter.batch_size]
+            self.calls += 1
+            try:
+                described = await asyncio.to_thread(self.waiter.describe, self.client, batch)
+                answers = {resource_id: described.get(resource_id, (None, None)) + (None,) for resource_id in batch}
+            except LookupError as e:
+                for resource_id in batch:
+                    for future in pending[resource_id]:
+                        if not future.done():
+                            future.set_exception(e)
+                continue
+            except Exception as e:  # A missed poll, not the end of the waits
+                answers = {resource_id: (None, None, e) for resource_id in batch}
+            for resource_id in batch:
+                for future in pending[resource_id]:
+                    if not future.done():  # A cancelled wait leaves its future cancelled
+                        future.set_result(answers[resource_id])
+
+
+class WaiterEngine:
+    """Runs waits on the current event loop, sharing one BatchPoller per (waiter, client)."""
+
+    def __init__(self, coalesce=COALESCE_SECONDS):
+        self.coalesce = coalesce
+        self.pollers = {}
+
+    def poller(self, waiter, client):
+        key = (waiter.name, id(client))
+        if key not in self.pollers:
+            self.pollers[key] = BatchPoller(waiter, client, self.coalesce)
+        return self.pollers[key]
+
+    def stats(self):
+        """Describe calls made, per waiter name."""
+        calls = {}
+        for (name, _), poller in self.pollers.items():
+            calls[name] = calls.get(name, 0) + poller.calls
+        return calls
+
+    async def wait(self, waiter, client, resource_id, timeout=None, on_state=None):
+        """
+        Polls until the resource reaches a success or failure state, or `timeout` seconds (the
+        waiter's by default) pass; returns the result. on_state(resource_id, state) is called
+        whenever the state changes. A failed describe call is retried on the next tick.
+        """
+        poller = self.poller(waiter, client)
+        started = time.monotonic()
+        result = {"id": resource_id, "outcome": None, "state": None, "response": None, "polls": 0,
+                  "missed_polls": 0, "error": None}
+
+        async def poll():
+            for delay in waiter.backoff.delays():
+                state, response, error = await poller.poll(resource_id)
+                result["polls"] += 1
+                if error is not None:
+                    result["missed_polls"] += 1
+                    result["error"] = f"{type(error).__name__}: {error}"
+                    await asyncio.sleep(delay)
+                    continue
+                if state != result["state"] and on_state:
+                    on_state(resource_id, state)
+                result.update(state=state, response=response)
+                outcome = waiter.outcome(state)
+                if outcome:
+                    return outcome
+                await asyncio.sleep(delay)
+
+        try:
+            result["outcome"] = await asyncio.wait_for(poll(), timeout or waiter.timeout)
+        except asyncio.TimeoutError:
+            result["outcome"] = "timeout"
+        result["elapsed_s"] = round(time.monotonic() - started, 3)
+        return result
+
+    async def wait_many(self, waiter, client, resource_ids, timeout=None, on_state=None):
+        """Waits for all the resources at once; returns {id: result}."""
+        results = await asyncio.gather(*[self.wait(waiter, client, resource_id, timeout, on_state)
+                                         for resource_id in resource_ids])
+        return {result["id"]: result for result in results}
+
+    async def retry(self, function, exceptions=(Exception,), backoff=CONNECT_BACKOFF, attempts=None, timeout=None,
+                    on_error=None):
+        """
+        Calls function() in a worker thread until it returns without raising one of `exceptions`,
+        at most `attempts` times or for `timeout` seconds; then the last error is raised.
+        on_error(attempt, error) is called after each failed attempt.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for attempt, delay in enumerate(backoff.delays(), start=1):
+            try:
+                return await asyncio.to_thread(function)
+            except exceptions as e:
+                if on_error:
+                    on_error(attempt, e)
+                if (attempts is not None and attempt >= attempts) or (
+                        deadline is not None and time.monotonic() + delay > deadline):
+                    raise
+            await asyncio.sleep(delay)
+
+
+def print_state(resource_id, state):
+    print(f"⏳ {resource_id}: {state or 'not found yet'}")
+
+
+def wait(waiter, client, resource_id, timeout=None, on_state=print_state):
+    """Waits for one resource from synchronous code; returns the result."""
+    return asyncio.run(WaiterEngine().wait(waiter, client, resource_id, timeout, on_state))
+
+
+def wait_many(waiter, client, resource_ids, timeout=None, on_state=print_state):
+    """Waits for several resources of one kind from synchronous code, side by side; returns {id: result}."""
+    return asyncio.run(WaiterEngine().wait_many(waiter, client, resource_ids, timeout, on_state))
+
+
+def retry(function, exceptions=(Exception,), backoff=CONNECT_BACKOFF, attempts=None, timeout=None, on_error=None):
+    """WaiterEngine.retry from synchronous code; returns what function() returns."""
+    return asyncio.run(WaiterEngine().retry(function, exceptions, backoff, attempts, timeout, on_error))